@@ -1,110 +1,246 @@
-from typing import List, Dict
-from fastapi import APIRouter, Depends
+from typing import List, Dict, AsyncIterator, Iterator, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.session import get_async_session
-from app.models.models import Crop, Season
+from app.db.session import get_read_session
+from app.models.models import Crop
 from app.schemas.crop_performance import CropPerformanceSchema
 from app.schemas.yield_prediction import YieldPredictionInput
-import math
-import joblib
-import pandas as pd
-import re
+from app.core.config import (
+    PREDICT_BATCH_CHUNK_SIZE,
+    PREDICT_BATCH_STREAM_THRESHOLD,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    INFERENCE_WORKERS,
+    MODEL_DIR,
+    DEFAULT_MODEL_VERSION,
+    MODEL_CACHE_SIZE,
+    MODEL_RELOAD_CHECK_SECONDS,
+    USE_TREE_EVALUATOR,
+    TREE_EVALUATOR_MAX_ROWS,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL_SECONDS,
+)
+from app.services.crop_performance import summary_performance_statement, to_performance_schema
+from app.services.inference import MicroBatchScheduler
+from app.services.metrics import MODEL_INFERENCE, MODEL_ROWS
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_cache import PredictionCache, canonical_key
+import json
+import time
 
 router = APIRouter()
 
-# Load the trained model
-model = joblib.load('yield_predictor_lgbm.joblib')
+# Trained models are loaded lazily, on first use, and reloaded when their artifact changes
+registry = ModelRegistry(
+    MODEL_DIR,
+    default_version=DEFAULT_MODEL_VERSION,
+    capacity=MODEL_CACHE_SIZE,
+    check_interval=MODEL_RELOAD_CHECK_SECONDS,
+    use_tree_evaluator=USE_TREE_EVALUATOR,
+    tree_evaluator_max_rows=TREE_EVALUATOR_MAX_ROWS,
+)
+
+# Repeated inputs are answered from memory until their model version changes
+prediction_cache = PredictionCache(max_entries=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS)
+registry.add_listener(prediction_cache.invalidate)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+batch_input_adapter = TypeAdapter(List[YieldPredictionInput])
 
 @router.get("/", response_model=List[Crop])
-async def read_crops(session: AsyncSession = Depends(get_async_session)):
+async def read_crops(session: AsyncSession = Depends(get_read_session)):
     result = await session.exec(select(Crop))
     crops = result.all()
     return crops
 
+def _predict_many(inputs: List[YieldPredictionInput], model_version: Optional[str] = None) -> List[float]:
+    version = model_version or registry.default_version
+    # Resolved first, so a lazy load or reload is not counted as inference time
+    model = registry.get(version)
+    start = time.perf_counter()
+    predictions = model.predict(inputs)
+    MODEL_INFERENCE.observe(time.perf_counter() - start, version)
+    MODEL_ROWS.inc(len(inputs), version)
+    return predictions
+
+def _predict_requests(requests: List[Tuple[Optional[str], YieldPredictionInput]]) -> List[float]:
+    # A micro-batch can mix model versions; score each version's rows together
+    rows_by_version: Dict[Optional[str], List[int]] = {}
+    for row, (model_version, _) in enumerate(requests):
+        rows_by_version.setdefault(model_version, []).append(row)
+    predictions = [0.0] * len(requests)
+    for model_version, rows in rows_by_version.items():
+        scores = _predict_many([requests[row][1] for row in rows], model_version)
+        for row, score in zip(rows, scores):
+            predictions[row] = score
+    return predictions
+
+def _require_model(model_version: Optional[str]):
+    if not registry.has(model_version):
+        raise HTTPException(status_code=404, detail=f"Model version '{model_version}' not found")
+
+# Concurrent single-row requests are scored together on a worker pool
+scheduler = MicroBatchScheduler(
+    _predict_requests,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    max_workers=INFERENCE_WORKERS,
+)
+
 @router.post("/predict_yield")
-async def predict_yield(input_data: YieldPredictionInput):
+async def predict_yield(input_data: YieldPredictionInput, model_version: Optional[str] = None):
     """
     Predict the yield for a given set of inputs.
     """
-    # Create a dataframe from the input data
-    input_df = pd.DataFrame([input_data.dict()])
-
-    # One-hot encode the categorical features
-    categorical_cols = ['Crop_Type', 'County', 'Season', 'Soil_Type', 'Irrigation_Method', 'Fertilizer_Used', 'Pest_Control', 'Weather_Impact']
-    input_encoded = pd.get_dummies(input_df, columns=categorical_cols, drop_first=True)
-
-    # Drop object columns
-    input_encoded = input_encoded.select_dtypes(exclude=['object'])
-
-    # Load the training columns
-    X_train = pd.read_csv('data/X_train_merged_v2.csv')
-    training_columns = X_train.columns
-
-    # Reindex the input_df to match the training columns
-    input_reindexed = input_encoded.reindex(columns=training_columns, fill_value=0)
-    
-    # Clean column names
-    input_reindexed.columns = [re.sub(r'[^A-Za-z0-9_]+', '', col) for col in input_reindexed.columns]
+    _require_model(model_version)
+    if not prediction_cache.enabled:
+        return {"predicted_yield_kg": await scheduler.submit((model_version, input_data))}
+
+    version = model_version or registry.default_version
+    registry.poll(version)
+    key = canonical_key(version, input_data)
+    prediction = prediction_cache.get(version, key)
+    if prediction is None:
+        generation = prediction_cache.generation(version)
+        prediction = await scheduler.submit((model_version, input_data))
+        prediction_cache.put(version, key, prediction, generation)
+
+    return {"predicted_yield_kg": prediction}
+
+@router.get("/predict_yield/stats")
+async def get_predict_yield_stats():
+    """
+    Queue depth and micro-batch size metrics for the yield prediction scheduler.
+    """
+    return scheduler.metrics()
 
-    # Make a prediction
-    prediction = model.predict(input_reindexed)
+@router.get("/predict_yield/cache")
+async def get_predict_yield_cache_stats():
+    """
+    Hit, miss and eviction counters for the yield prediction cache.
+    """
+    return prediction_cache.metrics()
 
-    return {"predicted_yield_kg": prediction[0]}
+@router.get("/models")
+async def read_models():
+    """
+    List the available yield model versions and which of them are loaded.
+    """
+    return registry.status()
+
+def _is_ndjson(media_type: str) -> bool:
+    return any(t in (media_type or "") for t in NDJSON_MEDIA_TYPES)
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def _iter_ndjson_records(
+    request: Request,
+) -> AsyncIterator[Tuple[int, Union[YieldPredictionInput, ValidationError]]]:
+    index = 0
+    async for line in _iter_ndjson_lines(request):
+        try:
+            yield index, YieldPredictionInput.model_validate_json(line)
+        except ValidationError as e:
+            yield index, e
+        index += 1
+
+def _stream_predictions(
+    records: List[Tuple[int, Union[YieldPredictionInput, ValidationError]]], model_version: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Scores records chunk by chunk and emits one NDJSON line per input, in input order.
+    Invalid records produce an error line instead of aborting the whole stream.
+    """
+    chunk: List[Tuple[int, Union[YieldPredictionInput, ValidationError]]] = []
+
+    def flush() -> bytes:
+        valid = [record for _, record in chunk if not isinstance(record, ValidationError)]
+        predictions = iter(_predict_many(valid, model_version))
+        lines = []
+        for index, record in chunk:
+            if isinstance(record, ValidationError):
+                line = {"index": index, "error": record.errors(include_url=False, include_context=False)}
+            else:
+                line = {"index": index, "predicted_yield_kg": next(predictions)}
+            lines.append(json.dumps(line))
+        chunk.clear()
+        return ("\n".join(lines) + "\n").encode()
+
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= PREDICT_BATCH_CHUNK_SIZE:
+            yield flush()
+    if chunk:
+        yield flush()
+
+@router.post("/predict_yield/batch")
+async def predict_yield_batch(request: Request, model_version: Optional[str] = None):
+    """
+    Predict the yield for a batch of inputs in one pass.
+
+    The body is either a JSON array or NDJSON (one YieldPredictionInput per line).
+    Results are returned in input order. When the client accepts NDJSON, or the batch
+    is larger than PREDICT_BATCH_STREAM_THRESHOLD, results are streamed back as NDJSON
+    in chunks of PREDICT_BATCH_CHUNK_SIZE so memory stays bounded. Invalid NDJSON lines
+    are reported as error lines in a streamed response and as a 422 otherwise.
+    `model_version` selects a registered model, defaulting to DEFAULT_MODEL_VERSION.
+    """
+    _require_model(model_version)
+    wants_stream = _is_ndjson(request.headers.get("accept"))
+
+    if _is_ndjson(request.headers.get("content-type")):
+        # The body is consumed before any response is started; only the parsed records are kept
+        records = [item async for item in _iter_ndjson_records(request)]
+        errors = [
+            {**e, "loc": ("body", index, *e["loc"])}
+            for index, record in records if isinstance(record, ValidationError)
+            for e in record.errors(include_url=False, include_context=False)
+        ]
+        if errors and not wants_stream:
+            raise HTTPException(status_code=422, detail=errors)
+    else:
+        try:
+            inputs = batch_input_adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=[{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False, include_context=False)],
+            )
+        records = list(enumerate(inputs))
+
+    if wants_stream or len(records) > PREDICT_BATCH_STREAM_THRESHOLD:
+        return StreamingResponse(_stream_predictions(records, model_version), media_type=NDJSON_MEDIA_TYPES[0])
+
+    inputs = [record for _, record in records]
+    predictions = await scheduler.run_in_executor(_predict_many, inputs, model_version)
+    return {"predictions": [{"predicted_yield_kg": p} for p in predictions]}
 
 @router.get("/performance", response_model=List[CropPerformanceSchema])
-async def get_crop_performance(session: AsyncSession = Depends(get_async_session)):
-    result = await session.exec(select(Season, Crop).join(Crop))
-    season_crop_pairs = result.all()
-
-    crop_data: Dict[str, List[Season]] = {}
-    for season, crop in season_crop_pairs:
-        if crop.name:
-            if crop.name not in crop_data:
-                crop_data[crop.name] = []
-            crop_data[crop.name].append(season)
+async def get_crop_performance(session: AsyncSession = Depends(get_read_session)):
+    # Served from the per-crop running sums kept up to date on every season insert
+    result = await session.exec(summary_performance_statement())
 
     performance_metrics: List[CropPerformanceSchema] = []
-
-    for crop_name, seasons_list in crop_data.items():
-        # Filter out seasons with None or NaN values for calculations
-        valid_seasons = [
-            s for s in seasons_list
-            if s.market_price_kes_per_kg is not None and not math.isnan(s.market_price_kes_per_kg)
-            and s.profit_kes is not None and not math.isnan(s.profit_kes)
-            and s.revenue_kes is not None and not math.isnan(s.revenue_kes)
-        ]
-
-        if not valid_seasons:
-            continue
-
-        avg_market_price = sum(s.market_price_kes_per_kg for s in valid_seasons) / len(valid_seasons)
-
-        # Calculate Avg ROI
-        total_profit = sum(s.profit_kes for s in valid_seasons)
-        total_cost_of_production = sum(
-            (s.seed_cost_kes or 0) + 
-            (s.fertilizer_cost_kes or 0) + 
-            (s.pesticide_cost_kes or 0) + 
-            (s.labor_cost_kes or 0) + 
-            (s.machinery_cost_kes or 0) + 
-            (s.other_costs_kes or 0) 
-            for s in valid_seasons
-        )
-        avg_roi = (total_profit / total_cost_of_production) * 100 if total_cost_of_production else 0
-
-        # Calculate Investment Volume
-        investment_volume = sum(s.revenue_kes for s in valid_seasons)
-
-        # Placeholder for Risk Level
-        risk_level = "Medium" # Placeholder
-
-        performance_metrics.append(CropPerformanceSchema(
-            crop_type=crop_name,
-            crop_variety=valid_seasons[0].crop_variety, # Using the crop_variety from the first valid season as a representative
-            market_price=f"KSH {avg_market_price:.2f}/kg",
-            avg_roi=f"{avg_roi:.2f}%",
-            investment_volume=f"KSH {investment_volume/1_000_000:.1f}M",
-            risk_level=risk_level
+    for row in result.all():
+        performance_metrics.append(to_performance_schema(
+            crop_name=row.name,
+            crop_variety=row.crop_variety,
+            avg_market_price=row.avg_market_price,
+            total_profit=row.total_profit,
+            total_cost=row.total_cost,
+            investment_volume=row.investment_volume,
+            risk_level="Medium", # Placeholder
         ))
-    return performance_metrics
\ No newline at end of file
+    return performance_metrics
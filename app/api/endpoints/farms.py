@@ -1,13 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Callable, List, Optional
+import math
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
-from app.db.session import get_async_session
-from app.models.models import Farm, Season
-from app.schemas.farm import FarmCreate, FarmRead
-from app.services.valuation import calculate_simple_valuation, calculate_dcf_valuation
+from app.db.session import get_async_session, get_read_session
+from app.models.models import Farm
+from app.schemas.farm import FarmCreate, FarmRead, FarmValuationRequest, FarmValuationsRead
+from app.services.valuation import (
+    calculate_simple_valuation,
+    calculate_dcf_valuation,
+    calculate_dcf_sensitivity,
+    calculate_dcf_monte_carlo,
+)
+from app.services.valuation_engine import SeasonArrays, id_batches, load_season_arrays, value_farms
+from app.services.farm_loader import FarmLoader, get_farm_loader
+from app.services.season_cache import season_cache
 from app.services.recommendation import get_crop_recommendations, get_advanced_recommendations
 
 router = APIRouter()
 
+MAX_SENSITIVITY_CELLS = 100_000
+MAX_PROJECTION_YEARS = 100
+MAX_VALUATION_FARMS = 10_000
+# DCF multipliers sum one discounted term per valuation and projected year; this
+# bounds the size of those arrays (sensitivity cells or simulations times years)
+MAX_DCF_TERMS = 5_000_000
+ANALYTICS_SECTIONS = ["valuation", "dcf_valuation", "recommendations", "advanced_recommendations"]
+
+def _parse_values(name: str, text: str, cast: Callable, max_count: int = MAX_SENSITIVITY_CELLS) -> List:
+    """
+    Parses a parameter given either as a comma-separated list ("0.08,0.1,0.12") or
+    as an inclusive range "start:stop:step" ("0.08:0.12:0.02") of at most `max_count`
+    values; a range is sized before any value is built.
+    """
+    try:
+        if ":" not in text:
+            values = [cast(part) for part in text.split(",") if part.strip()]
+        else:
+            start, stop, step = (cast(part) for part in text.split(":"))
+            if step <= 0 or stop < start:
+                raise ValueError
+            count = math.floor((stop - start) / step + 1e-9) + 1
+            if count > max_count:
+                raise HTTPException(status_code=422, detail=f"{name} is limited to {max_count} values")
+            values = [cast(round(start + k * step, 10)) for k in range(count)]
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=422, detail=f"{name} must be a comma-separated list or start:stop:step")
+    if len(values) > max_count:
+        raise HTTPException(status_code=422, detail=f"{name} is limited to {max_count} values")
+    if not values:
+        raise HTTPException(status_code=422, detail=f"{name} must not be empty")
+    return values
+
+async def _farm_seasons(loader: FarmLoader, farm_id: int) -> SeasonArrays:
+    seasons = await loader.columns(farm_id)
+    if seasons is None:
+        raise HTTPException(status_code=404, detail="Farm not found")
+    return seasons
+
 @router.post("/", response_model=FarmRead)
 async def create_farm(*, session: Session = Depends(get_async_session), farm: FarmCreate):
     db_farm = Farm.from_orm(farm)
@@ -16,19 +65,62 @@ async def create_farm(*, session: Session = Depends(get_async_session), farm: Fa
     await session.refresh(db_farm)
     return db_farm
 
+@router.get("/season_cache")
+async def get_season_cache_stats():
+    """
+    Size and hit ratio of the per-farm season cache.
+    """
+    return season_cache.metrics()
+
+@router.post("/valuations", response_model=FarmValuationsRead)
+async def get_farm_valuations(
+    *, session: Session = Depends(get_read_session), request: FarmValuationRequest
+):
+    """
+    Calculate the simple and DCF valuations of many farms at once: the given
+    `farm_ids`, or every farm one page at a time.
+    """
+    if not 1 <= request.projection_years <= MAX_PROJECTION_YEARS:
+        raise HTTPException(status_code=422, detail=f"projection_years must be between 1 and {MAX_PROJECTION_YEARS}")
+    if request.discount_rate == request.perpetuity_growth_rate:
+        raise HTTPException(status_code=422, detail="discount_rate must differ from perpetuity_growth_rate")
+
+    not_found, next_after_id = [], None
+    if request.farm_ids is None:
+        if not 1 <= request.limit <= MAX_VALUATION_FARMS:
+            raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_VALUATION_FARMS}")
+        statement = select(Farm.id).order_by(Farm.id).limit(request.limit)
+        if request.after_id is not None:
+            statement = statement.where(Farm.id > request.after_id)
+        result = await session.exec(statement)
+        farm_ids = result.all()
+        if len(farm_ids) == request.limit:
+            next_after_id = farm_ids[-1]
+    else:
+        requested = list(dict.fromkeys(request.farm_ids))
+        if len(requested) > MAX_VALUATION_FARMS:
+            raise HTTPException(status_code=422, detail=f"At most {MAX_VALUATION_FARMS} farm_ids can be valued at once")
+        existing = set()
+        for batch in id_batches(requested):
+            result = await session.exec(select(Farm.id).where(Farm.id.in_(batch)))
+            existing.update(result.all())
+        farm_ids = [farm_id for farm_id in requested if farm_id in existing]
+        not_found = [farm_id for farm_id in requested if farm_id not in existing]
+
+    seasons = await load_season_arrays(session, farm_ids)
+    valuations = value_farms(
+        seasons, farm_ids, request.discount_rate, request.projection_years, request.perpetuity_growth_rate
+    )
+    return {"valuations": valuations, "not_found": not_found, "next_after_id": next_after_id}
+
 @router.get("/{farm_id}/valuation")
 async def get_farm_valuation(
-    *, session: Session = Depends(get_async_session), farm_id: int
+    *, loader: FarmLoader = Depends(get_farm_loader), farm_id: int
 ):
     """
     Calculate the valuation of a farm.
     """
-    farm = await session.get(Farm, farm_id)
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
-
-    result = await session.exec(select(Season).where(Season.farm_id == farm_id))
-    seasons = result.all()
+    seasons = await _farm_seasons(loader, farm_id)
 
     valuation = calculate_simple_valuation(seasons)
 
@@ -37,43 +129,99 @@ async def get_farm_valuation(
 @router.get("/{farm_id}/dcf_valuation")
 async def get_dcf_farm_valuation(
     *, 
-    session: Session = Depends(get_async_session), 
+    loader: FarmLoader = Depends(get_farm_loader), 
     farm_id: int,
     discount_rate: float = 0.1,
-    projection_years: int = 5,
+    projection_years: int = Query(5, ge=1, le=MAX_PROJECTION_YEARS),
     perpetuity_growth_rate: float = 0.02
 ):
     """
     Calculate the DCF valuation of a farm.
     """
-    farm = await session.get(Farm, farm_id)
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
-
-    result = await session.exec(select(Season).where(Season.farm_id == farm_id))
-    seasons = result.all()
+    seasons = await _farm_seasons(loader, farm_id)
 
     valuation = calculate_dcf_valuation(seasons, discount_rate, projection_years, perpetuity_growth_rate)
 
     return {"farm_id": farm_id, "dcf_valuation": valuation}
 
-from sqlalchemy.orm import selectinload
+@router.get("/{farm_id}/dcf_valuation/sensitivity")
+async def get_dcf_sensitivity(
+    *,
+    loader: FarmLoader = Depends(get_farm_loader),
+    farm_id: int,
+    discount_rates: str = "0.08:0.12:0.01",
+    projection_years: str = "3,5,7,10",
+    perpetuity_growth_rates: str = "0:0.04:0.01",
+):
+    """
+    Calculate a grid of DCF valuations of a farm over ranges or lists of parameters.
+    """
+    rates = _parse_values("discount_rates", discount_rates, float)
+    years = _parse_values("projection_years", projection_years, int)
+    growth_rates = _parse_values("perpetuity_growth_rates", perpetuity_growth_rates, float)
+    if min(years) < 1 or max(years) > MAX_PROJECTION_YEARS:
+        raise HTTPException(status_code=422, detail=f"projection_years must be between 1 and {MAX_PROJECTION_YEARS}")
+    cells = len(rates) * len(years) * len(growth_rates)
+    if cells > MAX_SENSITIVITY_CELLS:
+        raise HTTPException(status_code=422, detail=f"The grid is limited to {MAX_SENSITIVITY_CELLS} valuations")
+    if cells * max(years) > MAX_DCF_TERMS:
+        raise HTTPException(status_code=422, detail=f"The grid size times the longest projection is limited to {MAX_DCF_TERMS}")
+
+    seasons = await _farm_seasons(loader, farm_id)
+
+    grid = calculate_dcf_sensitivity(seasons, rates, years, growth_rates)
+
+    return {
+        "farm_id": farm_id,
+        "discount_rates": rates,
+        "projection_years": years,
+        "perpetuity_growth_rates": growth_rates,
+        # Indexed [discount_rate][projection_years][perpetuity_growth_rate]; null where undefined
+        "dcf_valuations": [
+            [[None if math.isnan(v) else v for v in row] for row in plane] for plane in grid.tolist()
+        ],
+    }
+
+@router.get("/{farm_id}/dcf_valuation/monte_carlo")
+async def get_dcf_monte_carlo(
+    *,
+    loader: FarmLoader = Depends(get_farm_loader),
+    farm_id: int,
+    n_simulations: int = Query(10000, ge=1, le=1_000_000),
+    seed: Optional[int] = None,
+    discount_rate: float = 0.1,
+    discount_rate_std: float = Query(0.02, ge=0),
+    growth_rate: float = 0.02,
+    growth_rate_std: float = Query(0.02, ge=0),
+    projection_years: int = Query(5, ge=1, le=MAX_PROJECTION_YEARS),
+    percentiles: str = "5,25,50,75,95",
+):
+    """
+    Calculate percentiles of a farm's DCF valuation under random discount and growth rates.
+    """
+    if n_simulations * projection_years > MAX_DCF_TERMS:
+        raise HTTPException(status_code=422, detail=f"n_simulations times projection_years is limited to {MAX_DCF_TERMS}")
+    quantiles = _parse_values("percentiles", percentiles, float)
+    if not all(0 <= q <= 100 for q in quantiles):
+        raise HTTPException(status_code=422, detail="percentiles must be between 0 and 100")
+
+    seasons = await _farm_seasons(loader, farm_id)
+
+    simulation = calculate_dcf_monte_carlo(
+        seasons, n_simulations, seed, discount_rate, discount_rate_std,
+        growth_rate, growth_rate_std, projection_years, quantiles,
+    )
+
+    return {"farm_id": farm_id, **simulation}
 
 @router.get("/{farm_id}/recommendations")
 async def get_farm_recommendations(
-    *, session: Session = Depends(get_async_session), farm_id: int
+    *, loader: FarmLoader = Depends(get_farm_loader), farm_id: int
 ):
     """
     Get crop recommendations for a farm.
     """
-    farm = await session.get(Farm, farm_id)
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
-
-    result = await session.exec(
-        select(Season).where(Season.farm_id == farm_id).options(selectinload(Season.crop))
-    )
-    seasons = result.all()
+    seasons = await _farm_seasons(loader, farm_id)
 
     recommendations = get_crop_recommendations(seasons)
 
@@ -81,20 +229,46 @@ async def get_farm_recommendations(
 
 @router.get("/{farm_id}/advanced_recommendations")
 async def get_advanced_farm_recommendations(
-    *, session: Session = Depends(get_async_session), farm_id: int
+    *, loader: FarmLoader = Depends(get_farm_loader), farm_id: int
 ):
     """
     Get advanced crop recommendations for a farm based on risk-adjusted return.
     """
-    farm = await session.get(Farm, farm_id)
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
-
-    result = await session.exec(
-        select(Season).where(Season.farm_id == farm_id).options(selectinload(Season.crop))
-    )
-    seasons = result.all()
+    seasons = await _farm_seasons(loader, farm_id)
 
     recommendations = get_advanced_recommendations(seasons)
 
     return {"farm_id": farm_id, "recommendations": recommendations}
+
+@router.get("/{farm_id}/analytics")
+async def get_farm_analytics(
+    *,
+    loader: FarmLoader = Depends(get_farm_loader),
+    farm_id: int,
+    sections: str = ",".join(ANALYTICS_SECTIONS),
+    discount_rate: float = 0.1,
+    projection_years: int = Query(5, ge=1, le=MAX_PROJECTION_YEARS),
+    perpetuity_growth_rate: float = 0.02
+):
+    """
+    Get the valuations and recommendations of a farm in one call, computed from a
+    single read of its seasons. `sections` selects a comma-separated subset.
+    """
+    requested = _parse_values("sections", sections, str.strip)
+    unknown = [section for section in requested if section not in ANALYTICS_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown sections {unknown}; choose from {ANALYTICS_SECTIONS}")
+
+    seasons = await _farm_seasons(loader, farm_id)
+
+    analytics = {"farm_id": farm_id}
+    if "valuation" in requested:
+        analytics["valuation"] = calculate_simple_valuation(seasons)
+    if "dcf_valuation" in requested:
+        analytics["dcf_valuation"] = calculate_dcf_valuation(seasons, discount_rate, projection_years, perpetuity_growth_rate)
+    if "recommendations" in requested:
+        analytics["recommendations"] = get_crop_recommendations(seasons)
+    if "advanced_recommendations" in requested:
+        analytics["advanced_recommendations"] = get_advanced_recommendations(seasons)
+
+    return analytics
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+from app.db.session import get_read_session
+from app.services.recommendation import (
+    advanced_recommendations_from_stats,
+    crop_recommendations_from_stats,
+    region_crop_profit_stats,
+)
+
+router = APIRouter()
+
+@router.get("/{county}/recommendations")
+async def get_region_recommendations(
+    *, session: Session = Depends(get_read_session), county: str
+):
+    """
+    Get crop recommendations from the seasons of every farm in a county.
+    """
+    stats = await region_crop_profit_stats(session, county)
+
+    recommendations = crop_recommendations_from_stats(stats)
+
+    return {"county": county, "recommendations": recommendations}
+
+@router.get("/{county}/advanced_recommendations")
+async def get_region_advanced_recommendations(
+    *, session: Session = Depends(get_read_session), county: str
+):
+    """
+    Get crop recommendations for a county based on risk-adjusted return.
+    """
+    stats = await region_crop_profit_stats(session, county)
+
+    recommendations = advanced_recommendations_from_stats(stats)
+
+    return {"county": county, "recommendations": recommendations}
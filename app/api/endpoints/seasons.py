@@ -1,37 +1,127 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Float
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.db.session import get_async_session
+from app.db.session import get_async_session, get_read_session, read_session_factory
 from app.models.models import Season
 from app.schemas.season import SeasonSchema
+from app.services.crop_performance import apply_seasons
+from app.services.season_cache import season_cache
+import json
 import math
 
 router = APIRouter()
 
+# Every season column except the ingestion fingerprints
+SEASON_COLUMNS = [c for c in Season.__table__.c if not c.name.startswith("source_")]
+SEASON_COLUMN_NAMES = [c.name for c in SEASON_COLUMNS]
+MAX_PAGE_SIZE = 1000
+FLOAT_COLUMN_INDEXES = [i for i, c in enumerate(SEASON_COLUMNS) if isinstance(c.type, Float)]
+STREAM_BATCH_SIZE = 1000
+
+def season_row_to_dict(row) -> Dict[str, Any]:
+    """
+    Converts a raw season row into a dict, with NaN floats reported as None.
+    """
+    values = list(row)
+    for i in FLOAT_COLUMN_INDEXES:
+        value = values[i]
+        if value is not None and math.isnan(value):
+            values[i] = None
+    return dict(zip(SEASON_COLUMN_NAMES, values))
+
+def seasons_statement(
+    farm_id: Optional[int] = None,
+    crop_id: Optional[int] = None,
+    season: Optional[str] = None,
+    harvest_from: Optional[datetime] = None,
+    harvest_to: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+):
+    statement = select(*SEASON_COLUMNS)
+    if farm_id is not None:
+        statement = statement.where(Season.farm_id == farm_id)
+    if crop_id is not None:
+        statement = statement.where(Season.crop_id == crop_id)
+    if season is not None:
+        statement = statement.where(Season.season == season)
+    if harvest_from is not None:
+        statement = statement.where(Season.harvest_date >= harvest_from)
+    if harvest_to is not None:
+        statement = statement.where(Season.harvest_date <= harvest_to)
+    if after_id is not None:
+        statement = statement.where(Season.id > after_id)
+    return statement.order_by(Season.id)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
 @router.post("/", response_model=SeasonSchema)
 async def create_season(*, session: AsyncSession = Depends(get_async_session), season: SeasonSchema):
     db_season = Season.from_orm(season)
     session.add(db_season)
+    await session.flush()
+    await apply_seasons(session, [db_season])
     await session.commit()
+    season_cache.invalidate(db_season.farm_id)
     await session.refresh(db_season)
     return db_season
 
 @router.get("/", response_model=List[SeasonSchema])
 async def read_seasons(
-    session: AsyncSession = Depends(get_async_session),
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    farm_id: Optional[int] = None,
+    crop_id: Optional[int] = None,
+    season: Optional[str] = None,
+    harvest_from: Optional[datetime] = None,
+    harvest_to: Optional[datetime] = None,
+    skip: int = Query(0, ge=0),
+):
+    """
+    Read seasons in id order, one page at a time.
+
+    Pass the id of the last season of a page as `after_id` to get the next one; the
+    `X-Next-After-Id` response header carries it while more rows may follow. `skip`
+    is kept for older clients and is only applied when no `after_id` is given.
+    """
+    statement = seasons_statement(farm_id, crop_id, season, harvest_from, harvest_to, after_id).limit(limit)
+    if after_id is None and skip:
+        statement = statement.offset(skip)
+    result = await session.exec(statement)
+    seasons = [season_row_to_dict(row) for row in result.all()]
+    if seasons and len(seasons) == limit:
+        response.headers["X-Next-After-Id"] = str(seasons[-1]["id"])
+    return seasons
+
+async def _stream_seasons(statement) -> AsyncIterator[bytes]:
+    # The stream outlives the request's dependencies, so it reads through its own session
+    async with read_session_factory() as session:
+        result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(season_row_to_dict(row), default=_json_default) + "\n" for row in rows
+            ).encode()
+
+@router.get("/export")
+async def export_seasons(
+    after_id: Optional[int] = None,
+    farm_id: Optional[int] = None,
+    crop_id: Optional[int] = None,
+    season: Optional[str] = None,
+    harvest_from: Optional[datetime] = None,
+    harvest_to: Optional[datetime] = None,
 ):
-    result = await session.exec(
-        select(Season).offset(skip).limit(limit)
-    )
-    seasons = result.all()
-    processed_seasons = []
-    for s in seasons:
-        s_dict = s.model_dump()
-        for key, value in s_dict.items():
-            if isinstance(value, float) and math.isnan(value):
-                setattr(s, key, None)
-        processed_seasons.append(SeasonSchema.model_validate(s))
-    return processed_seasons
+    """
+    Stream every matching season as NDJSON straight off a database cursor, so
+    exporting the whole table uses constant memory.
+    """
+    statement = seasons_statement(farm_id, crop_id, season, harvest_from, harvest_to, after_id)
+    return StreamingResponse(_stream_seasons(statement), media_type="application/x-ndjson")
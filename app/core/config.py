@@ -6,3 +6,43 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("No DATABASE_URL set for the connection")
+
+# Database engine and connection pool (the pool settings do not apply to in-memory SQLite)
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() in ("1", "true", "yes")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT_SECONDS = float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "30"))
+DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Compiled SQL cache of the engine, and asyncpg's prepared statement cache per connection
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "500"))
+# Read-only endpoints use this database when set, e.g. a streaming replica of DATABASE_URL
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+
+# Yield prediction batching
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "5000"))
+PREDICT_BATCH_STREAM_THRESHOLD = int(os.getenv("PREDICT_BATCH_STREAM_THRESHOLD", "10000"))
+
+# Micro-batching scheduler for single-row yield predictions
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "2"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+
+# Yield model registry
+MODEL_DIR = os.getenv("MODEL_DIR", ".")
+DEFAULT_MODEL_VERSION = os.getenv("DEFAULT_MODEL_VERSION", "lgbm")
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "2"))
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", "2"))
+USE_TREE_EVALUATOR = os.getenv("USE_TREE_EVALUATOR", "true").lower() in ("1", "true", "yes")
+TREE_EVALUATOR_MAX_ROWS = int(os.getenv("TREE_EVALUATOR_MAX_ROWS", "64"))
+
+# Yield prediction result cache (PREDICTION_CACHE_SIZE=0 disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "600"))
+
+# Per-farm columnar season cache (SEASON_CACHE_MAX_BYTES=0 disables it)
+SEASON_CACHE_MAX_BYTES = int(os.getenv("SEASON_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SEASON_CACHE_TTL_SECONDS = float(os.getenv("SEASON_CACHE_TTL_SECONDS", "300"))
+
+# Request latency, database and inference metrics served on /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
@@ -1,19 +1,176 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from collections import deque
+import threading
+import time
+import numpy as np
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
-from app.core.config import DATABASE_URL
-from sqlalchemy.ext.asyncio import create_async_engine # Corrected import
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import (
+    DATABASE_URL,
+    DATABASE_ECHO,
+    DATABASE_POOL_SIZE,
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_TIMEOUT_SECONDS,
+    DATABASE_POOL_RECYCLE_SECONDS,
+    DATABASE_POOL_PRE_PING,
+    DATABASE_STATEMENT_CACHE_SIZE,
+    DATABASE_REPLICA_URL,
+)
 
-async_engine = create_async_engine(str(DATABASE_URL), echo=True, future=True)
+class PoolStats:
+    """
+    Checkout counters of one connection pool: how many connections were handed out,
+    how long callers waited for them (including opening new connections) and how
+    many waits timed out. Recent waits are kept for percentiles.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent: "deque[float]" = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, wait_seconds: float, timed_out: bool = False):
+        with self._lock:
+            self._recent.append(wait_seconds)
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = np.array(self._recent)
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": self.wait_seconds_total * 1000 / attempts if attempts else 0.0,
+                "wait_ms_p50": float(np.percentile(recent, 50)) * 1000 if len(recent) else 0.0,
+                "wait_ms_p99": float(np.percentile(recent, 99)) * 1000 if len(recent) else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The async queue pool, timing every checkout into a PoolStats that survives
+    `engine.dispose()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    create_async_engine keyword arguments from the DATABASE_* settings. Pool settings
+    only apply to databases that use a queue pool (not in-memory SQLite).
+    """
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": DATABASE_ECHO, "query_cache_size": DATABASE_STATEMENT_CACHE_SIZE}
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": DATABASE_STATEMENT_CACHE_SIZE}
+    if issubclass(parsed.get_dialect(_is_async=True).get_pool_class(parsed), QueuePool):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT_SECONDS,
+            pool_recycle=DATABASE_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=DATABASE_POOL_PRE_PING,
+        )
+    return options
+
+async_engine = create_async_engine(str(DATABASE_URL), **engine_options(str(DATABASE_URL)))
+# Without a replica, reads share the primary engine and its pool
+read_engine = create_async_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)) if DATABASE_REPLICA_URL else async_engine
+
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+read_session_factory = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Indexes added to the models after their tables were first created, as (name, table, column)
+ADDED_INDEXES = [
+    ("ix_farm_county", "farm", "county"),
+    ("ix_season_farm_id", "season", "farm_id"),
+    ("ix_season_crop_id", "season", "crop_id"),
+]
+
+def _upgrade_schema(connection):
+    # create_all does not alter existing tables: add the load fingerprint columns and
+    # their unique index to season tables created before incremental loads, and the
+    # indexes the recommendation and valuation queries filter on
+    columns = {column["name"] for column in inspect(connection).get_columns("season")}
+    for name in ("source_key", "source_hash"):
+        if name not in columns:
+            connection.execute(text(f"ALTER TABLE season ADD COLUMN {name} BIGINT"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_season_source_key ON season (source_key)"))
+    for name, table, column in ADDED_INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
 
 async def init_db():
     async with async_engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
 
-async def get_async_session() -> AsyncSession:
-    async_session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with async_session_factory() as session:
+        yield session
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for endpoints that only read; it is bound to the replica when
+    DATABASE_REPLICA_URL is set, so it may lag behind recent writes.
+    """
+    async with read_session_factory() as session:
+        yield session
+
+def _engine_metrics(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    metrics: Dict[str, Any] = {"url": engine.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is None:
+        return metrics
+    capacity = pool.size() + DATABASE_MAX_OVERFLOW
+    metrics.update(
+        size=pool.size(),
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        utilization=pool.checkedout() / capacity if capacity > 0 else 0.0,
+        **stats.metrics(),
     )
-    async with async_session() as session:
-        yield session
\ No newline at end of file
+    return metrics
+
+def pool_metrics() -> Dict[str, Any]:
+    """
+    Current utilization and checkout wait statistics of the primary and read pools.
+    """
+    metrics = {"primary": _engine_metrics(async_engine)}
+    metrics["replica"] = _engine_metrics(read_engine) if read_engine is not async_engine else None
+    return metrics
@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.session import init_db
-from app.api.endpoints import crops, seasons, farmers, farms
+from fastapi.responses import PlainTextResponse
+from app.core.config import METRICS_ENABLED
+from app.db.session import async_engine, read_engine, init_db, pool_metrics
+from app.services.metrics import MetricsMiddleware, instrument_engine, registry as metrics_registry
+from app.api.endpoints import crops, seasons, farmers, farms, regions
 
 app = FastAPI(title="Mshamba Intelligence API")
 
@@ -18,17 +21,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The keyset cursor of GET /seasons/
+    expose_headers=["X-Next-After-Id"],
 )
 
+if METRICS_ENABLED:
+    # Added last so it wraps CORS too and times the whole request
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine)
+    instrument_engine(read_engine)
+
 @app.on_event("startup")
 async def on_startup():
     await init_db()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await crops.scheduler.shutdown()
+
 app.include_router(farmers.router, prefix="/farmers", tags=["farmers"])
 app.include_router(farms.router, prefix="/farms", tags=["farms"])
 app.include_router(crops.router, prefix="/crops", tags=["crops"])
 app.include_router(seasons.router, prefix="/seasons", tags=["seasons"])
+app.include_router(regions.router, prefix="/regions", tags=["regions"])
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the Mshamba Intelligence API"}
\ No newline at end of file
+    return {"message": "Welcome to the Mshamba Intelligence API"}
+
+@app.get("/db/pool")
+async def get_db_pool_stats():
+    """
+    Connection pool utilization and checkout wait times of the primary and read databases.
+    """
+    return pool_metrics()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Per-route latency histograms, in-flight requests, database queries and time per
+    request, and model inference time, in the Prometheus text format.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
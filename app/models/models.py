@@ -1,5 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
+from sqlalchemy import BigInteger
 from sqlmodel import Field, Relationship, SQLModel
 
 class Farmer(SQLModel, table=True):
@@ -12,7 +13,7 @@ class Farmer(SQLModel, table=True):
 class Farm(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
-    county: Optional[str]
+    county: Optional[str] = Field(index=True)
     location_details: Optional[str]
     owner_id: int = Field(foreign_key="farmer.id")
     owner: Farmer = Relationship(back_populates="farms")
@@ -51,9 +52,27 @@ class Season(SQLModel, table=True):
     # farmer_contact: Optional[str] # Should be part of Farmer model
     notes: Optional[str]
     
-    crop_id: Optional[int] = Field(default=None, foreign_key="crop.id")
-    farm_id: Optional[int] = Field(default=None, foreign_key="farm.id")
+    crop_id: Optional[int] = Field(default=None, foreign_key="crop.id", index=True)
+    farm_id: Optional[int] = Field(default=None, foreign_key="farm.id", index=True)
+
+    # Set by scripts.load_data: a stable fingerprint of the source row it was loaded
+    # from and a hash of that row's content, so reloads only touch changed rows
+    source_key: Optional[int] = Field(default=None, sa_type=BigInteger, unique=True, index=True)
+    source_hash: Optional[int] = Field(default=None, sa_type=BigInteger)
 
     # Relationships
     crop: Optional[Crop] = Relationship(back_populates="seasons")
     farm: Optional[Farm] = Relationship(back_populates="seasons")
+
+class CropPerformanceSummary(SQLModel, table=True):
+    # Running per-crop aggregates of valid seasons, maintained on every season insert
+    crop_id: int = Field(primary_key=True, foreign_key="crop.id")
+    season_count: int = 0
+    sum_market_price: float = 0.0
+    sum_profit: float = 0.0
+    sum_profit_sq: float = 0.0
+    sum_cost: float = 0.0
+    sum_revenue: float = 0.0
+    # Representative variety, taken from the crop's first valid season
+    first_season_id: Optional[int] = None
+    crop_variety: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from sqlmodel import SQLModel
 
 class FarmBase(SQLModel):
@@ -19,3 +19,24 @@ class Farm(FarmBase):
 
     class Config:
         orm_mode = True
+
+class FarmValuationRequest(SQLModel):
+    # None values every farm, one page of `limit` farms after `after_id` at a time
+    farm_ids: Optional[List[int]] = None
+    after_id: Optional[int] = None
+    limit: int = 1000
+    discount_rate: float = 0.1
+    projection_years: int = 5
+    perpetuity_growth_rate: float = 0.02
+
+class FarmValuation(SQLModel):
+    farm_id: int
+    season_count: int
+    valuation: float
+    dcf_valuation: float
+
+class FarmValuationsRead(SQLModel):
+    valuations: List[FarmValuation]
+    not_found: List[int] = []
+    # Pass as `after_id` to get the next page when valuing every farm
+    next_after_id: Optional[int] = None
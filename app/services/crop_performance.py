@@ -0,0 +1,282 @@
+from typing import Dict, Iterable, List, Optional
+import math
+from sqlalchemy import and_, delete, func, insert, literal_column, true
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.models import Crop, CropPerformanceSummary, Season
+from app.schemas.crop_performance import CropPerformanceSchema
+
+COST_COLUMNS = [
+    Season.seed_cost_kes,
+    Season.fertilizer_cost_kes,
+    Season.pesticide_cost_kes,
+    Season.labor_cost_kes,
+    Season.machinery_cost_kes,
+    Season.other_costs_kes,
+]
+
+def valid_number(column):
+    """
+    SQL equivalent of `value is not None and not math.isnan(value)`.
+
+    The 'NaN' literal is left untyped so PostgreSQL coerces it to float NaN, while
+    SQLite (which stores NaN as NULL) compares it as text and never matches a number.
+    """
+    return and_(column.isnot(None), column != literal_column("'NaN'"))
+
+def total_cost_expression():
+    """
+    Sum of the detailed cost columns with missing costs counted as zero.
+    """
+    total = func.coalesce(COST_COLUMNS[0], 0)
+    for column in COST_COLUMNS[1:]:
+        total = total + func.coalesce(column, 0)
+    return total
+
+def valid_season_filter():
+    return and_(
+        valid_number(Season.market_price_kes_per_kg),
+        valid_number(Season.profit_kes),
+        valid_number(Season.revenue_kes),
+    )
+
+def crop_aggregates_subquery(*filters):
+    """
+    Per-crop running sums over the valid seasons (matching `filters`), in the shape of
+    CropPerformanceSummary.
+    """
+    profit = Season.profit_kes
+    return (
+        select(
+            Season.crop_id.label("crop_id"),
+            func.count().label("season_count"),
+            func.sum(Season.market_price_kes_per_kg).label("sum_market_price"),
+            func.sum(profit).label("sum_profit"),
+            func.sum(profit * profit).label("sum_profit_sq"),
+            func.sum(total_cost_expression()).label("sum_cost"),
+            func.sum(Season.revenue_kes).label("sum_revenue"),
+            func.min(Season.id).label("first_season_id"),
+        )
+        .where(valid_season_filter(), Season.crop_id.isnot(None), *filters)
+        .group_by(Season.crop_id)
+        .subquery()
+    )
+
+def crop_performance_statement():
+    """
+    One row per crop with the aggregates behind /crops/performance, recomputed by a
+    single GROUP BY over the valid seasons. The representative crop variety is the
+    one of the crop's first valid season, joined back by id in the same statement.
+    """
+    per_crop = crop_aggregates_subquery()
+    first_season = aliased(Season)
+    return (
+        select(
+            Crop.name,
+            first_season.crop_variety,
+            (per_crop.c.sum_market_price / per_crop.c.season_count).label("avg_market_price"),
+            per_crop.c.sum_profit.label("total_profit"),
+            per_crop.c.sum_cost.label("total_cost"),
+            per_crop.c.sum_revenue.label("investment_volume"),
+            per_crop.c.season_count,
+        )
+        .join(Crop, Crop.id == per_crop.c.crop_id)
+        .join(first_season, first_season.id == per_crop.c.first_season_id)
+        .where(Crop.name.isnot(None), Crop.name != "")
+        .order_by(per_crop.c.first_season_id)
+    )
+
+def summary_performance_statement():
+    """
+    The same rows as crop_performance_statement, read from the maintained
+    CropPerformanceSummary table in O(#crops).
+    """
+    summary = CropPerformanceSummary
+    return (
+        select(
+            Crop.name,
+            summary.crop_variety,
+            (summary.sum_market_price / summary.season_count).label("avg_market_price"),
+            summary.sum_profit.label("total_profit"),
+            summary.sum_cost.label("total_cost"),
+            summary.sum_revenue.label("investment_volume"),
+            summary.season_count,
+        )
+        .join(Crop, Crop.id == summary.crop_id)
+        .where(summary.season_count > 0, Crop.name.isnot(None), Crop.name != "")
+        .order_by(summary.first_season_id)
+    )
+
+SUM_COLUMNS = ["season_count", "sum_market_price", "sum_profit", "sum_profit_sq", "sum_cost", "sum_revenue"]
+
+def _is_valid(value: Optional[float]) -> bool:
+    return value is not None and not math.isnan(value)
+
+def season_contribution(season: Season) -> Optional[Dict]:
+    """
+    What one season adds to its crop's summary, or None when it is excluded
+    (no crop, or a missing/NaN price, profit or revenue).
+    """
+    if season.crop_id is None or not (
+        _is_valid(season.market_price_kes_per_kg) and _is_valid(season.profit_kes) and _is_valid(season.revenue_kes)
+    ):
+        return None
+    return {
+        "crop_id": season.crop_id,
+        "season_count": 1,
+        "sum_market_price": season.market_price_kes_per_kg,
+        "sum_profit": season.profit_kes,
+        "sum_profit_sq": season.profit_kes * season.profit_kes,
+        "sum_cost": sum((getattr(season, column.key) or 0) for column in COST_COLUMNS),
+        "sum_revenue": season.revenue_kes,
+        "first_season_id": season.id,
+        "crop_variety": season.crop_variety,
+    }
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Crop summary upserts are not implemented for {dialect_name}")
+    return dialect_insert
+
+async def apply_seasons(session: AsyncSession, seasons: Iterable[Season]):
+    """
+    Adds newly inserted seasons to the crop summaries inside the caller's transaction.
+
+    The seasons must already be flushed so they have ids. Deltas are combined per
+    crop first, then applied with one INSERT ... ON CONFLICT DO UPDATE that increments
+    the running sums in the database, so concurrent writers never lose an update.
+    """
+    deltas: Dict[int, Dict] = {}
+    for season in seasons:
+        contribution = season_contribution(season)
+        if contribution is None:
+            continue
+        current = deltas.get(contribution["crop_id"])
+        if current is None:
+            deltas[contribution["crop_id"]] = contribution
+            continue
+        for column in SUM_COLUMNS:
+            current[column] += contribution[column]
+        if contribution["first_season_id"] < current["first_season_id"]:
+            current["first_season_id"] = contribution["first_season_id"]
+            current["crop_variety"] = contribution["crop_variety"]
+    if not deltas:
+        return
+
+    connection = await session.connection()
+    table = CropPerformanceSummary.__table__
+    statement = _dialect_insert(connection.dialect.name)(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.crop_id],
+        set_={column: table.c[column] + statement.excluded[column] for column in SUM_COLUMNS},
+    )
+    await session.execute(statement, list(deltas.values()))
+
+def _summary_source(*filters):
+    # Per-crop aggregates of the seasons matching `filters` with the crop variety of
+    # each crop's first season, as rows of CropPerformanceSummary
+    per_crop = crop_aggregates_subquery(*filters)
+    first_season = aliased(Season)
+    return select(
+        per_crop.c.crop_id,
+        *[per_crop.c[column] for column in SUM_COLUMNS],
+        per_crop.c.first_season_id,
+        first_season.crop_variety,
+    ).join(first_season, first_season.id == per_crop.c.first_season_id)
+
+SUMMARY_COLUMNS = ["crop_id", *SUM_COLUMNS, "first_season_id", "crop_variety"]
+
+async def apply_inserted_seasons(session: AsyncSession, *filters):
+    """
+    Adds the seasons matching `filters` to the crop summaries inside the caller's
+    transaction, for bulk writers that insert rows without loading them as objects.
+
+    Like apply_seasons, the rows must be new (with higher ids than every counted
+    season) and their deltas are added in the database with one INSERT ... SELECT ...
+    ON CONFLICT DO UPDATE.
+    """
+    connection = await session.connection()
+    table = CropPerformanceSummary.__table__
+    # SQLite needs a WHERE clause to tell the upsert's ON CONFLICT from a join's ON
+    statement = _dialect_insert(connection.dialect.name)(table).from_select(SUMMARY_COLUMNS, _summary_source(*filters).where(true()))
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.crop_id],
+        set_={column: table.c[column] + statement.excluded[column] for column in SUM_COLUMNS},
+    )
+    await session.execute(statement)
+
+async def rebuild_summaries(session: AsyncSession, crop_ids: Optional[Iterable[int]] = None, commit: bool = True) -> int:
+    """
+    Recomputes the crop summaries from the season table: every crop, or only
+    `crop_ids` (for writers that update or delete seasons, which the running sums
+    cannot subtract). Returns the number of crops with a summary.
+
+    The summary rows are locked first, so apply_seasons upserts of other transactions
+    wait for the rebuild instead of being overwritten by it. With `commit=False` the
+    rebuild joins the caller's transaction, which commits it with its season writes.
+    """
+    filters = []
+    stale = delete(CropPerformanceSummary)
+    if crop_ids is not None:
+        crop_ids = list(crop_ids)
+        if not crop_ids:
+            return await _summary_count(session, commit)
+        filters.append(Season.crop_id.in_(crop_ids))
+        stale = stale.where(CropPerformanceSummary.crop_id.in_(crop_ids))
+        await session.exec(select(CropPerformanceSummary.crop_id).where(CropPerformanceSummary.crop_id.in_(crop_ids)).with_for_update())
+    else:
+        await session.exec(select(CropPerformanceSummary.crop_id).with_for_update())
+    await session.execute(stale)
+    await session.execute(insert(CropPerformanceSummary).from_select(SUMMARY_COLUMNS, _summary_source(*filters)))
+    return await _summary_count(session, commit)
+
+async def _summary_count(session: AsyncSession, commit: bool) -> int:
+    if commit:
+        await session.commit()
+    result = await session.exec(select(func.count()).select_from(CropPerformanceSummary))
+    return result.one()
+
+async def check_summaries(session: AsyncSession, rel_tol: float = 1e-9) -> List[Dict]:
+    """
+    Compares the maintained summaries with a full recompute and returns one entry per
+    crop whose counters disagree (an empty list means the table is consistent).
+    """
+    per_crop = crop_aggregates_subquery()
+    result = await session.exec(select(*per_crop.c))
+    expected = {row.crop_id: row._mapping for row in result.all()}
+    result = await session.exec(select(CropPerformanceSummary))
+    actual = {row.crop_id: row for row in result.all()}
+
+    mismatches = []
+    for crop_id in sorted(set(expected) | set(actual)):
+        want, have = expected.get(crop_id), actual.get(crop_id)
+        for column in SUM_COLUMNS + ["first_season_id"]:
+            want_value = want[column] if want is not None else 0
+            have_value = getattr(have, column) if have is not None else 0
+            if not math.isclose(want_value or 0, have_value or 0, rel_tol=rel_tol, abs_tol=1e-6):
+                mismatches.append({"crop_id": crop_id, "column": column, "expected": want_value, "actual": have_value})
+    return mismatches
+
+def to_performance_schema(
+    crop_name: str,
+    crop_variety: Optional[str],
+    avg_market_price: float,
+    total_profit: float,
+    total_cost: float,
+    investment_volume: float,
+    risk_level: str = "Medium",
+) -> CropPerformanceSchema:
+    avg_roi = (total_profit / total_cost) * 100 if total_cost else 0
+    return CropPerformanceSchema(
+        crop_type=crop_name,
+        crop_variety=crop_variety,
+        market_price=f"KSH {avg_market_price:.2f}/kg",
+        avg_roi=f"{avg_roi:.2f}%",
+        investment_volume=f"KSH {investment_volume/1_000_000:.1f}M",
+        risk_level=risk_level,
+    )
@@ -0,0 +1,39 @@
+from typing import Dict, Optional
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_read_session
+from app.models.models import Farm
+from app.services.season_cache import SeasonColumnCache, fetch_farm_columns, season_cache
+from app.services.valuation_engine import SeasonArrays
+
+class FarmLoader:
+    """
+    Request-scoped loader for a farm and its season history.
+
+    `columns` returns the seasons in the columnar form every valuation and
+    recommendation service accepts. It reads them through the shared season cache and
+    keeps the result, so every service called while handling the request uses one
+    result set instead of re-selecting the same rows.
+    """
+
+    def __init__(self, session: AsyncSession, cache: SeasonColumnCache = season_cache):
+        self.session = session
+        self.cache = cache
+        self._columns: Dict[int, Optional[SeasonArrays]] = {}
+
+    async def columns(self, farm_id: int) -> Optional[SeasonArrays]:
+        """
+        The farm's seasons as SeasonArrays, or None when the farm does not exist.
+        """
+        if farm_id not in self._columns:
+            columns = self.cache.get(farm_id)
+            if columns is None and await self.farm(farm_id) is not None:
+                columns = await fetch_farm_columns(self.session, farm_id, self.cache)
+            self._columns[farm_id] = columns
+        return self._columns[farm_id]
+
+    async def farm(self, farm_id: int) -> Optional[Farm]:
+        return await self.session.get(Farm, farm_id)
+
+def get_farm_loader(session: AsyncSession = Depends(get_read_session)) -> FarmLoader:
+    return FarmLoader(session)
@@ -0,0 +1,99 @@
+from typing import Dict, List, Sequence
+import re
+import numpy as np
+from app.schemas.yield_prediction import YieldPredictionInput
+
+# Input fields mapped to the dataset columns they were one-hot encoded from
+NUMERIC_FEATURES = {
+    "Planted_Area_Acres": "Planted Area (Acres)",
+    "Market_Price_KES_per_Kg": "Market Price (KES/Kg)",
+}
+CATEGORICAL_FEATURES = {
+    "Crop_Type": "Crop Type",
+    "County": "County",
+    "Season": "Season",
+    "Soil_Type": "Soil Type",
+    "Irrigation_Method": "Irrigation Method",
+    "Fertilizer_Used": "Fertilizer Used",
+    "Pest_Control": "Pest Control",
+    "Weather_Impact": "Weather Impact",
+}
+
+def clean_feature_name(name: str) -> str:
+    """
+    Applies the same column name cleaning as the training scripts.
+    """
+    return re.sub(r'[^A-Za-z0-9_]+', '', name)
+
+def model_feature_names(model) -> List[str]:
+    """
+    Returns the feature names a fitted LightGBM or scikit-learn model was trained on.
+    """
+    if hasattr(model, "feature_name_"):
+        return list(model.feature_name_)
+    if hasattr(model, "feature_names_in_"):
+        return list(model.feature_names_in_)
+    raise ValueError("Model does not expose its training feature names")
+
+class YieldFeaturizer:
+    """
+    Maps YieldPredictionInputs straight into the model's feature matrix.
+
+    The category -> column index table is built once from the training columns,
+    so encoding requests is a handful of dictionary lookups into a fresh NumPy
+    array per call (safe on the inference worker threads) instead of a DataFrame,
+    get_dummies and reindex.
+    Categories that were dropped as the reference level (or never seen during
+    training) leave their one-hot block at zero, exactly like get_dummies did.
+    """
+
+    def __init__(self, feature_names: Sequence[str]):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        column_index = {clean_feature_name(name): i for i, name in enumerate(self.feature_names)}
+
+        self._numeric_index: Dict[str, int] = {}
+        for field, column in NUMERIC_FEATURES.items():
+            index = column_index.get(clean_feature_name(column))
+            if index is not None:
+                self._numeric_index[field] = index
+
+        self._category_prefix: Dict[str, str] = {
+            field: clean_feature_name(column) + "_" for field, column in CATEGORICAL_FEATURES.items()
+        }
+        self._category_index: Dict[str, Dict[str, int]] = {field: {} for field in CATEGORICAL_FEATURES}
+        for cleaned, index in column_index.items():
+            for field, prefix in self._category_prefix.items():
+                if cleaned.startswith(prefix):
+                    self._category_index[field][cleaned[len(prefix):]] = index
+                    break
+
+    @classmethod
+    def from_model(cls, model) -> "YieldFeaturizer":
+        return cls(model_feature_names(model))
+
+    def _column_for(self, field: str, value: str):
+        return self._category_index[field].get(clean_feature_name(value))
+
+    def transform_many(self, inputs: Sequence[YieldPredictionInput]) -> np.ndarray:
+        """
+        Encodes a batch of inputs into a fresh (len(inputs), n_features) matrix in one pass.
+        """
+        n_rows = len(inputs)
+        features = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        if not n_rows:
+            return features
+        rows = np.arange(n_rows)
+        for field, index in self._numeric_index.items():
+            features[:, index] = np.fromiter((getattr(x, field) for x in inputs), dtype=np.float64, count=n_rows)
+        for field in CATEGORICAL_FEATURES:
+            columns = np.fromiter(
+                (self._lookup(field, getattr(x, field)) for x in inputs), dtype=np.int64, count=n_rows
+            )
+            known = columns >= 0
+            features[rows[known], columns[known]] = 1.0
+        return features
+
+    def _lookup(self, field: str, value: str) -> int:
+        index = self._column_for(field, value)
+        return -1 if index is None else index
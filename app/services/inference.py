@@ -0,0 +1,134 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+
+class MicroBatchScheduler:
+    """
+    Collects concurrent single-row prediction requests into micro-batches.
+
+    Requests are queued on the event loop; a collector task groups them into batches of
+    at most `max_batch_size`, waiting no longer than `max_wait_ms` for a batch to fill,
+    and hands each batch to `predict_fn` on a worker thread pool. LightGBM and
+    scikit-learn release the GIL while scoring, so batches on different threads run
+    in parallel and the event loop stays free for other endpoints. When all workers are
+    busy, requests keep queueing and the next batch is larger.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[Any]], List[float]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_workers: Optional[int] = None,
+    ):
+        self._predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+        self.requests_total = 0
+        self.batches_total = 0
+        self.errors_total = 0
+        self.max_batch_size_seen = 0
+        self.batch_size_counts: Dict[int, int] = {}
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._collector is None or self._collector.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._dispatches = set()
+            self._collector = loop.create_task(self._collect())
+
+    async def submit(self, item: Any) -> float:
+        """
+        Queues one input for scoring and waits for its prediction.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        self.requests_total += 1
+        return await future
+
+    async def run_in_executor(self, fn: Callable, *args):
+        """
+        Runs CPU-bound work on the inference worker pool.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _collect(self):
+        queue = self._queue
+        slots = asyncio.Semaphore(self.max_workers)
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await slots.acquire()
+            task = self._loop.create_task(self._dispatch(batch, slots))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]], slots: asyncio.Semaphore):
+        self._record_batch(len(batch))
+        try:
+            results = await self.run_in_executor(self._predict_fn, [item for item, _ in batch])
+        except Exception as e:
+            self.errors_total += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            slots.release()
+
+    def _record_batch(self, size: int):
+        self.batches_total += 1
+        self.max_batch_size_seen = max(self.max_batch_size_seen, size)
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        scored = sum(size * count for size, count in self.batch_size_counts.items())
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight_batches": len(self._dispatches),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "workers": self.max_workers,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "errors_total": self.errors_total,
+            "avg_batch_size": scored / self.batches_total if self.batches_total else 0.0,
+            "max_batch_size_seen": self.max_batch_size_seen,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+        }
+
+    async def shutdown(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            if self._dispatches:
+                await asyncio.gather(*self._dispatches, return_exceptions=True)
+            self._collector = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
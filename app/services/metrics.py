@@ -0,0 +1,227 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextvars import ContextVar
+import math
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in values]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {(): 0.0} if not labelnames else {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *labels: str):
+        self.inc(-amount, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in values]
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. Observing is one bisect and three additions under a lock;
+    buckets are only made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = self._header()
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, by route template.", ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "HTTP requests currently being handled."))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "Database queries issued while handling an HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS,
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in database queries while handling an HTTP request.", ("method", "route"),
+))
+DB_QUERIES = registry.register(Counter("db_queries_total", "Database queries executed, inside and outside requests."))
+DB_TIME = registry.register(Counter("db_query_duration_seconds_total", "Time spent executing database queries."))
+MODEL_INFERENCE = registry.register(Histogram(
+    "model_inference_duration_seconds", "Time to featurize and score one batch of yield predictions.", ("version",),
+))
+MODEL_ROWS = registry.register(Counter("model_inference_rows_total", "Rows scored by the yield models.", ("version",)))
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+# Database work of the request being handled; SQLAlchemy runs statements in a greenlet
+# that shares the calling task's context, so the cursor events see it
+_request_db: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("metrics_query_start", time.perf_counter())
+    DB_QUERIES.inc()
+    DB_TIME.inc(elapsed)
+    stats = _request_db.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Counts and times every statement executed through `engine`.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that handled a request, with its router prefix. FastAPI
+    keeps the prefixed path on the matched route context; older versions copy routes
+    into the app with the prefix applied.
+    """
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    return getattr(scope.get("route"), "path", "unmatched")
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request and the database queries issued while
+    handling it. Requests are labelled with their route template (`/farms/{farm_id}/valuation`),
+    so the label set stays bounded; paths that match no route share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        stats = RequestDbStats()
+        token = _request_db.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _request_db.reset(token)
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route, status)
+            REQUEST_DB_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_TIME.observe(stats.seconds, method, route)
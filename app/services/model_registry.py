@@ -0,0 +1,285 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import logging
+import threading
+import time
+import joblib
+import pandas as pd
+from app.services.featurizer import YieldFeaturizer
+from app.services.tree_ensemble import TreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "yield_predictor"
+ARTIFACT_SUFFIX = ".joblib"
+TREES_SUFFIX = ".trees.npz"
+
+def trees_path(path: Path) -> Path:
+    """
+    Location of the flattened TreeEnsemble exported next to a model artifact.
+    """
+    return path.with_name(path.name[:-len(ARTIFACT_SUFFIX)] + TREES_SUFFIX)
+
+def load_tree_ensemble(path: Path, model) -> Optional[TreeEnsemble]:
+    """
+    Loads the exported TreeEnsemble for an artifact when it is at least as new as the
+    artifact, otherwise flattens the model in-process. Returns None for models that
+    cannot be flattened.
+    """
+    exported = trees_path(path)
+    try:
+        if exported.exists() and exported.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return TreeEnsemble.load(exported)
+        return TreeEnsemble.from_model(model)
+    except ValueError:
+        logger.warning("Scoring %s through its Python API, it cannot be flattened", path)
+        return None
+
+def version_from_path(path: Path) -> str:
+    """
+    Derives a model version from an artifact file name,
+    e.g. yield_predictor_lgbm.joblib -> "lgbm" and yield_predictor.joblib -> "base".
+    """
+    name = path.name[len(ARTIFACT_PREFIX):-len(ARTIFACT_SUFFIX)].lstrip("_")
+    return name or "base"
+
+class LoadedModel:
+    """
+    A loaded model artifact together with the featurizer built from its training columns.
+
+    When `trees` is given, batches of up to `trees_max_rows` rows go through the
+    array-backed TreeEnsemble instead of the model's own predict; larger batches are
+    cheaper in the libraries' compiled batch paths.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        path: Path,
+        model,
+        mtime_ns: int,
+        size: int,
+        trees: Optional[TreeEnsemble] = None,
+        trees_max_rows: int = 64,
+    ):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.trees = trees
+        self.trees_max_rows = trees_max_rows
+        self.featurizer = YieldFeaturizer.from_model(model)
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+        # scikit-learn estimators fitted on a DataFrame warn when scored with a bare array
+        self._needs_frame = hasattr(model, "feature_names_in_") and not hasattr(model, "feature_name_")
+
+    def predict(self, inputs) -> List[float]:
+        if not inputs:
+            return []
+        features = self.featurizer.transform_many(inputs)
+        if self.trees is not None and len(inputs) <= self.trees_max_rows:
+            return self.trees.predict(features).tolist()
+        if self._needs_frame:
+            features = pd.DataFrame(features, columns=self.featurizer.feature_names, copy=False)
+        return self.model.predict(features).tolist()
+
+class ModelRegistry:
+    """
+    Lazily loads yield model artifacts from a directory and keeps the most recently
+    used ones in a bounded LRU.
+
+    Every `yield_predictor*.joblib` file in the directory is a selectable version, so
+    dropping a new artifact next to the others makes it available without a restart.
+    A loaded model is reloaded when its file changes on disk; the swap replaces the
+    registry entry only, so requests already holding the previous LoadedModel finish
+    against it.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        default_version: str,
+        capacity: int = 2,
+        check_interval: float = 2.0,
+        use_tree_evaluator: bool = True,
+        tree_evaluator_max_rows: int = 64,
+    ):
+        self.model_dir = Path(model_dir)
+        self.use_tree_evaluator = use_tree_evaluator
+        self.tree_evaluator_max_rows = tree_evaluator_max_rows
+        self.default_version = default_version
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self._loaded: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._paths: Dict[str, Path] = {}
+        self._scanned_at: Optional[float] = None
+        # Guards the registry's dicts only; loads hold the lock of their version
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._fingerprints: Dict[str, Tuple[int, int]] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._polled_at: Dict[str, float] = {}
+
+        self.loads_total = 0
+        self.reloads_total = 0
+        self.evictions_total = 0
+
+    def _scan(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._scanned_at is not None and now - self._scanned_at < self.check_interval:
+            return
+        self._paths = {
+            version_from_path(path): path
+            for path in sorted(self.model_dir.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}"))
+        }
+        self._scanned_at = now
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """
+        Registers a callback invoked with the version name whenever a version is
+        loaded from an artifact that differs from the one previously served.
+        """
+        self._listeners.append(listener)
+
+    def _loaded_artifact(self, entry: "LoadedModel"):
+        self._artifact_seen(entry.version, (entry.mtime_ns, entry.size))
+
+    def _artifact_seen(self, version: str, fingerprint: Tuple[int, int]):
+        previous = self._fingerprints.get(version)
+        self._fingerprints[version] = fingerprint
+        if previous is not None and previous != fingerprint:
+            for listener in self._listeners:
+                listener(version)
+
+    def poll(self, version: Optional[str] = None):
+        """
+        Cheaply checks (at most once per check interval) whether a version's artifact
+        changed on disk and notifies listeners without loading it. Callers that can
+        answer without calling `get`, such as a result cache, use this to notice
+        rollouts; the reload itself happens on the next `get`.
+        """
+        version = version or self.default_version
+        now = time.monotonic()
+        if now - self._polled_at.get(version, 0.0) < self.check_interval:
+            return
+        self._polled_at[version] = now
+        path = self._paths.get(version)
+        if path is None or version not in self._fingerprints:
+            return
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+        self._artifact_seen(version, (stat.st_mtime_ns, stat.st_size))
+
+    # Directory scans only swap the _paths dict, so they never wait on a model load
+
+    def versions(self) -> List[str]:
+        self._scan()
+        return list(self._paths)
+
+    def has(self, version: Optional[str]) -> bool:
+        version = version or self.default_version
+        self._scan()
+        if version not in self._paths:
+            self._scan(force=True)
+        return version in self._paths
+
+    def get(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Returns the loaded model for `version` (the default version when None),
+        loading or reloading it from disk if needed. Artifacts are read outside the
+        registry lock, so a slow load only holds up requests for its own version.
+        """
+        version = version or self.default_version
+        with self._lock:
+            entry = self._loaded.get(version)
+            if entry is not None:
+                self._loaded.move_to_end(version)
+                if time.monotonic() - entry.checked_at < self.check_interval:
+                    return entry
+                # Other callers keep getting this entry while it is checked
+                entry.checked_at = time.monotonic()
+        if entry is not None:
+            return self._refresh(entry)
+
+        if not self.has(version):
+            raise KeyError(f"Unknown model version: {version}")
+        with self._load_lock(version):
+            with self._lock:
+                # Loaded by another caller while this one waited
+                entry = self._loaded.get(version)
+            if entry is not None:
+                return entry
+            entry = self._load(version, self._paths[version])
+            with self._lock:
+                self.loads_total += 1
+                self._store(entry)
+            return entry
+
+    def _load_lock(self, version: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(version, threading.Lock())
+
+    def _store(self, entry: LoadedModel):
+        # Called with the registry lock held
+        self._loaded[entry.version] = entry
+        self._loaded.move_to_end(entry.version)
+        self._loaded_artifact(entry)
+        while len(self._loaded) > self.capacity:
+            self._loaded.popitem(last=False)
+            self.evictions_total += 1
+
+    def _refresh(self, entry: LoadedModel) -> LoadedModel:
+        try:
+            stat = entry.path.stat()
+        except FileNotFoundError:
+            # Keep serving the model already in memory if its file was removed
+            return entry
+        if stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size:
+            return entry
+        with self._load_lock(entry.version):
+            with self._lock:
+                current = self._loaded.get(entry.version)
+            if current is not None and current is not entry:
+                # Another caller already reloaded it
+                return current
+            try:
+                fresh = self._load(entry.version, entry.path)
+            except Exception:
+                logger.exception("Failed to reload model %s from %s, keeping the previous one", entry.version, entry.path)
+                return entry
+            with self._lock:
+                self.reloads_total += 1
+                self._store(fresh)
+        logger.info("Reloaded model %s from %s", entry.version, entry.path)
+        return fresh
+
+    def _load(self, version: str, path: Path) -> LoadedModel:
+        stat = path.stat()
+        model = joblib.load(path)
+        trees = load_tree_ensemble(path, model) if self.use_tree_evaluator else None
+        return LoadedModel(version, path, model, stat.st_mtime_ns, stat.st_size, trees, self.tree_evaluator_max_rows)
+
+    def status(self) -> Dict:
+        self._scan()
+        loaded = dict(self._loaded)
+        return {
+            "default_version": self.default_version,
+            "capacity": self.capacity,
+            "versions": {
+                version: {
+                    "path": str(path),
+                    "loaded": version in loaded,
+                    "loaded_at": loaded[version].loaded_at if version in loaded else None,
+                    "tree_evaluator": version in loaded and loaded[version].trees is not None,
+                }
+                for version, path in self._paths.items()
+            },
+            "loads_total": self.loads_total,
+            "reloads_total": self.reloads_total,
+            "evictions_total": self.evictions_total,
+        }
@@ -0,0 +1,95 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import time
+from app.schemas.yield_prediction import YieldPredictionInput
+from app.services.featurizer import CATEGORICAL_FEATURES, NUMERIC_FEATURES, clean_feature_name
+
+def canonical_key(model_version: str, input_data: YieldPredictionInput) -> bytes:
+    """
+    Hashes an input the way the featurizer sees it: categorical values are compared
+    after column name cleaning and numbers by their float value, so inputs that
+    encode to the same feature vector share a key.
+    """
+    parts = [model_version]
+    parts.extend(repr(float(getattr(input_data, field))) for field in NUMERIC_FEATURES)
+    parts.extend(clean_feature_name(getattr(input_data, field)) for field in CATEGORICAL_FEATURES)
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).digest()
+
+class PredictionCache:
+    """
+    Bounded LRU of yield predictions with a per-entry TTL.
+
+    Entries are keyed on the canonical input hash and the model version, and are
+    stamped with that version's generation. `invalidate(version)` bumps the
+    generation, so every entry computed with the previous model misses from then on
+    and ages out of the LRU without a scan.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, float, int]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def generation(self, model_version: str) -> int:
+        return self._generations.get(model_version, 0)
+
+    def get(self, model_version: str, key: bytes) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at, generation = entry
+        if generation != self.generation(model_version) or expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, model_version: str, key: bytes, value: float, generation: int):
+        """
+        Stores a prediction computed while `generation` was current; results that
+        raced with an invalidation are dropped.
+        """
+        if not self.enabled or generation != self.generation(model_version):
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl, generation)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, model_version: str):
+        self._generations[model_version] = self.generation(model_version) + 1
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,19 +1,85 @@
-from typing import List, Dict, Any
-from app.models.models import Season
+from typing import List, Dict, Any, Optional
+import math
 import numpy as np
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.models import Crop, Farm, Season
+from app.services.crop_performance import total_cost_expression
+from app.services.valuation_engine import SeasonArrays, SeasonHistory
 
-def get_crop_recommendations(seasons: List[Season]) -> Dict[str, Any]:
+class CropProfitStats:
     """
-    Generates crop recommendations based on historical performance.
-    This is a placeholder for a real ML model.
+    Count, sum and sum of squares of the season profits of one crop, enough to derive
+    the mean, the (population) standard deviation and the Sharpe ratio.
     """
-    if not seasons:
-        return {"message": "Not enough data for recommendations."}
 
-    # Simple heuristic: recommend the crop with the highest average profit.
-    crop_profits = {}
-    crop_counts = {}
+    def __init__(self, crop_name: Optional[str], count: int = 0, total: float = 0.0, total_sq: float = 0.0):
+        self.crop_name = crop_name
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def add(self, profit: float):
+        self.count += 1
+        self.total += profit
+        self.total_sq += profit * profit
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+    @property
+    def std(self) -> float:
+        mean = self.mean
+        variance = self.total_sq / self.count - mean * mean
+        # Identical profits leave only rounding noise from the sum of squares
+        if variance <= 1e-12 * mean * mean:
+            return 0.0
+        return math.sqrt(variance)
+
+    @property
+    def sharpe_ratio(self) -> float:
+        std = self.std
+        return self.mean / std if std > 0 else self.mean # or some other handling for zero volatility
+
+def crop_profit_stats_statement(*filters):
+    """
+    Per-crop profit statistics of the seasons matching `filters`, in the order each
+    crop first appears.
+    """
+    profit = Season.revenue_kes - total_cost_expression()
+    return (
+        select(
+            Crop.name,
+            func.count().label("count"),
+            func.sum(profit).label("total"),
+            func.sum(profit * profit).label("total_sq"),
+        )
+        .join(Crop, Crop.id == Season.crop_id)
+        .where(Season.revenue_kes.isnot(None), *filters)
+        .group_by(Crop.name)
+        .order_by(func.min(Season.id))
+    )
+
+async def _read_crop_profit_stats(session: AsyncSession, statement) -> List[CropProfitStats]:
+    result = await session.exec(statement)
+    return [CropProfitStats(row.name, row.count, row.total, row.total_sq) for row in result.all()]
 
+async def region_crop_profit_stats(session: AsyncSession, county: str) -> List[CropProfitStats]:
+    """
+    Statistics over the seasons of every farm in `county`, aggregated in the database.
+    """
+    farms_in_county = select(Farm.id).where(Farm.county == county)
+    return await _read_crop_profit_stats(session, crop_profit_stats_statement(Season.farm_id.in_(farms_in_county)))
+
+def crop_profit_stats(seasons: SeasonHistory) -> List[CropProfitStats]:
+    """
+    The same statistics as crop_profit_stats_statement, from already loaded seasons.
+    """
+    if isinstance(seasons, SeasonArrays):
+        return _crop_profit_stats_from_arrays(seasons)
+    stats: Dict[Optional[str], CropProfitStats] = {}
     for s in seasons:
         if s.crop and s.revenue_kes is not None:
             total_cost = (
@@ -26,16 +92,52 @@ def get_crop_recommendations(seasons: List[Season]) -> Dict[str, Any]:
             )
             profit = s.revenue_kes - total_cost
             crop_name = s.crop.name
-            if crop_name not in crop_profits:
-                crop_profits[crop_name] = 0
-                crop_counts[crop_name] = 0
-            crop_profits[crop_name] += profit
-            crop_counts[crop_name] += 1
+            if crop_name not in stats:
+                stats[crop_name] = CropProfitStats(crop_name)
+            stats[crop_name].add(profit)
+    return list(stats.values())
+
+def _crop_profit_stats_from_arrays(seasons: SeasonArrays) -> List[CropProfitStats]:
+    known_crops = np.fromiter(seasons.crop_names, dtype=np.int64, count=len(seasons.crop_names))
+    mask = seasons.has_revenue & np.isin(seasons.crop_id, known_crops)
+    crop_ids = seasons.crop_id[mask]
+    profit = seasons.profit[mask]
+    if not len(crop_ids):
+        return []
 
-    if not crop_profits:
+    # Crops are keyed by name, in the order their first season appears
+    ids, first_seen = np.unique(crop_ids, return_index=True)
+    ids = ids[np.argsort(first_seen)]
+    names = list(dict.fromkeys(seasons.crop_names[int(crop_id)] for crop_id in ids))
+    position = np.zeros(ids.max() + 1, dtype=np.int64)
+    position[ids] = [names.index(seasons.crop_names[int(crop_id)]) for crop_id in ids]
+    index = position[crop_ids]
+
+    counts = np.bincount(index, minlength=len(names))
+    totals = np.bincount(index, weights=profit, minlength=len(names))
+    totals_sq = np.bincount(index, weights=profit * profit, minlength=len(names))
+    return [
+        CropProfitStats(name, int(count), float(total), float(total_sq))
+        for name, count, total, total_sq in zip(names, counts, totals, totals_sq)
+    ]
+
+def get_crop_recommendations(seasons: SeasonHistory) -> Dict[str, Any]:
+    """
+    Generates crop recommendations based on historical performance.
+    This is a placeholder for a real ML model.
+    """
+    if not seasons:
+        return {"message": "Not enough data for recommendations."}
+    return crop_recommendations_from_stats(crop_profit_stats(seasons))
+
+def crop_recommendations_from_stats(stats: List[CropProfitStats]) -> Dict[str, Any]:
+    """
+    Simple heuristic: recommend the crop with the highest average profit.
+    """
+    if not stats:
         return {"message": "No profitable crops found in historical data."}
 
-    average_profits = {crop: total / crop_counts[crop] for crop, total in crop_profits.items()}
+    average_profits = {crop.crop_name: crop.mean for crop in stats}
 
     best_crop = max(average_profits, key=average_profits.get)
     recommendation = {
@@ -46,43 +148,22 @@ def get_crop_recommendations(seasons: List[Season]) -> Dict[str, Any]:
 
     return recommendation
 
-def get_advanced_recommendations(seasons: List[Season]) -> Dict[str, Any]:
+def get_advanced_recommendations(seasons: SeasonHistory) -> Dict[str, Any]:
     """
     Generates crop recommendations based on risk-adjusted return (Sharpe Ratio).
     """
     if not seasons:
         return {"message": "Not enough data for recommendations."}
+    return advanced_recommendations_from_stats(crop_profit_stats(seasons))
 
-    crop_profits_over_time = {}
-
-    for s in seasons:
-        if s.crop and s.revenue_kes is not None:
-            total_cost = (
-                (s.seed_cost_kes or 0) + 
-                (s.fertilizer_cost_kes or 0) + 
-                (s.pesticide_cost_kes or 0) + 
-                (s.labor_cost_kes or 0) + 
-                (s.machinery_cost_kes or 0) + 
-                (s.other_costs_kes or 0)
-            )
-            profit = s.revenue_kes - total_cost
-            crop_name = s.crop.name
-            if crop_name not in crop_profits_over_time:
-                crop_profits_over_time[crop_name] = []
-            crop_profits_over_time[crop_name].append(profit)
-
-    if not crop_profits_over_time:
+def advanced_recommendations_from_stats(stats: List[CropProfitStats]) -> Dict[str, Any]:
+    """
+    Picks the crop with the best Sharpe ratio among crops with more than one season.
+    """
+    if not stats:
         return {"message": "No profitable crops found in historical data."}
 
-    sharpe_ratios = {}
-    for crop, profits in crop_profits_over_time.items():
-        if len(profits) > 1:
-            avg_profit = np.mean(profits)
-            std_dev_profit = np.std(profits)
-            if std_dev_profit > 0:
-                sharpe_ratios[crop] = avg_profit / std_dev_profit
-            else:
-                sharpe_ratios[crop] = avg_profit # or some other handling for zero volatility
+    sharpe_ratios = {crop.crop_name: crop.sharpe_ratio for crop in stats if crop.count > 1}
 
     if not sharpe_ratios:
         return {"message": "Could not calculate risk-adjusted return for any crop."}
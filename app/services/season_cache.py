@@ -0,0 +1,115 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import time
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import SEASON_CACHE_MAX_BYTES, SEASON_CACHE_TTL_SECONDS
+from app.models.models import Crop, Season
+from app.services.valuation_engine import SeasonArrays, season_arrays_statement
+
+class SeasonColumnCache:
+    """
+    LRU of each farm's season history as SeasonArrays, bounded by the arrays' total
+    size in bytes, with a per-entry TTL.
+
+    API writers call `invalidate(farm_id)` after committing seasons of a farm, which
+    bumps the farm's generation, so a load that was already running when the data
+    changed is not stored (the same scheme as the prediction cache). Bulk loads run in
+    another process and cannot invalidate entries; the API sees them once the affected
+    entries expire after the TTL.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[SeasonArrays, float]]" = OrderedDict()
+        self._bytes = 0
+        self._generations: Dict[int, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def generation(self, farm_id: int) -> int:
+        return self._generations.get(farm_id, 0)
+
+    def get(self, farm_id: int) -> Optional[SeasonArrays]:
+        entry = self._entries.get(farm_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        columns, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove(farm_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(farm_id)
+        self.hits += 1
+        return columns
+
+    def put(self, farm_id: int, columns: SeasonArrays, generation: int):
+        """
+        Stores columns loaded while `generation` was current; loads that raced with
+        an invalidation, and histories larger than the whole budget, are dropped.
+        """
+        if not self.enabled or generation != self.generation(farm_id) or columns.nbytes > self.max_bytes:
+            return
+        self._remove(farm_id)
+        self._entries[farm_id] = (columns, time.monotonic() + self.ttl)
+        self._bytes += columns.nbytes
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _remove(self, farm_id: int):
+        entry = self._entries.pop(farm_id, None)
+        if entry is not None:
+            self._bytes -= entry[0].nbytes
+
+    def invalidate(self, farm_id: Optional[int]):
+        if farm_id is None:
+            return
+        self._generations[farm_id] = self._generations.get(farm_id, 0) + 1
+        self._remove(farm_id)
+        self.invalidations += 1
+
+    def metrics(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "farms": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+season_cache = SeasonColumnCache(SEASON_CACHE_MAX_BYTES, SEASON_CACHE_TTL_SECONDS)
+
+async def fetch_farm_columns(session: AsyncSession, farm_id: int, cache: SeasonColumnCache = season_cache) -> SeasonArrays:
+    """
+    Reads the farm's season history from the database and stores it in the cache.
+    """
+    generation = cache.generation(farm_id)
+    result = await session.exec(season_arrays_statement([farm_id]).order_by(Season.id))
+    rows = result.all()
+    crop_ids = {row[5] for row in rows if row[5] is not None}
+    crop_names = {}
+    if crop_ids:
+        result = await session.exec(select(Crop.id, Crop.name).where(Crop.id.in_(crop_ids)))
+        crop_names = dict(result.all())
+    columns = SeasonArrays.from_rows(rows, crop_names)
+    cache.put(farm_id, columns, generation)
+    return columns
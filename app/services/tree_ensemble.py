@@ -0,0 +1,225 @@
+from typing import List, Optional
+import numpy as np
+
+# Missing value handling of a split node, following LightGBM's missing_type
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+# LightGBM treats |x| <= kZeroThreshold as zero
+_ZERO_THRESHOLD = 1e-35
+
+class TreeEnsemble:
+    """
+    A trained tree ensemble flattened into NumPy arrays.
+
+    All trees share one node table (split feature, threshold, left/right child, leaf
+    value). Leaves point to themselves, so scoring walks every (row, tree) pair one
+    level per step for `max_depth` steps with plain array indexing, for one row or a
+    whole batch, without going through the scikit-learn or LightGBM Python API.
+    Predictions are `sum(leaf values) * scale`: scale is 1 for boosting and
+    1 / n_trees for forests.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        scale: float = 1.0,
+        missing_type: Optional[np.ndarray] = None,
+        default_left: Optional[np.ndarray] = None,
+        float32_inputs: bool = False,
+    ):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.scale = float(scale)
+        self.missing_type = None if missing_type is None else np.ascontiguousarray(missing_type, dtype=np.int8)
+        self.default_left = None if default_left is None else np.ascontiguousarray(default_left, dtype=bool)
+        # scikit-learn compares float32 copies of the inputs against its thresholds
+        self.float32_inputs = bool(float32_inputs)
+        self._has_zero_rules = self.missing_type is not None and bool((self.missing_type == MISSING_ZERO).any())
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.feature, self.threshold, self.left, self.right, self.value, self.roots]
+        arrays += [a for a in (self.missing_type, self.default_left) if a is not None]
+        return sum(a.nbytes for a in arrays)
+
+    @classmethod
+    def from_model(cls, model) -> "TreeEnsemble":
+        """
+        Flattens a fitted LGBMRegressor or scikit-learn forest / tree regressor.
+        """
+        if hasattr(model, "booster_"):
+            return cls.from_lightgbm(model.booster_, num_iteration=getattr(model, "best_iteration_", None) or -1)
+        if hasattr(model, "estimators_"):
+            return cls.from_sklearn_trees([e.tree_ for e in model.estimators_])
+        if hasattr(model, "tree_"):
+            return cls.from_sklearn_trees([model.tree_])
+        raise ValueError(f"Cannot flatten a {type(model).__name__} into a TreeEnsemble")
+
+    @classmethod
+    def from_sklearn_trees(cls, trees: List) -> "TreeEnsemble":
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        # scikit-learn sends NaN to the child recorded in missing_go_to_left (the
+        # larger one for features without missing values in training)
+        nan_left = [] if all(hasattr(tree, "missing_go_to_left") for tree in trees) else None
+        offset = 0
+        for tree in trees:
+            n = tree.node_count
+            ids = np.arange(n) + offset
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, ids, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            if nan_left is not None:
+                nan_left.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            roots.append(offset)
+            offset += n
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(values),
+            np.array(roots),
+            max_depth=max(tree.max_depth for tree in trees),
+            scale=1.0 / len(trees),
+            missing_type=None if nan_left is None else np.full(offset, MISSING_NAN),
+            default_left=None if nan_left is None else np.concatenate(nan_left),
+            float32_inputs=True,
+        )
+
+    @classmethod
+    def from_lightgbm(cls, booster, num_iteration: int = -1) -> "TreeEnsemble":
+        dump = booster.dump_model(num_iteration=num_iteration)
+        if dump.get("num_class", 1) != 1:
+            raise ValueError("Only single-output LightGBM models can be flattened")
+
+        feature, threshold, left, right, value, missing_type, default_left = [], [], [], [], [], [], []
+        roots = []
+        max_depth = 0
+
+        def add_node() -> int:
+            for column in (feature, threshold, left, right, value, missing_type, default_left):
+                column.append(0)
+            return len(feature) - 1
+
+        for tree in dump["tree_info"]:
+            root = add_node()
+            roots.append(root)
+            stack = [(tree["tree_structure"], root, 0)]
+            while stack:
+                node, index, depth = stack.pop()
+                max_depth = max(max_depth, depth)
+                if "leaf_value" in node:
+                    feature[index], threshold[index] = 0, np.inf
+                    left[index] = right[index] = index
+                    value[index] = node["leaf_value"]
+                    continue
+                if node["decision_type"] != "<=":
+                    raise ValueError("Categorical LightGBM splits are not supported")
+                feature[index] = node["split_feature"]
+                threshold[index] = node["threshold"]
+                missing_type[index] = _MISSING_TYPES[node["missing_type"]]
+                default_left[index] = node["default_left"]
+                left[index], right[index] = add_node(), add_node()
+                stack.append((node["left_child"], left[index], depth + 1))
+                stack.append((node["right_child"], right[index], depth + 1))
+
+        scale = 1.0 / len(roots) if dump.get("average_output") else 1.0
+        return cls(
+            np.array(feature),
+            np.array(threshold),
+            np.array(left),
+            np.array(right),
+            np.array(value),
+            np.array(roots),
+            max_depth=max_depth,
+            scale=scale,
+            missing_type=np.array(missing_type),
+            default_left=np.array(default_left),
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Scores a (n_rows, n_features) array, returning a (n_rows,) array.
+        """
+        X = np.asarray(X, dtype=np.float32 if self.float32_inputs else np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        # Missing value rules only change the path for zeros (Zero rules) or NaNs
+        check_missing = self.missing_type is not None and (self._has_zero_rules or bool(np.isnan(flat).any()))
+        for _ in range(self.max_depth):
+            values = flat.take(row_offsets + self.feature.take(nodes))
+            if check_missing:
+                node_missing = self.missing_type.take(nodes)
+                is_nan = np.isnan(values)
+                # Like LightGBM, NaN becomes zero before the rule is tested unless the
+                # node has a NaN rule, so Zero rules send NaN the default way too
+                values = np.where(is_nan & (node_missing != MISSING_NAN), 0.0, values)
+                is_missing = ((node_missing == MISSING_ZERO) & (np.abs(values) <= _ZERO_THRESHOLD)) | (
+                    (node_missing == MISSING_NAN) & is_nan
+                )
+                go_left = np.where(is_missing, self.default_left.take(nodes), values <= self.threshold.take(nodes))
+            else:
+                go_left = values <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return self.value.take(nodes).sum(axis=1) * self.scale
+
+    def save(self, path: str):
+        arrays = dict(
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            meta=np.array([self.max_depth, self.scale, float(self.float32_inputs)]),
+        )
+        if self.missing_type is not None:
+            arrays.update(missing_type=self.missing_type, default_left=self.default_left)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "TreeEnsemble":
+        with np.load(path) as data:
+            max_depth, scale, float32_inputs = data["meta"]
+            return cls(
+                data["feature"],
+                data["threshold"],
+                data["left"],
+                data["right"],
+                data["value"],
+                data["roots"],
+                max_depth=int(max_depth),
+                scale=float(scale),
+                missing_type=data["missing_type"] if "missing_type" in data else None,
+                default_left=data["default_left"] if "default_left" in data else None,
+                float32_inputs=bool(float32_inputs),
+            )
@@ -1,37 +1,39 @@
-from typing import List
-from app.models.models import Season
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.services.valuation_engine import SeasonArrays, SeasonHistory, dcf_multiplier
 
-def calculate_simple_valuation(seasons: List[Season]) -> float:
+def calculate_simple_valuation(seasons: SeasonHistory) -> float:
     """
     Calculates a simple farm valuation based on the average annual profit.
     """
     if not seasons:
         return 0.0
 
-    total_profit = sum(
-        (s.revenue_kes or 0) - 
-        ((s.seed_cost_kes or 0) + 
-         (s.fertilizer_cost_kes or 0) + 
-         (s.pesticide_cost_kes or 0) + 
-         (s.labor_cost_kes or 0) + 
-         (s.machinery_cost_kes or 0) + 
-         (s.other_costs_kes or 0))
-        for s in seasons if s.revenue_kes is not None
-    )
+    if isinstance(seasons, SeasonArrays):
+        total_profit = seasons.recorded_profit()
+    else:
+        total_profit = sum(
+            (s.revenue_kes or 0) - 
+            ((s.seed_cost_kes or 0) + 
+             (s.fertilizer_cost_kes or 0) + 
+             (s.pesticide_cost_kes or 0) + 
+             (s.labor_cost_kes or 0) + 
+             (s.machinery_cost_kes or 0) + 
+             (s.other_costs_kes or 0))
+            for s in seasons if s.revenue_kes is not None
+        )
     
     # A simple valuation model: 5x the total recorded profit.
     # This is a placeholder and can be replaced with a more sophisticated model.
     valuation = total_profit * 5
     return valuation
 
-def calculate_dcf_valuation(seasons: List[Season], discount_rate: float = 0.1, projection_years: int = 5, perpetuity_growth_rate: float = 0.02) -> float:
+def calculate_annual_profits(seasons: SeasonHistory) -> Dict[int, float]:
     """
-    Calculates a farm valuation using a Discounted Cash Flow (DCF) model.
+    Sums the profit of the seasons by harvest year, skipping undated seasons.
     """
-    if not seasons:
-        return 0.0
-
-    # Calculate historical annual profits
+    if isinstance(seasons, SeasonArrays):
+        return seasons.annual_profits()
     annual_profits = {}
     for s in seasons:
         if s.harvest_date:
@@ -49,6 +51,20 @@ def calculate_dcf_valuation(seasons: List[Season], discount_rate: float = 0.1, p
             )
             profit = (s.revenue_kes or 0) - total_cost
             annual_profits[year] += profit
+    return annual_profits
+
+def latest_annual_profit(annual_profits: Dict[int, float]) -> float:
+    return annual_profits[max(annual_profits.keys())] if annual_profits else 0.0
+
+def calculate_dcf_valuation(seasons: SeasonHistory, discount_rate: float = 0.1, projection_years: int = 5, perpetuity_growth_rate: float = 0.02) -> float:
+    """
+    Calculates a farm valuation using a Discounted Cash Flow (DCF) model.
+    """
+    if not seasons:
+        return 0.0
+
+    # Calculate historical annual profits
+    annual_profits = calculate_annual_profits(seasons)
 
     if not annual_profits:
         return 0.0
@@ -68,3 +84,62 @@ def calculate_dcf_valuation(seasons: List[Season], discount_rate: float = 0.1, p
     # Calculate DCF valuation
     dcf_valuation = sum(discounted_profits) + discounted_terminal_value
     return dcf_valuation
+
+def calculate_dcf_sensitivity(
+    seasons: SeasonHistory,
+    discount_rates: List[float],
+    projection_years: List[int],
+    perpetuity_growth_rates: List[float],
+) -> np.ndarray:
+    """
+    DCF valuations for every combination of the parameters, as an array indexed
+    [discount_rate, projection_years, perpetuity_growth_rate]. Combinations where the
+    discount rate equals the growth rate have no terminal value and are NaN.
+    """
+    profit = latest_annual_profit(calculate_annual_profits(seasons))
+    r, years, g = np.meshgrid(
+        np.asarray(discount_rates, dtype=np.float64),
+        np.asarray(projection_years, dtype=np.int64),
+        np.asarray(perpetuity_growth_rates, dtype=np.float64),
+        indexing="ij",
+    )
+    valuations = profit * dcf_multiplier(r, years, g)
+    valuations[~np.isfinite(valuations)] = np.nan
+    return valuations
+
+def calculate_dcf_monte_carlo(
+    seasons: SeasonHistory,
+    n_simulations: int = 10000,
+    seed: Optional[int] = None,
+    discount_rate: float = 0.1,
+    discount_rate_std: float = 0.02,
+    growth_rate: float = 0.02,
+    growth_rate_std: float = 0.02,
+    projection_years: int = 5,
+    percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+) -> Dict:
+    """
+    Distribution of the DCF valuation when the discount rate and the profit growth
+    rate are drawn from normal distributions.
+
+    Draws where the discount rate does not exceed the growth rate have no finite
+    terminal value; they are discarded and counted in the result.
+    """
+    profit = latest_annual_profit(calculate_annual_profits(seasons))
+    rng = np.random.default_rng(seed)
+    r = rng.normal(discount_rate, discount_rate_std, n_simulations)
+    g = rng.normal(growth_rate, growth_rate_std, n_simulations)
+    valid = r > g
+    valuations = profit * dcf_multiplier(r[valid], projection_years, g[valid])
+
+    summary = {"n_simulations": n_simulations, "seed": seed, "discarded": int(n_simulations - valid.sum())}
+    if not len(valuations):
+        return {**summary, "mean": None, "std": None, "percentiles": {}}
+    return {
+        **summary,
+        "mean": float(valuations.mean()),
+        "std": float(valuations.std()),
+        "percentiles": {
+            f"p{q:g}": float(v) for q, v in zip(percentiles, np.percentile(valuations, percentiles))
+        },
+    }
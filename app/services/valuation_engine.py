@@ -0,0 +1,206 @@
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.models import Season
+from app.services.crop_performance import total_cost_expression
+
+class SeasonArrays:
+    """
+    The season columns the valuations and recommendations need, one array entry per
+    season in id order.
+
+    `revenue` has missing values already counted as zero and `has_revenue` records
+    which seasons had one; `cost` is the sum of the detailed costs. `year` is 0 for
+    seasons without a harvest date and `crop_id` is -1 for seasons without a crop.
+    `crop_names` maps the crop ids to their names when they were loaded.
+    """
+
+    def __init__(
+        self,
+        farm_id: np.ndarray,
+        year: np.ndarray,
+        revenue: np.ndarray,
+        has_revenue: np.ndarray,
+        cost: np.ndarray,
+        crop_id: np.ndarray,
+        crop_names: Optional[Dict[int, Optional[str]]] = None,
+    ):
+        self.farm_id = farm_id
+        self.year = year
+        self.revenue = revenue
+        self.has_revenue = has_revenue
+        self.cost = cost
+        self.crop_id = crop_id
+        self.crop_names = crop_names or {}
+
+    def __len__(self) -> int:
+        return len(self.farm_id)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence, crop_names: Optional[Dict[int, Optional[str]]] = None) -> "SeasonArrays":
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return cls(
+            farm_id=data[:, 0].astype(np.int32),
+            year=np.nan_to_num(data[:, 1], nan=0).astype(np.int16),
+            revenue=data[:, 2],
+            has_revenue=data[:, 3] > 0,
+            cost=data[:, 4],
+            crop_id=np.nan_to_num(data[:, 5], nan=-1).astype(np.int32),
+            crop_names=crop_names,
+        )
+
+    @property
+    def profit(self) -> np.ndarray:
+        return self.revenue - self.cost
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.farm_id, self.year, self.revenue, self.has_revenue, self.cost, self.crop_id))
+
+    def recorded_profit(self) -> float:
+        """
+        Total profit of the seasons that recorded a revenue.
+        """
+        return float(np.sum(self.profit, where=self.has_revenue))
+
+    def annual_profits(self) -> Dict[int, float]:
+        """
+        Profit summed by harvest year, skipping undated seasons.
+        """
+        dated = self.year > 0
+        years, index = np.unique(self.year[dated], return_inverse=True)
+        totals = np.bincount(index, weights=self.profit[dated], minlength=len(years))
+        return {int(year): float(total) for year, total in zip(years, totals)}
+
+SeasonHistory = Union[List[Season], SeasonArrays]
+
+def season_arrays_statement(farm_ids: Optional[List[int]] = None):
+    statement = select(
+        Season.farm_id,
+        func.extract("year", Season.harvest_date),
+        func.coalesce(Season.revenue_kes, 0),
+        Season.revenue_kes.isnot(None),
+        total_cost_expression(),
+        Season.crop_id,
+    ).where(Season.farm_id.isnot(None))
+    if farm_ids is not None:
+        statement = statement.where(Season.farm_id.in_(farm_ids))
+    return statement
+
+# Ids bound per IN list; asyncpg allows at most 32767 parameters per statement
+ID_BATCH_SIZE = 5_000
+
+def id_batches(ids: Sequence[int], size: int = ID_BATCH_SIZE) -> List[List[int]]:
+    ids = list(ids)
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
+async def load_season_arrays(session: AsyncSession, farm_ids: Optional[List[int]] = None) -> SeasonArrays:
+    """
+    Reads the valuation inputs of every season of `farm_ids` (all farms when None),
+    with one query per ID_BATCH_SIZE farms.
+    """
+    if farm_ids is None:
+        result = await session.exec(season_arrays_statement())
+        return SeasonArrays.from_rows(result.all())
+    rows = []
+    for batch in id_batches(farm_ids):
+        result = await session.exec(season_arrays_statement(batch))
+        rows.extend(result.all())
+    return SeasonArrays.from_rows(rows)
+
+def dcf_multiplier(discount_rate, projection_years, perpetuity_growth_rate) -> np.ndarray:
+    """
+    The factor calculate_dcf_valuation applies to the last year's profit, for any
+    broadcastable combination of parameters.
+    """
+    r = np.asarray(discount_rate, dtype=np.float64)[..., None]
+    years = np.asarray(projection_years, dtype=np.int64)[..., None]
+    g = np.asarray(perpetuity_growth_rate, dtype=np.float64)[..., None]
+    i = np.arange(1, max(int(years.max()), 1) + 1)
+    discounted = np.where(i <= years, ((1 + g) / (1 + r)) ** i, 0.0).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terminal = (1 + g[..., 0]) ** (years[..., 0] + 1) / (r[..., 0] - g[..., 0]) / (1 + r[..., 0]) ** years[..., 0]
+    return discounted + terminal
+
+class FarmProfits:
+    """
+    Per-farm profit aggregates for a set of farms, computed with array operations.
+
+    `total_profit` is the profit over seasons that recorded a revenue (the input to
+    the simple valuation) and `last_year_profit` the profit of each farm's latest
+    harvest year (the input to the DCF valuation, zero without dated seasons).
+    """
+
+    def __init__(self, farm_ids: np.ndarray, season_count: np.ndarray, total_profit: np.ndarray, last_year_profit: np.ndarray):
+        self.farm_ids = farm_ids
+        self.season_count = season_count
+        self.total_profit = total_profit
+        self.last_year_profit = last_year_profit
+
+    @classmethod
+    def from_arrays(cls, seasons: SeasonArrays, farm_ids: Optional[Sequence[int]] = None) -> "FarmProfits":
+        if farm_ids is None:
+            farms = np.unique(seasons.farm_id)
+        else:
+            farms = np.asarray(farm_ids, dtype=np.int64)
+        n_farms = len(farms)
+        order = np.argsort(farms, kind="stable")
+        position = np.searchsorted(farms[order], seasons.farm_id)
+        position = np.minimum(position, max(n_farms - 1, 0))
+        known = farms[order][position] == seasons.farm_id if n_farms else np.zeros(len(seasons), dtype=bool)
+        farm_index = order[position][known]
+
+        profit = (seasons.revenue - seasons.cost)[known]
+        season_count = np.bincount(farm_index, minlength=n_farms)
+        total_profit = np.bincount(
+            farm_index, weights=np.where(seasons.has_revenue[known], profit, 0.0), minlength=n_farms
+        )
+
+        dated = seasons.year[known] > 0
+        year = seasons.year[known][dated].astype(np.int64)
+        dated_farm = farm_index[dated]
+        last_year_profit = np.zeros(n_farms)
+        if len(year):
+            first_year = year.min()
+            n_years = year.max() - first_year + 1
+            annual = np.bincount(
+                dated_farm * n_years + (year - first_year), weights=profit[dated], minlength=n_farms * n_years
+            ).reshape(n_farms, n_years)
+            last_year = np.full(n_farms, -1)
+            np.maximum.at(last_year, dated_farm, year - first_year)
+            has_dated = last_year >= 0
+            last_year_profit[has_dated] = annual[has_dated, last_year[has_dated]]
+        return cls(farms, season_count, total_profit, last_year_profit)
+
+    def simple_valuations(self) -> np.ndarray:
+        # Same placeholder model as calculate_simple_valuation: 5x the total recorded profit
+        return self.total_profit * 5
+
+    def dcf_valuations(self, discount_rate: float = 0.1, projection_years: int = 5, perpetuity_growth_rate: float = 0.02) -> np.ndarray:
+        return self.last_year_profit * dcf_multiplier(discount_rate, projection_years, perpetuity_growth_rate)
+
+def value_farms(
+    seasons: SeasonArrays,
+    farm_ids: Optional[Sequence[int]] = None,
+    discount_rate: float = 0.1,
+    projection_years: int = 5,
+    perpetuity_growth_rate: float = 0.02,
+) -> List[Dict]:
+    """
+    Simple and DCF valuations of every farm in one vectorized pass, in the order of
+    `farm_ids` (or by farm id when None).
+    """
+    profits = FarmProfits.from_arrays(seasons, farm_ids)
+    simple = profits.simple_valuations()
+    dcf = profits.dcf_valuations(discount_rate, projection_years, perpetuity_growth_rate)
+    return [
+        {
+            "farm_id": int(farm_id),
+            "season_count": int(count),
+            "valuation": float(simple_value) if count else 0.0,
+            "dcf_valuation": float(dcf_value) if count else 0.0,
+        }
+        for farm_id, count, simple_value, dcf_value in zip(profits.farm_ids, profits.season_count, simple, dcf)
+    ]
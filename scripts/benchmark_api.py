@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+SCALES = [1_000, 100_000, 1_000_000]
+SEASONS_PER_FARMER = 100
+SEED_CHUNK_SIZE = 50_000
+DB_DIR = Path(os.getenv("BENCHMARK_DB_DIR", Path(tempfile.gettempdir()) / "mshamba_api_benchmark"))
+WARMUP_REQUESTS = 10
+# Each route and concurrency level is measured this many times; results are the median trial
+DEFAULT_TRIALS = 5
+# A route regresses when its median p50 latency or throughput is this much worse than the
+# baseline, plus the spread between its trials, or when it issues more queries per request
+# or fails more requests
+DEFAULT_TOLERANCE = 0.25
+
+class Fixture:
+    """
+    Ids and payloads the generated requests draw from, taken from the seeded database.
+    """
+
+    def __init__(self, n_seasons: int, max_season_id: int, farm_ids: np.ndarray, counties: List[str], inputs: List[Dict]):
+        self.n_seasons = n_seasons
+        self.max_season_id = max_season_id
+        self.farm_ids = farm_ids
+        self.counties = counties
+        self.inputs = inputs
+
+# Route name -> (method, path, JSON body) of one randomly drawn request
+Request = Tuple[str, str, Optional[Dict]]
+ROUTES: Dict[str, Callable[[Fixture, np.random.Generator], Request]] = {
+    "seasons": lambda f, rng: ("GET", f"/seasons/?limit=100&after_id={rng.integers(0, f.max_season_id)}", None),
+    "seasons_by_farm": lambda f, rng: ("GET", f"/seasons/?limit=100&farm_id={rng.choice(f.farm_ids)}", None),
+    "crop_performance": lambda f, rng: ("GET", "/crops/performance", None),
+    "predict_yield": lambda f, rng: ("POST", "/crops/predict_yield", f.inputs[rng.integers(0, len(f.inputs))]),
+    "farm_valuation": lambda f, rng: ("GET", f"/farms/{rng.choice(f.farm_ids)}/valuation", None),
+    "farm_dcf_valuation": lambda f, rng: ("GET", f"/farms/{rng.choice(f.farm_ids)}/dcf_valuation", None),
+    "farm_recommendations": lambda f, rng: ("GET", f"/farms/{rng.choice(f.farm_ids)}/recommendations", None),
+    "farm_advanced_recommendations": lambda f, rng: ("GET", f"/farms/{rng.choice(f.farm_ids)}/advanced_recommendations", None),
+    "region_recommendations": lambda f, rng: ("GET", f"/regions/{rng.choice(f.counties)}/recommendations", None),
+    "region_advanced_recommendations": lambda f, rng: ("GET", f"/regions/{rng.choice(f.counties)}/advanced_recommendations", None),
+}
+
+def database_path(n_seasons: int) -> Path:
+    return DB_DIR / f"seasons_{n_seasons}.db"
+
+async def seed_database(n_seasons: int, seed: int = 42):
+    """
+    Fills the benchmark database with `n_seasons` synthetic seasons fitted to the
+    cleaned dataset, about SEASONS_PER_FARMER per farmer. A database already holding
+    that many seasons is reused.
+    """
+    from sqlalchemy import func
+    from sqlmodel import SQLModel, select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db.session import async_engine, init_db
+    from app.models.models import Season
+    from scripts.datasets import read_dataset
+    from scripts.generate_synthetic import SyntheticProfile, write_database
+
+    await init_db()
+    async with AsyncSession(async_engine) as session:
+        if (await session.exec(select(func.count()).select_from(Season))).one() == n_seasons:
+            return
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    start = time.perf_counter()
+    profile = SyntheticProfile(read_dataset("mshamba_clean_seasons"))
+    counts = await write_database(profile, max(1, n_seasons // SEASONS_PER_FARMER), n_seasons, seed, SEED_CHUNK_SIZE)
+    print(f"Seeded {counts['seasons']:,} seasons on {counts['farms']:,} farms in {time.perf_counter() - start:.1f}s: {database_path(n_seasons)}")
+
+async def load_fixture(n_seasons: int) -> Fixture:
+    from sqlalchemy import func
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db.session import async_engine
+    from app.models.models import Farm, Season
+    from scripts.benchmark_models import sample_inputs
+
+    async with AsyncSession(async_engine) as session:
+        max_season_id = (await session.exec(select(func.max(Season.id)))).one()
+        farms = (await session.exec(select(Farm.id, Farm.county))).all()
+    counties = sorted({county for _, county in farms if county})
+    inputs = [x.model_dump() for x in sample_inputs(1024)]
+    return Fixture(n_seasons, max_season_id, np.array([farm_id for farm_id, _ in farms]), counties, inputs)
+
+async def drive(client, route: str, fixture: Fixture, n_requests: int, concurrency: int, seed: int) -> Tuple[np.ndarray, int]:
+    """
+    Sends `n_requests` requests of one route from `concurrency` concurrent clients.
+    Returns each request's latency in milliseconds and the number of failed requests.
+    """
+    rng = np.random.default_rng(seed)
+    requests = [ROUTES[route](fixture, rng) for _ in range(n_requests)]
+    latencies = np.empty(n_requests)
+    failures = 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, failures
+        while next_request < n_requests:
+            i = next_request
+            next_request += 1
+            method, path, body = requests[i]
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies[i] = (time.perf_counter() - start) * 1000
+            if response.status_code >= 400:
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures
+
+async def benchmark_scale(n_seasons: int, routes: List[str], n_requests: int, concurrency_levels: List[int], trials: int) -> Dict:
+    """
+    Seeds (or reuses) the database of one scale and measures every route against the
+    app in-process through an ASGI transport, `trials` times per concurrency level.
+    """
+    import httpx
+    from sqlalchemy import event
+    from app.api.endpoints import crops
+    from app.db.session import async_engine, read_engine
+    from app.main import app
+
+    await seed_database(n_seasons)
+    fixture = await load_fixture(n_seasons)
+
+    queries = {"count": 0, "seconds": 0.0}
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries["count"] += 1
+        queries["seconds"] += time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    for engine in {async_engine.sync_engine, read_engine.sync_engine}:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for route in routes:
+            # Warm-up: loads the model, fills the caches a running server would have
+            await drive(client, route, fixture, WARMUP_REQUESTS, 1, seed=0)
+            for concurrency in concurrency_levels:
+                queries.update(count=0, seconds=0.0)
+                runs = []
+                failures = 0
+                for _ in range(trials):
+                    # Every trial replays the same requests, so trials differ only by noise
+                    start = time.perf_counter()
+                    latencies, trial_failures = await drive(client, route, fixture, n_requests, concurrency, seed=concurrency)
+                    elapsed = time.perf_counter() - start
+                    failures += trial_failures
+                    runs.append({
+                        "requests_per_second": n_requests / elapsed,
+                        "p50": float(np.percentile(latencies, 50)),
+                        "p90": float(np.percentile(latencies, 90)),
+                        "p99": float(np.percentile(latencies, 99)),
+                        "max": float(latencies.max()),
+                    })
+                median = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+                result = {
+                    "route": route,
+                    "concurrency": concurrency,
+                    "requests": n_requests,
+                    "trials": runs,
+                    "failures": failures,
+                    "requests_per_second": median["requests_per_second"],
+                    "latency_ms": {key: median[key] for key in ("p50", "p90", "p99", "max")},
+                    "queries_per_request": queries["count"] / (n_requests * trials),
+                    "query_ms_per_request": queries["seconds"] * 1000 / (n_requests * trials),
+                }
+                results.append(result)
+                print(
+                    f"  {route:<32}{concurrency:>4}x {result['requests_per_second']:>9,.0f} req/s  "
+                    f"p50 {result['latency_ms']['p50']:>8.2f} ms  p99 {result['latency_ms']['p99']:>8.2f} ms  "
+                    f"{result['queries_per_request']:>5.1f} queries/req" + (f"  {failures} failed" if failures else "")
+                )
+    await crops.scheduler.shutdown()
+    return {"seasons": n_seasons, "farms": len(fixture.farm_ids), "routes": results}
+
+def trial_spread(result: Dict, key: str) -> float:
+    """
+    Range of one measure over a result's trials, relative to its median; 0 for results
+    stored before trials were recorded.
+    """
+    values = [run[key] for run in result.get("trials", [])]
+    if len(values) < 2:
+        return 0.0
+    return (max(values) - min(values)) / float(np.median(values))
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Lists the (scale, route, concurrency) results whose median p50 latency or throughput
+    is worse than the baseline by more than `tolerance` plus the trial spread of either
+    run, or that issue more queries per request or fail more requests.
+    """
+    expected = {
+        (scale["seasons"], r["route"], r["concurrency"]): r
+        for scale in baseline["scales"] for r in scale["routes"]
+    }
+    regressions = []
+    print(f"\nCompared with the baseline of {baseline['created_at']} (tolerance {tolerance:.0%} plus trial spread):")
+    for scale in report["scales"]:
+        for r in scale["routes"]:
+            base = expected.get((scale["seasons"], r["route"], r["concurrency"]))
+            if base is None:
+                continue
+            p50 = r["latency_ms"]["p50"] / base["latency_ms"]["p50"]
+            p99 = r["latency_ms"]["p99"] / base["latency_ms"]["p99"]
+            throughput = r["requests_per_second"] / base["requests_per_second"]
+            p50_margin = tolerance + max(trial_spread(r, "p50"), trial_spread(base, "p50"))
+            throughput_margin = tolerance + max(trial_spread(r, "requests_per_second"), trial_spread(base, "requests_per_second"))
+            problems = []
+            if p50 > 1 + p50_margin:
+                problems.append(f"p50 {p50:.2f}x")
+            if throughput < 1 / (1 + throughput_margin):
+                problems.append(f"throughput {throughput:.2f}x")
+            if r["queries_per_request"] > base["queries_per_request"] + 1e-9:
+                problems.append(f"queries/req {base['queries_per_request']:.1f} -> {r['queries_per_request']:.1f}")
+            # Failures are totals over all trials; compare them per trial so a baseline
+            # recorded with a different --trials still applies
+            failures = r["failures"] / len(r.get("trials", [None]))
+            base_failures = base["failures"] / len(base.get("trials", [None]))
+            if failures > base_failures:
+                problems.append(f"failures/trial {base_failures:g} -> {failures:g}")
+            label = f"{scale['seasons']:>9,} seasons  {r['route']:<32}{r['concurrency']:>4}x"
+            print(
+                f"  {label}  p50 {p50:5.2f}x  p99 {p99:5.2f}x  throughput {throughput:5.2f}x"
+                + (f"  REGRESSED ({', '.join(problems)})" if problems else "")
+            )
+            if problems:
+                regressions.append(f"{label}: {', '.join(problems)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API in-process against seeded SQLite databases.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="numbers of seeded seasons")
+    parser.add_argument("--routes", nargs="+", choices=list(ROUTES), default=list(ROUTES))
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16], help="concurrent clients")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="runs per route and concurrency level")
+    parser.add_argument("--output", default="api_benchmark.json", help="where the JSON report is written")
+    parser.add_argument("--baseline", default="api_benchmark_baseline.json", help="stored results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--scale", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scale:
+        result = asyncio.run(benchmark_scale(args.scale, args.routes, args.requests, args.concurrency, args.trials))
+        Path(args.result).write_text(json.dumps(result))
+        return
+
+    # The app binds its engine to DATABASE_URL on import, so every scale runs in its
+    # own process against its own database file
+    DB_DIR.mkdir(parents=True, exist_ok=True)
+    scales = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_seasons in args.scales:
+            print(f"\n{n_seasons:,} seasons ({database_path(n_seasons)}):")
+            result_path = Path(tmp) / f"{n_seasons}.json"
+            env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{database_path(n_seasons)}"}
+            command = [
+                sys.executable, "-m", "scripts.benchmark_api", "--scale", str(n_seasons), "--result", str(result_path),
+                "--requests", str(args.requests), "--trials", str(args.trials), "--routes", *args.routes, "--concurrency", *map(str, args.concurrency),
+            ]
+            subprocess.run(command, env=env, check=True)
+            scales.append(json.loads(result_path.read_text()))
+
+    report = {
+        "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "settings": {"requests": args.requests, "concurrency": args.concurrency, "trials": args.trials},
+        "scales": scales,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\nReport saved to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return
+    regressions = compare(report, json.loads(baseline_path.read_text()), args.tolerance)
+    if regressions:
+        sys.exit(f"{len(regressions)} results regressed against {baseline_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from scripts.load_data import clean_csv, clean_data, peak_memory_mb
+
+COUNTIES = ["Nairobi", "Nakuru", "Nyeri", "Kisumu", "Eldoret", "Kericho", "Machakos", "Kiambu", "Meru", "Mombasa"]
+CROPS = ["Potatoes", "Coffee", "Tea", "Cassava", "Rice", "Tomatoes", "Wheat", "Maize", "Sorghum", "Beans"]
+SEASONS = ["Long Rains", "Short Rains", "Dry Season", "Longrain", "Shortrain", "Dry", "Error"]
+TEXT_CHOICES = {
+    "Crop Variety": ["Local", "Hybrid", "Organic", "Error"],
+    "Soil Type": ["Loamy", "Clay", "Sandy", "Peaty", "Silty"],
+    "Irrigation Method": ["Drip", "Sprinkler", "Flood", "None"],
+    "Fertilizer Used": ["CAN", "DAP", "UREA", "None", "Error"],
+    "Pest Control": ["Organic", "Chemical", "None"],
+    "Weather Impact": ["Mild", "Severe", "None"],
+    "Notes": ["High yield", "Delayed harvest", "Pest outbreak", ""],
+}
+
+def _messy(rng, values, n):
+    # Random case, padding and "County"-style suffixes like the raw survey exports
+    picked = rng.choice(values, n).astype(object)
+    styles = rng.integers(0, 4, n)
+    picked[styles == 1] = [v.lower() for v in picked[styles == 1]]
+    picked[styles == 2] = [f"  {v.upper()} " for v in picked[styles == 2]]
+    missing = rng.random(n) < 0.07
+    picked[missing] = ""
+    return picked
+
+def generate_chunk(rng, n: int) -> pd.DataFrame:
+    planted = pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 365 * 6, n), unit="D")
+    harvest = planted + pd.to_timedelta(rng.integers(60, 240, n), unit="D")
+    yield_kg = rng.lognormal(7.5, 0.8, n).round(2)
+    price = rng.uniform(20, 200, n).round(2)
+    cost = (yield_kg * price / rng.uniform(1.1, 3, n)).round(2)
+    county = _messy(rng, COUNTIES, n)
+    with_suffix = rng.random(n) < 0.2
+    county[with_suffix] = [f"{c} County" if c else c for c in county[with_suffix]]
+    df = pd.DataFrame({
+        "Farmer Name": [f"Farmer {i}" for i in rng.integers(0, n // 4 + 1, n)],
+        "County": county,
+        "Crop Type": _messy(rng, CROPS, n),
+        "Crop Variety": rng.choice(TEXT_CHOICES["Crop Variety"], n),
+        "Season": _messy(rng, SEASONS, n),
+        "Planted Area (Acres)": rng.uniform(0.5, 20, n).round(2).astype(str),
+        "Yield (Kg)": yield_kg.astype(str),
+        "Market Price (KES/Kg)": np.where(rng.random(n) < 0.05, "", price.astype(str)),
+        "Revenue (KES)": np.where(rng.random(n) < 0.05, "", (yield_kg * price).round(2).astype(str)),
+        "Cost of Production (KES)": [f"KES {c:,.2f}" for c in cost],
+        "Profit (KES)": (yield_kg * price - cost).round(2).astype(str),
+        "Planting Date": planted.strftime("%Y-%m-%d"),
+        "Harvest Date": np.where(rng.random(n) < 0.03, "Error", harvest.strftime("%Y-%m-%d")),
+        "Soil Type": rng.choice(TEXT_CHOICES["Soil Type"], n),
+        "Irrigation Method": rng.choice(TEXT_CHOICES["Irrigation Method"], n),
+        "Fertilizer Used": rng.choice(TEXT_CHOICES["Fertilizer Used"], n),
+        "Pest Control": rng.choice(TEXT_CHOICES["Pest Control"], n),
+        "Weather Impact": rng.choice(TEXT_CHOICES["Weather Impact"], n),
+        "Farmer Contact": rng.integers(700_000_000, 800_000_000, n),
+        "Notes": rng.choice(TEXT_CHOICES["Notes"], n),
+    })
+    # About 10% of the rows repeat an earlier row of the same chunk
+    duplicates = rng.random(n) < 0.1
+    duplicates[0] = False
+    source = (np.arange(n) * rng.random(n)).astype(int)
+    df.iloc[np.flatnonzero(duplicates)] = df.iloc[source[duplicates]].to_numpy()
+    return df
+
+def generate_csv(path: str, rows: int, chunk_size: int = 500_000, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        n = min(chunk_size, rows - written)
+        generate_chunk(rng, n).to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += n
+
+def legacy_clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+    # Row-wise implementation clean_data replaced, kept as the baseline
+    df = df_raw.copy()
+    df.columns = [c.strip() for c in df.columns]
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype(str).str.strip()
+
+    for col in ["Planting Date", "Harvest Date"]:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    df["timeline_date"] = df["Harvest Date"].fillna(df["Planting Date"])
+    df["month"] = df["timeline_date"].dt.to_period("M").dt.to_timestamp()
+
+    def norm_title(x: str):
+        x = (x or "").strip()
+        return re.sub(r"\s+", " ", x.title()) if x else np.nan
+    def norm_county(x: str):
+        x = (x or "").strip()
+        x = re.sub(r"(?i)\s*county$", "", x)
+        x = re.sub(r"\s+", " ", x)
+        return x.title() if x else np.nan
+
+    df["Crop Type"] = df["Crop Type"].replace({"nan": np.nan})
+    df["Crop Type"] = df["Crop Type"].apply(lambda x: norm_title(x) if isinstance(x, str) else x)
+    df["County"] = df["County"].apply(lambda x: norm_county(x) if isinstance(x, str) else x)
+    df["Season"] = df["Season"].apply(lambda x: norm_title(x) if isinstance(x, str) else x)
+    season_map = {"Long Rains":"Long Rains","Longrain":"Long Rains","Short Rains":"Short Rains","Shortrain":"Short Rains","Dry":"Dry Season","Dry Season":"Dry Season","Error":"Unknown"}
+    df["Season"] = df["Season"].map(lambda s: season_map.get(s, s))
+
+    num_cols = ["Planted Area (Acres)","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
+    for c in num_cols:
+        if c in df.columns:
+            df[c] = (df[c].astype(str).str.replace(r"[^\d\.\-]", "", regex=True).replace({"": np.nan}).astype(float))
+
+    mask_price_missing = df["Market Price (KES/Kg)"].isna() & df["Revenue (KES)"].notna() & df["Yield (Kg)"].notna() & (df["Yield (Kg)"] != 0)
+    df.loc[mask_price_missing, "Market Price (KES/Kg)"] = df.loc[mask_price_missing, "Revenue (KES)"] / df.loc[mask_price_missing, "Yield (Kg)"]
+    mask_rev_missing = df["Revenue (KES)"].isna() & df["Market Price (KES/Kg)"].notna() & df["Yield (Kg)"].notna()
+    df.loc[mask_rev_missing, "Revenue (KES)"] = df.loc[mask_rev_missing, "Market Price (KES/Kg)"] * df.loc[mask_rev_missing, "Yield (Kg)"]
+    mask_profit_missing = df["Profit (KES)"].isna() & df["Revenue (KES)"].notna() & df["Cost of Production (KES)"].notna()
+    df.loc[mask_profit_missing, "Profit (KES)"] = df.loc[mask_profit_missing, "Revenue (KES)"] - df.loc[mask_profit_missing, "Cost of Production (KES)"]
+    mask_cost_missing = df["Cost of Production (KES)"].isna() & df["Revenue (KES)"].notna() & df["Profit (KES)"].notna()
+    df.loc[mask_cost_missing, "Cost of Production (KES)"] = df.loc[mask_cost_missing, "Revenue (KES)"] - df.loc[mask_cost_missing, "Profit (KES)"]
+
+    key_cols = ["Farmer Name","County","Crop Type","Crop Variety","Season","Planting Date","Harvest Date","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
+    df["_dup_key"] = df[key_cols].astype(str).agg("|".join, axis=1)
+    df = df.drop_duplicates(subset=["_dup_key"], keep="first").copy()
+    df = df.drop(columns=["_dup_key"])
+
+    df["ROI %"] = (df["Profit (KES)"] / df["Cost of Production (KES)"]) * 100.0
+    df["ROI % (clamped)"] = df["ROI %"].clip(lower=-100, upper=500)
+    return df
+
+def run_mode(mode: str, path: str, chunk_size: int):
+    # Each mode reads the raw CSV and writes the cleaned one, as load_data does
+    cleaned_path = f"{path}.{mode}.csv"
+    start = time.perf_counter()
+    if mode == "chunked":
+        _, rows_out = clean_csv(path, cleaned_path, chunk_size)
+    else:
+        if mode == "legacy":
+            # The row-wise code relies on object columns, as read by pandas < 3
+            pd.set_option("future.infer_string", False)
+        df = (legacy_clean_data if mode == "legacy" else clean_data)(pd.read_csv(path))
+        df.to_csv(cleaned_path, index=False)
+        rows_out = len(df)
+    print(f"{mode:<12} {time.perf_counter() - start:8.1f} s  {rows_out:>12,} rows kept  peak memory {peak_memory_mb():8,.0f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_data on a generated raw CSV.")
+    parser.add_argument("rows", nargs="?", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the slow row-wise baseline")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode == "generate":
+        start = time.perf_counter()
+        generate_csv(args.input, args.rows)
+        print(f"Generated {args.rows:,} raw rows ({os.path.getsize(args.input) / 1e6:,.0f} MB) in {time.perf_counter() - start:.1f}s: {args.input}")
+        return
+    if args.mode:
+        run_mode(args.mode, args.input, args.chunk_size)
+        return
+
+    # Every step runs in its own process: Linux keeps the peak RSS across fork and exec,
+    # so the parent has to stay small for the readings to mean anything
+    path = os.path.join(tempfile.mkdtemp(), "raw_seasons.csv")
+    modes = ["generate", "chunked", "vectorized"] + ([] if args.skip_legacy else ["legacy"])
+    for mode in modes:
+        subprocess.run(
+            [sys.executable, "-m", "scripts.benchmark_clean_data", str(args.rows), "--mode", mode, "--input", path, "--chunk-size", str(args.chunk_size)],
+            check=True,
+        )
+
+if __name__ == "__main__":
+    main()
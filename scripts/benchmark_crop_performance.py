@@ -0,0 +1,142 @@
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.models import Crop, Farm, Farmer, Season
+from app.schemas.crop_performance import CropPerformanceSchema
+from app.services.crop_performance import (
+    crop_performance_statement,
+    rebuild_summaries,
+    summary_performance_statement,
+    to_performance_schema,
+)
+
+N_SEASONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+CROPS = ["Maize", "Beans", "Potatoes", "Tea", "Coffee", "Wheat", "Rice", "Sorghum", "Cassava", "Tomatoes"]
+COST_SHARES = {
+    "seed_cost_kes": 0.15,
+    "fertilizer_cost_kes": 0.20,
+    "pesticide_cost_kes": 0.15,
+    "labor_cost_kes": 0.30,
+    "machinery_cost_kes": 0.10,
+    "other_costs_kes": 0.10,
+}
+
+def synthetic_seasons(n: int, n_crops: int, farm_id: int, seed: int = 42) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    yield_kg = rng.lognormal(8, 1, n)
+    price = rng.uniform(20, 120, n)
+    revenue = yield_kg * price
+    cost = revenue / (1 + rng.uniform(0.2, 0.4, n))
+    missing = rng.random(n) < 0.05
+    harvest = datetime(2015, 1, 1) + rng.integers(0, 365 * 10, n) * timedelta(days=1)
+    crop_ids = rng.integers(1, n_crops + 1, n)
+    rows = []
+    for i in range(n):
+        row = {
+            "crop_variety": f"Variety {crop_ids[i]}-{i % 3}",
+            "season": "Long Rains" if i % 2 else "Short Rains",
+            "yield_kg": float(yield_kg[i]),
+            "market_price_kes_per_kg": None if missing[i] else float(price[i]),
+            "revenue_kes": float(revenue[i]),
+            "profit_kes": float(revenue[i] - cost[i]),
+            "harvest_date": harvest[i],
+            "crop_id": int(crop_ids[i]),
+            "farm_id": farm_id,
+        }
+        for column, share in COST_SHARES.items():
+            row[column] = float(cost[i] * share)
+        rows.append(row)
+    return rows
+
+async def legacy_crop_performance(session: AsyncSession) -> List[CropPerformanceSchema]:
+    # Python-side aggregation that /crops/performance used before the GROUP BY query
+    result = await session.exec(select(Season, Crop).join(Crop))
+    crop_data: Dict[str, List[Season]] = {}
+    for season, crop in result.all():
+        if crop.name:
+            crop_data.setdefault(crop.name, []).append(season)
+    metrics = []
+    for crop_name, seasons_list in crop_data.items():
+        valid = [
+            s for s in seasons_list
+            if s.market_price_kes_per_kg is not None and not math.isnan(s.market_price_kes_per_kg)
+            and s.profit_kes is not None and not math.isnan(s.profit_kes)
+            and s.revenue_kes is not None and not math.isnan(s.revenue_kes)
+        ]
+        if not valid:
+            continue
+        metrics.append(to_performance_schema(
+            crop_name,
+            valid[0].crop_variety,
+            sum(s.market_price_kes_per_kg for s in valid) / len(valid),
+            sum(s.profit_kes for s in valid),
+            sum(sum(getattr(s, c) or 0 for c in COST_SHARES) for s in valid),
+            sum(s.revenue_kes for s in valid),
+        ))
+    return metrics
+
+async def sql_crop_performance(session: AsyncSession) -> List[CropPerformanceSchema]:
+    return await _read_performance(session, crop_performance_statement())
+
+async def summary_crop_performance(session: AsyncSession) -> List[CropPerformanceSchema]:
+    return await _read_performance(session, summary_performance_statement())
+
+async def _read_performance(session: AsyncSession, statement) -> List[CropPerformanceSchema]:
+    result = await session.exec(statement)
+    return [
+        to_performance_schema(r.name, r.crop_variety, r.avg_market_price, r.total_profit, r.total_cost, r.investment_volume)
+        for r in result.all()
+    ]
+
+async def seed(engine, n: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        farmer = Farmer(name="Bench", email="bench@example.com", hashed_password="x")
+        session.add(farmer)
+        await session.commit()
+        farm = Farm(name="Bench Farm", owner_id=farmer.id)
+        session.add_all([farm] + [Crop(name=name) for name in CROPS])
+        await session.commit()
+        rows = synthetic_seasons(n, len(CROPS), farm.id)
+        for start in range(0, n, 50_000):
+            await session.execute(insert(Season), rows[start:start + 50_000])
+        await session.commit()
+        await rebuild_summaries(session)
+
+async def main():
+    # --- 1. Seed a throwaway SQLite database ---
+    path = os.path.join(tempfile.mkdtemp(), "crop_performance.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    print(f"Seeding {N_SEASONS:,} seasons into {path}...")
+    await seed(engine, N_SEASONS)
+
+    # --- 2. Time both implementations and check they agree ---
+    results = {}
+    implementations = [
+        ("python aggregation", legacy_crop_performance),
+        ("SQL GROUP BY", sql_crop_performance),
+        ("summary table", summary_crop_performance),
+    ]
+    for label, fn in implementations:
+        async with AsyncSession(engine) as session:
+            start = time.perf_counter()
+            results[label] = await fn(session)
+            print(f"{label:<20} {time.perf_counter() - start:8.3f} s  ({len(results[label])} crops)")
+    legacy, *others = [[m.model_dump() for m in r] for r in results.values()]
+    assert all(other == legacy for other in others), "Aggregations disagree"
+    print("All implementations return the same crop performance.")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
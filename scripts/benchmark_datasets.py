@@ -0,0 +1,64 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import scripts.datasets as datasets
+
+N_ROWS = 1_000_000
+REPEATS = 3
+
+def scale(df: pd.DataFrame, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    # Resample the rows and jitter the numeric columns so the copies do not compress away
+    rng = np.random.default_rng(seed)
+    scaled = df.iloc[rng.integers(0, len(df), n_rows)].reset_index(drop=True)
+    for column in scaled.columns:
+        if pd.api.types.is_float_dtype(scaled[column]):
+            scaled[column] = scaled[column] * rng.uniform(0.9, 1.1, n_rows)
+    return scaled
+
+def best_of(fn, repeats: int = REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def compare(name: str, df: pd.DataFrame, data_dir: Path):
+    dtypes = datasets.DATASETS.get(name, {})
+    csv = data_dir / f"{name}.csv"
+    df.to_csv(csv, index=False)
+    size = csv.stat().st_size
+    rows = [
+        ("csv", size, best_of(lambda: pd.read_csv(csv))),
+        ("csv + dtypes", size, best_of(lambda: datasets.apply_dtypes(pd.read_csv(csv), dtypes))),
+    ]
+    csv.unlink()
+    for fmt in datasets.FORMATS:
+        # Only one file of the dataset exists at a time, so read_dataset picks it up
+        path = datasets.write_dataset(df, name, fmt, csv=False)
+        rows.append((fmt, path.stat().st_size, best_of(lambda: datasets.read_dataset(name))))
+        path.unlink()
+
+    print(f"\n{name}: {len(df):,} rows x {df.shape[1]} columns")
+    print(f"  {'format':<14}{'size':>12}{'load':>12}{'vs csv':>10}")
+    for fmt, size, seconds in rows:
+        print(f"  {fmt:<14}{size / 1e6:>9.1f} MB{seconds * 1000:>9.0f} ms{rows[0][2] / seconds:>9.1f}x")
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else N_ROWS
+    # --- 1. Build realistic stages from the repo's data, scaled up ---
+    datasets.DATA_DIR = Path("data")
+    merged = datasets.read_dataset("mshamba_merged_v2")
+    features = datasets.read_dataset("X_train_merged_v2")
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets.DATA_DIR = Path(tmp)
+        print(f"Comparing CSV, Parquet and Arrow IPC load times on {n_rows:,} rows (best of {REPEATS}), files in {tmp}")
+        # --- 2. Text-heavy season table and the one-hot training matrix ---
+        compare("mshamba_merged_v2", scale(merged, n_rows), datasets.DATA_DIR)
+        compare("X_train_merged_v2", scale(features, n_rows), datasets.DATA_DIR)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from app.schemas.yield_prediction import YieldPredictionInput
+from app.services.featurizer import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+from app.services.model_registry import ARTIFACT_PREFIX, ARTIFACT_SUFFIX, ModelRegistry, trees_path, version_from_path
+from scripts.benchmark_predict_yield import measure
+from scripts.datasets import read_dataset
+from scripts.export_tree_ensembles import find_test_set, load_test_features
+
+# --- Configuration ---
+N_SINGLE = 2000
+BATCH_SIZES = [1, 16, 64, 256, 1024]
+# Each batch size is repeated until it has run for at least this long
+MIN_BATCH_SECONDS = 0.5
+N_INPUTS = 4096
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 1e6
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6
+
+def sample_inputs(n: int, seed: int = 42) -> List[YieldPredictionInput]:
+    """
+    Request payloads drawn from the cleaned seasons, so categories and magnitudes
+    follow the data the API is called with.
+    """
+    columns = {**NUMERIC_FEATURES, **CATEGORICAL_FEATURES}
+    seasons = read_dataset("mshamba_clean_seasons", list(columns.values())).dropna()
+    rows = seasons.sample(n, replace=True, random_state=seed)
+    return [
+        YieldPredictionInput(**{field: row[column] if field in NUMERIC_FEATURES else str(row[column]) for field, column in columns.items()})
+        for _, row in rows.iterrows()
+    ]
+
+def batch_throughput(predict, inputs: List[YieldPredictionInput], batch_size: int) -> Dict:
+    batches = [inputs[i:i + batch_size] for i in range(0, len(inputs) - batch_size + 1, batch_size)]
+    predict(batches[0])
+    rows = calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_BATCH_SECONDS:
+        batch = batches[calls % len(batches)]
+        predict(batch)
+        rows += len(batch)
+        calls += 1
+    elapsed = time.perf_counter() - start
+    return {"batch_size": batch_size, "rows_per_second": rows / elapsed, "ms_per_batch": elapsed / calls * 1000}
+
+def accuracy(entry) -> Dict:
+    X = load_test_features(entry.model, entry.version)
+    name = find_test_set(entry.version)
+    y = read_dataset(name.replace("X_", "y_", 1)).to_numpy(dtype=np.float64).ravel()
+    y_pred = entry.model.predict(X)
+    return {
+        "test_set": name,
+        "rows": len(y),
+        "mae": float(mean_absolute_error(y, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y, y_pred))),
+        "r2": float(r2_score(y, y_pred)),
+    }
+
+def benchmark_artifact(path: Path, use_tree_evaluator: bool, tree_evaluator_max_rows: int) -> Dict:
+    """
+    Loads one artifact the way the API does and measures it. Runs in a fresh process
+    so load time and memory are not shared with other models.
+    """
+    # --- 1. Load through the registry ---
+    inputs = sample_inputs(N_INPUTS)
+    version = version_from_path(path)
+    registry = ModelRegistry(str(path.parent), version, capacity=1, use_tree_evaluator=use_tree_evaluator, tree_evaluator_max_rows=tree_evaluator_max_rows)
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    entry = registry.get(version)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = current_rss_mb()
+
+    # --- 2. Single-row latency of the serving path ---
+    for x in inputs[:50]:
+        entry.predict([x])
+    row = iter(inputs * (N_SINGLE // len(inputs) + 1))
+    single = measure(lambda: entry.predict([next(row)]), N_SINGLE)
+
+    # --- 3. Batch throughput ---
+    batches = [batch_throughput(entry.predict, inputs, size) for size in BATCH_SIZES if size <= len(inputs)]
+
+    exported = trees_path(path)
+    return {
+        "version": version,
+        "artifact": path.name,
+        "model_type": type(entry.model).__name__,
+        "tree_evaluator": entry.trees is not None,
+        "n_features": entry.featurizer.n_features,
+        "disk_bytes": path.stat().st_size,
+        "trees_disk_bytes": exported.stat().st_size if exported.exists() else None,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_loaded,
+        "model_rss_mb": rss_loaded - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "single_row_ms": {
+            "p50": float(np.percentile(single, 50)),
+            "p99": float(np.percentile(single, 99)),
+            "mean": float(single.mean()),
+        },
+        "batches": batches,
+        "accuracy": accuracy(entry),
+    }
+
+def print_summary(results: List[Dict]):
+    print(f"\n{'version':<10}{'type':<24}{'disk':>10}{'load':>9}{'rss':>10}{'p50':>9}{'p99':>9}{'rows/s@' + str(max(BATCH_SIZES)):>14}{'MAE':>10}{'R2':>8}")
+    for r in results:
+        largest = r["batches"][-1]["rows_per_second"] if r["batches"] else float("nan")
+        print(
+            f"{r['version']:<10}{r['model_type']:<24}{r['disk_bytes'] / 1e6:>7.1f} MB{r['load_seconds']:>8.2f}s{r['model_rss_mb']:>7.0f} MB"
+            f"{r['single_row_ms']['p50']:>6.2f} ms{r['single_row_ms']['p99']:>6.2f} ms{largest:>14,.0f}"
+            f"{r['accuracy']['mae']:>10.1f}{r['accuracy']['r2']:>8.3f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serving cost and accuracy of every registered yield model.")
+    parser.add_argument("model_dir", nargs="?", default=".")
+    parser.add_argument("--output", default="model_benchmark.json", help="where the JSON report is written")
+    parser.add_argument("--no-tree-evaluator", action="store_true", help="score through the models' own predict")
+    parser.add_argument("--tree-evaluator-max-rows", type=int, default=64)
+    parser.add_argument("--artifact", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.artifact:
+        result = benchmark_artifact(Path(args.artifact), not args.no_tree_evaluator, args.tree_evaluator_max_rows)
+        Path(args.result).write_text(json.dumps(result))
+        return
+
+    # Every artifact is measured in its own process: Linux keeps the peak RSS across
+    # fork and exec, and models loaded earlier would inflate the later readings
+    results = []
+    paths = sorted(Path(args.model_dir).glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in paths:
+            print(f"Benchmarking {path.name}...")
+            result_path = Path(tmp) / f"{path.name}.json"
+            command = [sys.executable, "-m", "scripts.benchmark_models", "--artifact", str(path), "--result", str(result_path),
+                       "--tree-evaluator-max-rows", str(args.tree_evaluator_max_rows)]
+            if args.no_tree_evaluator:
+                command.append("--no-tree-evaluator")
+            subprocess.run(command, check=True)
+            results.append(json.loads(result_path.read_text()))
+
+    report = {
+        "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "settings": {
+            "single_row_requests": N_SINGLE,
+            "batch_sizes": BATCH_SIZES,
+            "tree_evaluator": not args.no_tree_evaluator,
+            "tree_evaluator_max_rows": args.tree_evaluator_max_rows,
+        },
+        "models": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print_summary(results)
+    print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
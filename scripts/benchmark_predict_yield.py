@@ -0,0 +1,69 @@
+import re
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from app.schemas.yield_prediction import YieldPredictionInput
+from app.services.featurizer import YieldFeaturizer
+
+N_REQUESTS = 2000
+
+SAMPLE_INPUT = YieldPredictionInput(
+    Planted_Area_Acres=2.5,
+    Market_Price_KES_per_Kg=45.0,
+    Crop_Type="Maize",
+    County="Nakuru",
+    Season="Long Rains",
+    Soil_Type="Loam",
+    Irrigation_Method="Sprinkler",
+    Fertilizer_Used="DAP",
+    Pest_Control="Organic",
+    Weather_Impact="Mild",
+)
+
+def legacy_predict(model, input_data: YieldPredictionInput) -> float:
+    # Per-request pipeline that predict_yield used before the precompiled featurizer
+    input_df = pd.DataFrame([input_data.model_dump()])
+    categorical_cols = ['Crop_Type', 'County', 'Season', 'Soil_Type', 'Irrigation_Method', 'Fertilizer_Used', 'Pest_Control', 'Weather_Impact']
+    input_encoded = pd.get_dummies(input_df, columns=categorical_cols, drop_first=True)
+    input_encoded = input_encoded.select_dtypes(exclude=['object'])
+    training_columns = pd.read_csv('data/X_train_merged_v2.csv').columns
+    input_reindexed = input_encoded.reindex(columns=training_columns, fill_value=0)
+    input_reindexed.columns = [re.sub(r'[^A-Za-z0-9_]+', '', col) for col in input_reindexed.columns]
+    return model.predict(input_reindexed)[0]
+
+def featurized_predict(model, featurizer: YieldFeaturizer, input_data: YieldPredictionInput) -> float:
+    return model.predict(featurizer.transform_many([input_data]))[0]
+
+def measure(fn, n: int) -> np.ndarray:
+    timings = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return timings * 1000
+
+def report(label: str, timings_ms: np.ndarray):
+    p50, p99 = np.percentile(timings_ms, [50, 99])
+    print(f"{label:<24} p50={p50:8.3f} ms  p99={p99:8.3f} ms")
+
+if __name__ == "__main__":
+    # --- 1. Load the model and build the featurizer ---
+    model = joblib.load('yield_predictor_lgbm.joblib')
+    featurizer = YieldFeaturizer.from_model(model)
+
+    # --- 2. Warm up both paths ---
+    for _ in range(20):
+        legacy_predict(model, SAMPLE_INPUT)
+        featurized_predict(model, featurizer, SAMPLE_INPUT)
+
+    # --- 3. Measure single-prediction latency ---
+    print(f"Single-row predict_yield latency over {N_REQUESTS} requests:")
+    legacy = measure(lambda: legacy_predict(model, SAMPLE_INPUT), N_REQUESTS)
+    report("before (csv+get_dummies)", legacy)
+    featurized = measure(lambda: featurized_predict(model, featurizer, SAMPLE_INPUT), N_REQUESTS)
+    report("after (featurizer)", featurized)
+    encode_only = measure(lambda: featurizer.transform_many([SAMPLE_INPUT]), N_REQUESTS)
+    report("encode only", encode_only)
+
+    print(f"Speedup at p50: {np.percentile(legacy, 50) / np.percentile(featurized, 50):.1f}x")
@@ -0,0 +1,40 @@
+import sys
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+from app.services.model_registry import ARTIFACT_PREFIX, ARTIFACT_SUFFIX, version_from_path
+from app.services.tree_ensemble import TreeEnsemble
+from scripts.benchmark_predict_yield import measure, report
+from scripts.export_tree_ensembles import check_parity, load_test_features
+
+MODEL_DIR = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+N_SINGLE = 200
+BATCH_SIZE = 1000
+
+if __name__ == "__main__":
+    for path in sorted(MODEL_DIR.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}")):
+        # --- 1. Load the model and flatten it ---
+        model = joblib.load(path)
+        trees = TreeEnsemble.from_model(model)
+        X = load_test_features(model, version_from_path(path))
+        check_parity(model, trees, X)
+        print(f"\n{path.name} ({type(model).__name__}, {trees.n_trees} trees)")
+
+        # --- 2. Single-row latency ---
+        row_frame = X.iloc[:1]
+        row = row_frame.to_numpy(dtype=np.float64)
+        model.predict(row_frame)
+        trees.predict(row)
+        report("model.predict", measure(lambda: model.predict(row_frame), N_SINGLE))
+        report("TreeEnsemble.predict", measure(lambda: trees.predict(row), N_SINGLE))
+
+        # --- 3. Batch throughput ---
+        batch_frame = X.sample(BATCH_SIZE, replace=True, random_state=42)
+        batch = batch_frame.to_numpy(dtype=np.float64)
+        for label, fn in [("model.predict", lambda: model.predict(batch_frame)), ("TreeEnsemble.predict", lambda: trees.predict(batch))]:
+            start = time.perf_counter()
+            for _ in range(5):
+                fn()
+            elapsed = (time.perf_counter() - start) / 5
+            print(f"{label:<24} batch of {BATCH_SIZE}: {BATCH_SIZE / elapsed:,.0f} rows/s")
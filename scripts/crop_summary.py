@@ -0,0 +1,33 @@
+import asyncio
+import sys
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import async_engine, init_db
+from app.services.crop_performance import check_summaries, rebuild_summaries
+
+USAGE = "usage: python -m scripts.crop_summary [rebuild|check]"
+
+async def rebuild():
+    await init_db()
+    async with AsyncSession(async_engine) as session:
+        crops = await rebuild_summaries(session)
+    print(f"Rebuilt crop performance summaries for {crops} crops.")
+
+async def check() -> int:
+    async with AsyncSession(async_engine) as session:
+        mismatches = await check_summaries(session)
+    if not mismatches:
+        print("Crop performance summaries match a full recompute.")
+        return 0
+    for m in mismatches:
+        print(f"crop {m['crop_id']}: {m['column']} expected {m['expected']} but summary has {m['actual']}")
+    print(f"{len(mismatches)} mismatches found; run `python -m scripts.crop_summary rebuild` to repair.")
+    return 1
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "rebuild":
+        asyncio.run(rebuild())
+    elif command == "check":
+        sys.exit(asyncio.run(check()))
+    else:
+        sys.exit(USAGE)
@@ -0,0 +1,209 @@
+import argparse
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# --- Configuration ---
+DATA_DIR = Path(os.getenv("DATA_DIR", "data"))
+# Also write a CSV copy of every stage, for tools that only read CSV
+EXPORT_CSV = os.getenv("EXPORT_CSV", "0") == "1"
+
+SEASON_CATEGORIES = ["County", "Crop Type", "Crop Variety", "Season", "Soil Type", "Irrigation Method", "Fertilizer Used", "Pest Control", "Weather Impact"]
+SEASON_NUMBERS = ["Planted Area (Acres)", "Yield (Kg)", "Market Price (KES/Kg)", "Revenue (KES)", "Cost of Production (KES)", "Profit (KES)", "ROI %", "ROI % (clamped)"]
+SEASON_DATES = ["Planting Date", "Harvest Date", "timeline_date", "month"]
+SEASON_DTYPES = {
+    **{c: "category" for c in SEASON_CATEGORIES},
+    **{c: "float64" for c in SEASON_NUMBERS},
+    **{c: "datetime64[ns]" for c in SEASON_DATES},
+    "Farmer Name": "str",
+    "Farmer Contact": "str",
+    "Notes": "str",
+}
+
+# Explicit dtypes of each stage; columns not listed keep the dtype they were written
+# with (the one-hot feature matrices are already bool and float64)
+DATASETS: Dict[str, Dict[str, str]] = {
+    "mshamba_clean_seasons": SEASON_DTYPES,
+    "mshamba_merged_v2": SEASON_DTYPES,
+    "fao_kenya_crop_data": {
+        **{c: "category" for c in ["Domain Code", "Domain", "Area", "Element", "Item", "Unit"]},
+        **{c: "int64" for c in ["Area Code", "Element Code", "Item Code", "Year Code", "Year"]},
+        "Value": "float64",
+    },
+    "X_train_merged_v2": {},
+    "X_test_merged_v2": {},
+    "y_train_merged_v2": {"Yield (Kg)": "float64"},
+    "y_test_merged_v2": {"Yield (Kg)": "float64"},
+    # Tables written by scripts.generate_synthetic, with the database column names
+    "synthetic_farmers": {"name": "str", "email": "str", "hashed_password": "str"},
+    "synthetic_farms": {"name": "str", "county": "str", "location_details": "str"},
+    "synthetic_crops": {"name": "str"},
+    "synthetic_seasons": {
+        **{c: "str" for c in ["crop_variety", "season", "soil_type", "irrigation_method", "fertilizer_used", "pest_control", "weather_impact", "notes"]},
+        "planting_date": "datetime64[ns]",
+        "harvest_date": "datetime64[ns]",
+    },
+}
+
+# Arrow IPC files are written uncompressed so they can be memory-mapped and read
+# without decoding; Parquet is the compact choice for text-heavy tables
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+DEFAULT_FORMAT = {
+    "mshamba_clean_seasons": "parquet",
+    "mshamba_merged_v2": "parquet",
+    "fao_kenya_crop_data": "parquet",
+    "synthetic_farmers": "parquet",
+    "synthetic_farms": "parquet",
+    "synthetic_crops": "parquet",
+    "synthetic_seasons": "parquet",
+}
+
+def dataset_path(name: str, fmt: Optional[str] = None) -> Path:
+    fmt = fmt or DEFAULT_FORMAT.get(name, "arrow")
+    return DATA_DIR / f"{name}{FORMATS[fmt]}"
+
+def csv_path(name: str) -> Path:
+    return DATA_DIR / f"{name}.csv"
+
+def apply_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Casts the columns of `df` listed in `dtypes`; values that do not parse as numbers
+    or dates become missing.
+    """
+    df = df.copy()
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        if dtype.startswith("datetime64"):
+            df[column] = pd.to_datetime(df[column], errors="coerce", format="mixed").astype(dtype)
+        elif dtype.startswith(("float", "int")):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+        elif dtype == "str":
+            df[column] = df[column].astype("str").where(df[column].notna())
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+def write_dataset(df: pd.DataFrame, name: str, fmt: Optional[str] = None, csv: bool = EXPORT_CSV) -> Path:
+    """
+    Writes one pipeline stage with its explicit dtypes as Arrow IPC or Parquet, plus a
+    CSV copy when `csv` is set. Returns the columnar file's path.
+    """
+    df = apply_dtypes(df, DATASETS.get(name, {}))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = dataset_path(name, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == FORMATS["arrow"]:
+        with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, path, compression="zstd")
+    if csv:
+        df.to_csv(csv_path(name), index=False)
+    return path
+
+class DatasetWriter:
+    """
+    Appends DataFrames with the same columns to one stage's columnar file, chunk by
+    chunk, for stages too large to build in memory at once.
+    """
+
+    def __init__(self, name: str, fmt: Optional[str] = None):
+        self.name = name
+        self.path = dataset_path(name, fmt)
+        self.rows = 0
+        self._writer = None
+        self._sink = None
+
+    def write(self, df: pd.DataFrame):
+        table = pa.Table.from_pandas(apply_dtypes(df, DATASETS.get(self.name, {})), preserve_index=False)
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.suffix == FORMATS["arrow"]:
+                self._sink = pa.OSFile(str(self.path), "wb")
+                self._writer = ipc.new_file(self._sink, table.schema)
+            else:
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_table(name: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Memory-maps a stage's columnar file. Arrow IPC columns are used in place; Parquet
+    pages are decoded from the mapping without an extra read buffer.
+    """
+    for fmt in (DEFAULT_FORMAT.get(name, "arrow"), *FORMATS):
+        path = dataset_path(name, fmt)
+        if not path.exists():
+            continue
+        if fmt == "arrow":
+            table = ipc.open_file(pa.memory_map(str(path))).read_all()
+            return table.select(columns) if columns is not None else table
+        return pq.read_table(path, columns=columns, memory_map=True)
+    raise FileNotFoundError(f"No columnar file for dataset {name} in {DATA_DIR}")
+
+def read_dataset(name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads a pipeline stage back as a DataFrame with its stored dtypes. Falls back to
+    the stage's CSV (cast to the explicit dtypes) when it has not been converted yet.
+    """
+    try:
+        table = read_table(name, columns)
+    except FileNotFoundError:
+        if not csv_path(name).exists():
+            raise
+        return apply_dtypes(pd.read_csv(csv_path(name), usecols=columns), DATASETS.get(name, {}))
+    # split_blocks avoids consolidating columns into 2D blocks, so numeric columns
+    # without nulls are used straight from the mapping
+    return table.to_pandas(split_blocks=True)
+
+def dataset_columns(name: str) -> List[str]:
+    """
+    Column names of a stage, read from the file footer only.
+    """
+    for fmt in (DEFAULT_FORMAT.get(name, "arrow"), *FORMATS):
+        path = dataset_path(name, fmt)
+        if path.exists():
+            if fmt == "arrow":
+                return ipc.open_file(pa.memory_map(str(path))).schema.names
+            return pq.read_schema(path).names
+    return list(pd.read_csv(csv_path(name), nrows=0).columns)
+
+def convert(names: List[str], fmt: Optional[str] = None):
+    # --- Convert existing CSV stages to the columnar format ---
+    for name in names:
+        path = write_dataset(pd.read_csv(csv_path(name)), name, fmt, csv=False)
+        print(f"{csv_path(name)} ({csv_path(name).stat().st_size / 1e6:.2f} MB) -> {path} ({path.stat().st_size / 1e6:.2f} MB)")
+
+def export(names: List[str]):
+    # --- Export columnar stages back to CSV ---
+    for name in names:
+        read_dataset(name).to_csv(csv_path(name), index=False)
+        print(f"Exported {name} to {csv_path(name)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert pipeline datasets between CSV and Parquet/Arrow IPC.")
+    parser.add_argument("command", choices=["convert", "export"])
+    parser.add_argument("names", nargs="*", help="datasets to process (default: every known dataset with a source file)")
+    parser.add_argument("--format", choices=list(FORMATS), help="columnar format to write (default: per dataset)")
+    args = parser.parse_args()
+    if args.command == "convert":
+        convert(args.names or [name for name in DATASETS if csv_path(name).exists()], args.format)
+    else:
+        export(args.names or [name for name in DATASETS if any(dataset_path(name, fmt).exists() for fmt in FORMATS)])
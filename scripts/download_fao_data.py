@@ -1,5 +1,6 @@
 import faostat
 import pandas as pd
+from scripts.datasets import write_dataset
 
 # --- 1. Install the faostat library ---
 # This is commented out because it should be run from the command line
@@ -23,7 +24,7 @@ params = {
 
 data_df = faostat.get_data_df('QCL', pars=params)
 
-# --- 5. Save the data to a CSV file ---
-data_df.to_csv('data/fao_kenya_crop_data.csv', index=False)
+# --- 5. Save the data ---
+path = write_dataset(data_df, 'fao_kenya_crop_data')
 
-print("FAOSTAT data for Kenya has been downloaded and saved to data/fao_kenya_crop_data.csv")
+print(f"FAOSTAT data for Kenya has been downloaded and saved to {path}")
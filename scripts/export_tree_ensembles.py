@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+from app.services.featurizer import clean_feature_name, model_feature_names
+from app.services.model_registry import ARTIFACT_PREFIX, ARTIFACT_SUFFIX, trees_path, version_from_path
+from app.services.tree_ensemble import TreeEnsemble
+from scripts.datasets import dataset_columns, read_dataset
+
+# Held-out feature set of each model version, from the split its training script used
+TEST_SETS = {
+    "base": "X_test",
+    "tuned": "X_test",
+    "merged": "X_test_merged",
+    "lgbm": "X_test_merged_v2",
+    "tuned_v2": "X_test_merged_v2",
+}
+
+def find_test_set(version: str) -> str:
+    """
+    Returns the name of the held-out feature set of a model version.
+    """
+    if version not in TEST_SETS:
+        raise ValueError(f"No test set is registered for model version '{version}'; add it to TEST_SETS")
+    return TEST_SETS[version]
+
+def load_test_features(model, version: str) -> pd.DataFrame:
+    """
+    Returns the held-out feature matrix of a model version, with the model's training column names.
+    """
+    name = find_test_set(version)
+    expected = [clean_feature_name(c) for c in model_feature_names(model)]
+    if [clean_feature_name(c) for c in dataset_columns(name)] != expected:
+        raise ValueError(f"The columns of {name} do not match the training columns of model version '{version}'")
+    X = read_dataset(name)
+    X.columns = model_feature_names(model)
+    return X
+
+def check_parity(model, trees: TreeEnsemble, X: pd.DataFrame) -> float:
+    expected = model.predict(X)
+    actual = trees.predict(X.to_numpy(dtype=np.float64))
+    if not np.allclose(expected, actual, rtol=1e-9, atol=1e-6):
+        raise AssertionError(f"Flattened ensemble diverges from the model (max abs diff {np.abs(expected - actual).max()})")
+    return float(np.abs(expected - actual).max())
+
+if __name__ == "__main__":
+    MODEL_DIR = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+
+    # --- 1. Flatten every registered artifact, verify parity, then save next to it ---
+    for path in sorted(MODEL_DIR.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}")):
+        model = joblib.load(path)
+        trees = TreeEnsemble.from_model(model)
+        max_diff = check_parity(model, trees, load_test_features(model, version_from_path(path)))
+        trees.save(trees_path(path))
+        print(
+            f"{path.name}: {trees.n_trees} trees, {trees.n_nodes} nodes, depth {trees.max_depth}, "
+            f"{trees.nbytes / 1024:.0f} KiB, max |diff| {max_diff:.2e} -> {trees_path(path).name}"
+        )
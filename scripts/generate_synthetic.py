@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from scripts.datasets import DatasetWriter, read_dataset
+
+# --- Configuration ---
+# Placeholders the cleaner leaves for unreadable values; they are not fitted
+INVALID_VALUES = {"Error", "Nan", "nan", "Unknown"}
+# Season fields every generated season has, and fields that may be missing (no
+# irrigation, no fertilizer...) as often as they are in the real data
+REQUIRED_CATEGORIES = {"crop_variety": "Crop Variety", "season": "Season", "soil_type": "Soil Type"}
+OPTIONAL_CATEGORIES = {
+    "irrigation_method": "Irrigation Method",
+    "fertilizer_used": "Fertilizer Used",
+    "pest_control": "Pest Control",
+    "weather_impact": "Weather Impact",
+    "notes": "Notes",
+}
+# Numbers drawn jointly through a Gaussian copula; yield and price use per-crop marginals
+COPULA_COLUMNS = ["Planted Area (Acres)", "Yield (Kg)", "Market Price (KES/Kg)"]
+PER_CROP_COLUMNS = ["Yield (Kg)", "Market Price (KES/Kg)"]
+MIN_CROP_ROWS = 20
+N_QUANTILES = 101
+# Pseudo-count spreading each conditional table towards its marginal
+SMOOTHING = 1.0
+# Costs follow load_data: a 20-40% target ROI split over the detailed cost columns
+COST_SHARES = {
+    "seed_cost_kes": 0.15,
+    "fertilizer_cost_kes": 0.20,
+    "pesticide_cost_kes": 0.15,
+    "labor_cost_kes": 0.30,
+    "machinery_cost_kes": 0.10,
+    "other_costs_kes": 0.10,
+}
+COST_SHARE_CONCENTRATION = 200.0
+FARMS_PER_FARMER = 1.3
+CHUNK_SIZE = 200_000
+
+def _valid(values: pd.Series) -> pd.Series:
+    values = values.astype("str").where(values.notna())
+    return values.where(~values.isin(INVALID_VALUES))
+
+def _frequencies(values: pd.Series, keep_missing: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    counts = values.value_counts(dropna=not keep_missing, sort=False).sort_index(na_position="last")
+    labels = np.array([None if pd.isna(v) else v for v in counts.index], dtype=object)
+    return labels, counts.to_numpy(dtype=np.float64) / counts.sum()
+
+def _conditional(given: pd.Series, values: pd.Series, given_labels: np.ndarray, labels: np.ndarray, marginal: np.ndarray) -> np.ndarray:
+    # Rows: P(value | given), counts smoothed towards the marginal
+    counts = pd.crosstab(given, values).reindex(index=given_labels, columns=labels, fill_value=0).to_numpy(dtype=np.float64, copy=True)
+    counts += SMOOTHING * len(labels) * marginal
+    return counts / counts.sum(axis=1, keepdims=True)
+
+def _normal_scores(values: pd.Series, groups: Optional[pd.Series] = None) -> np.ndarray:
+    ranks = values.rank(method="average") if groups is None else values.groupby(groups).rank(method="average")
+    sizes = values.notna().sum() if groups is None else values.groupby(groups).transform("count")
+    return ndtri((ranks / (sizes + 1)).to_numpy(dtype=np.float64))
+
+def _draw(rng: np.random.Generator, cumulative: np.ndarray, rows: Optional[np.ndarray] = None, n: Optional[int] = None) -> np.ndarray:
+    """
+    Inverse-CDF sampling of category indices, from one distribution or from the row of
+    a conditional table picked for every draw.
+    """
+    if rows is None:
+        return np.minimum(np.searchsorted(cumulative, rng.random(n), side="right"), len(cumulative) - 1)
+    u = rng.random(len(rows))
+    return np.minimum((u[:, None] >= cumulative[rows]).sum(axis=1), cumulative.shape[1] - 1)
+
+class SyntheticProfile:
+    """
+    Marginal distributions and dependencies of the cleaned seasons, fitted once and
+    sampled from in vectorized chunks:
+
+    - counties, crops given the county, and the other season fields;
+    - planting month given the season, planting years and growing durations;
+    - planted area, yield and price through a Gaussian copula, with per-crop quantiles
+      for yield and price.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        county = _valid(df["County"])
+        crop = _valid(df["Crop Type"])
+        self.counties, self.county_p = _frequencies(county)
+        self.crops, crop_p = _frequencies(crop)
+        self.crop_given_county = np.cumsum(_conditional(county, crop, self.counties, self.crops, crop_p), axis=1)
+
+        self.categories: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for field, column in REQUIRED_CATEGORIES.items():
+            labels, p = _frequencies(_valid(df[column]))
+            self.categories[field] = (labels, np.cumsum(p))
+        for field, column in OPTIONAL_CATEGORIES.items():
+            values = _valid(df[column])
+            # Unreadable values are dropped; genuinely empty ones stay missing
+            labels, p = _frequencies(values[df[column].isna() | values.notna()], keep_missing=True)
+            self.categories[field] = (labels, np.cumsum(p))
+
+        # --- Dates ---
+        planting = pd.to_datetime(df["Planting Date"], errors="coerce")
+        harvest = pd.to_datetime(df["Harvest Date"], errors="coerce")
+        season = _valid(df["Season"])
+        month = planting.dt.month.astype("Int64")
+        months = np.arange(1, 13)
+        month_p = np.bincount(month.dropna().to_numpy(dtype=np.int64), minlength=13)[1:] / month.notna().sum()
+        self.month_given_season = np.cumsum(_conditional(season, month, self.categories["season"][0], months, month_p), axis=1)
+        years, year_p = _frequencies(planting.dt.year.dropna().astype(int))
+        self.years = years.astype(np.int64)
+        self.year_cumulative = np.cumsum(year_p)
+        durations = (harvest - planting).dt.days
+        # Harvests recorded before their planting are data entry errors
+        self.duration_quantiles = np.quantile(durations[durations > 0], np.linspace(0, 1, N_QUANTILES))
+
+        # --- Numbers ---
+        numbers = df[COPULA_COLUMNS].apply(pd.to_numeric, errors="coerce")
+        complete = numbers.notna().all(axis=1) & crop.notna()
+        numbers, crop_of_row = numbers[complete], crop[complete]
+        levels = np.linspace(0, 1, N_QUANTILES)
+        self.quantiles: Dict[str, Dict[Optional[str], np.ndarray]] = {}
+        scores = []
+        for column in COPULA_COLUMNS:
+            self.quantiles[column] = {None: np.quantile(numbers[column], levels)}
+            if column in PER_CROP_COLUMNS:
+                for name, values in numbers[column].groupby(crop_of_row):
+                    if len(values) >= MIN_CROP_ROWS:
+                        self.quantiles[column][name] = np.quantile(values, levels)
+                scores.append(_normal_scores(numbers[column], crop_of_row))
+            else:
+                scores.append(_normal_scores(numbers[column]))
+        self.correlation = np.corrcoef(np.vstack(scores))
+        self.cholesky = np.linalg.cholesky(self.correlation + 1e-9 * np.eye(len(COPULA_COLUMNS)))
+
+    def with_years(self, first: int, last: int) -> "SyntheticProfile":
+        # Spreads planting dates evenly over [first, last] instead of the fitted years
+        self.years = np.arange(first, last + 1)
+        self.year_cumulative = np.cumsum(np.full(len(self.years), 1 / len(self.years)))
+        return self
+
+    def _numbers(self, rng: np.random.Generator, crop_index: np.ndarray) -> Dict[str, np.ndarray]:
+        z = rng.standard_normal((len(crop_index), len(COPULA_COLUMNS))) @ self.cholesky.T
+        u = ndtr(z)
+        levels = np.linspace(0, 1, N_QUANTILES)
+        out = {}
+        for i, column in enumerate(COPULA_COLUMNS):
+            fitted = self.quantiles[column]
+            values = np.interp(u[:, i], levels, fitted[None])
+            for c, name in enumerate(self.crops):
+                if name in fitted:
+                    rows = crop_index == c
+                    values[rows] = np.interp(u[rows, i], levels, fitted[name])
+            out[column] = values
+        return out
+
+    def farmers(self, n: int, first_id: int = 1) -> pd.DataFrame:
+        ids = np.arange(first_id, first_id + n)
+        return pd.DataFrame({
+            "id": ids,
+            "name": [f"Farmer {i}" for i in ids],
+            "email": [f"farmer{i}@example.com" for i in ids],
+            "hashed_password": "synthetic",
+        })
+
+    def farms(self, rng: np.random.Generator, farmer_ids: np.ndarray, first_id: int = 1) -> pd.DataFrame:
+        # Every farmer has at least one farm, some have a few
+        per_farmer = 1 + rng.poisson(FARMS_PER_FARMER - 1, len(farmer_ids))
+        owners = np.repeat(farmer_ids, per_farmer)
+        ids = np.arange(first_id, first_id + len(owners))
+        county = self.counties[_draw(rng, np.cumsum(self.county_p), n=len(owners))]
+        return pd.DataFrame({
+            "id": ids,
+            "name": [f"Farm {i}" for i in ids],
+            "county": county,
+            "location_details": None,
+            "owner_id": owners,
+        })
+
+    def seasons(
+        self,
+        rng: np.random.Generator,
+        farm_ids: np.ndarray,
+        farm_county_index: np.ndarray,
+        farm_cumulative: np.ndarray,
+        crop_ids: np.ndarray,
+        n: int,
+    ) -> pd.DataFrame:
+        """
+        Draws `n` seasons over the farms, a farm being picked with the probability in
+        `farm_cumulative`. `crop_ids` maps the profile's crops to database ids.
+        """
+        farm = _draw(rng, farm_cumulative, n=n)
+        crop = _draw(rng, self.crop_given_county, rows=farm_county_index[farm])
+        columns: Dict[str, np.ndarray] = {}
+        for field, (labels, cumulative) in self.categories.items():
+            if field == "season":
+                season = _draw(rng, cumulative, n=n)
+                columns[field] = labels[season]
+            else:
+                columns[field] = labels[_draw(rng, cumulative, n=n)]
+
+        # --- Dates: the season picks the planting month ---
+        month = _draw(rng, self.month_given_season, rows=season) + 1
+        year = self.years[_draw(rng, self.year_cumulative, n=n)]
+        first_of_month = pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": 1}))
+        planting = first_of_month + pd.to_timedelta(rng.integers(0, first_of_month.dt.days_in_month.to_numpy()), unit="D")
+        duration = np.interp(rng.random(n), np.linspace(0, 1, N_QUANTILES), self.duration_quantiles).round()
+        harvest = planting + pd.to_timedelta(duration, unit="D")
+
+        # --- Money ---
+        numbers = self._numbers(rng, crop)
+        yield_kg, price = numbers["Yield (Kg)"], numbers["Market Price (KES/Kg)"]
+        revenue = yield_kg * price
+        total_cost = revenue / (1 + rng.uniform(0.2, 0.4, n))
+        shares = rng.dirichlet(np.array(list(COST_SHARES.values())) * COST_SHARE_CONCENTRATION, n)
+        shares *= sum(COST_SHARES.values())
+
+        frame = pd.DataFrame(columns)
+        frame["planted_area_acres"] = numbers["Planted Area (Acres)"].round(2)
+        frame["yield_kg"] = yield_kg.round(2)
+        frame["market_price_kes_per_kg"] = price.round(2)
+        frame["revenue_kes"] = revenue
+        for i, field in enumerate(COST_SHARES):
+            frame[field] = total_cost * shares[:, i]
+        frame["profit_kes"] = revenue - total_cost
+        frame["planting_date"] = planting.to_numpy()
+        frame["harvest_date"] = harvest.to_numpy()
+        frame["crop_id"] = crop_ids[crop]
+        frame["farm_id"] = farm_ids[farm]
+        return frame
+
+def generate(
+    profile: SyntheticProfile,
+    n_farmers: int,
+    n_seasons: int,
+    seed: int = 42,
+    crop_ids: Optional[Sequence[int]] = None,
+    first_farmer_id: int = 1,
+    first_farm_id: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yields ("farmers", df), ("farms", df) and then ("seasons", df) chunks. The same
+    profile, sizes, seed and chunk size always give the same tables.
+    """
+    rng = np.random.default_rng(seed)
+    farmers = profile.farmers(n_farmers, first_farmer_id)
+    yield "farmers", farmers
+    farms = profile.farms(rng, farmers["id"].to_numpy(), first_farm_id)
+    yield "farms", farms
+
+    # Farm activity is skewed: a few farms record many more seasons than most
+    weights = rng.lognormal(0.0, 0.75, len(farms))
+    farm_cumulative = np.cumsum(weights / weights.sum())
+    county_index = pd.Index(profile.counties).get_indexer(farms["county"])
+    crop_ids = np.asarray(crop_ids if crop_ids is not None else np.arange(1, len(profile.crops) + 1))
+    farm_ids = farms["id"].to_numpy()
+    for chunk, offset in enumerate(range(0, n_seasons, chunk_size)):
+        chunk_rng = np.random.default_rng([seed, chunk])
+        yield "seasons", profile.seasons(chunk_rng, farm_ids, county_index, farm_cumulative, crop_ids, min(chunk_size, n_seasons - offset))
+
+def write_files(profile: SyntheticProfile, n_farmers: int, n_seasons: int, seed: int, fmt: Optional[str], chunk_size: int) -> Dict[str, int]:
+    # --- Columnar files, one per table, written chunk by chunk ---
+    crops = pd.DataFrame({"id": np.arange(1, len(profile.crops) + 1), "name": profile.crops})
+    with DatasetWriter("synthetic_crops", fmt) as writer:
+        writer.write(crops)
+    writers = {name: DatasetWriter(f"synthetic_{name}", fmt) for name in ("farmers", "farms", "seasons")}
+    next_season_id = 1
+    try:
+        for name, frame in generate(profile, n_farmers, n_seasons, seed, chunk_size=chunk_size):
+            if name == "seasons":
+                frame.insert(0, "id", np.arange(next_season_id, next_season_id + len(frame)))
+                next_season_id += len(frame)
+            writers[name].write(frame)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    for writer in writers.values():
+        print(f"  {writer.path}: {writer.rows:,} rows, {writer.path.stat().st_size / 1e6:,.1f} MB")
+    return {name: writer.rows for name, writer in writers.items()}
+
+async def write_database(profile: SyntheticProfile, n_farmers: int, n_seasons: int, seed: int, chunk_size: int) -> Dict[str, int]:
+    """
+    Appends the generated farmers, farms and seasons to the database at DATABASE_URL,
+    after the rows already there, and rebuilds the crop performance summaries.
+
+    Farmers and farms are written with explicit ids starting after the current
+    maximum, so nothing else may create farmers or farms while this runs. On
+    PostgreSQL the id sequences are moved past the written ids after every chunk.
+    """
+    # The database layer needs DATABASE_URL, which file output does not
+    from sqlalchemy import func, text
+    from sqlmodel import select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db.session import async_engine, init_db
+    from app.models.models import Farm, Farmer
+    from app.services.crop_performance import rebuild_summaries
+    from scripts.load_data import insert_seasons, resolve_crops
+
+    await init_db()
+    counts = {"farmers": 0, "farms": 0, "seasons": 0}
+    async with AsyncSession(async_engine) as session:
+        first_farmer_id = ((await session.exec(select(func.max(Farmer.id)))).one() or 0) + 1
+        first_farm_id = ((await session.exec(select(func.max(Farm.id)))).one() or 0) + 1
+        crop_name_to_id: Dict[str, int] = {}
+        await resolve_crops(session, profile.crops, crop_name_to_id)
+        crop_ids = [crop_name_to_id[name] for name in profile.crops]
+
+        tables = {"farmers": Farmer.__table__, "farms": Farm.__table__}
+        start = time.perf_counter()
+        for name, frame in generate(profile, n_farmers, n_seasons, seed, crop_ids, first_farmer_id, first_farm_id, chunk_size):
+            columns = {c: frame[c].astype(object).where(frame[c].notna(), None).tolist() for c in frame.columns}
+            if name == "seasons":
+                await insert_seasons(session, columns)
+            else:
+                names = list(columns)
+                await session.execute(tables[name].insert(), [dict(zip(names, row)) for row in zip(*columns.values())])
+                connection = await session.connection()
+                if connection.dialect.name == "postgresql":
+                    # Explicit ids do not advance the serial sequence the API inserts use
+                    table = tables[name].name
+                    await session.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+            await session.commit()
+            counts[name] += len(frame)
+            if name == "seasons":
+                print(f"  {counts['seasons']:,} seasons ({counts['seasons'] / (time.perf_counter() - start):,.0f} rows/s)")
+        await rebuild_summaries(session, crop_ids)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic farmers, farms and seasons fitted to the cleaned dataset.")
+    parser.add_argument("--seasons", type=int, default=1_000_000)
+    parser.add_argument("--farmers", type=int, help="default: one per 20 seasons")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", choices=["db", "parquet", "arrow"], default="parquet",
+                        help="the database at DATABASE_URL, or synthetic_* files in DATA_DIR")
+    parser.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "LAST"), help="spread planting dates over these years instead of the fitted ones")
+    parser.add_argument("--source", default="mshamba_clean_seasons", help="cleaned dataset the distributions are fitted on")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    profile = SyntheticProfile(read_dataset(args.source))
+    if args.years:
+        profile.with_years(*args.years)
+    n_farmers = args.farmers or max(1, args.seasons // 20)
+    print(f"Generating {n_farmers:,} farmers and {args.seasons:,} seasons (seed {args.seed}) into {args.output}...")
+    start = time.perf_counter()
+    if args.output == "db":
+        counts = asyncio.run(write_database(profile, n_farmers, args.seasons, args.seed, args.chunk_size))
+    else:
+        counts = write_files(profile, n_farmers, args.seasons, args.seed, args.output, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {counts['farmers']:,} farmers, {counts['farms']:,} farms and {counts['seasons']:,} seasons in {elapsed:.1f}s ({counts['seasons'] / elapsed:,.0f} seasons/s).")
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,129 @@
 import pandas as pd
 import numpy as np
 import re
+import argparse
+import resource
+import time
+import warnings
 from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db.session import async_engine, init_db
 from app.models.models import Crop, Season, Farmer, Farm
+from app.services.crop_performance import apply_inserted_seasons, rebuild_summaries
 import asyncio
-from sqlalchemy import text
+from sqlalchemy import bindparam, delete, func
 
 # --- Configuration ---
 RAW_CSV_PATH = "/home/toonshi/projects/farm_intelligence/data/Kenya_Crops_Dataset 1 (1).csv"
 CLEANED_CSV_PATH = "/home/toonshi/projects/farm_intelligence/data/mshamba_clean_seasons.csv"
-
-# --- Data Cleaning Logic (from previous turn) ---
-def clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+CHUNK_SIZE = 50_000
+
+# Cleaned CSV column behind each text Season field
+TEXT_COLUMNS = {
+    "crop_variety": "Crop Variety",
+    "season": "Season",
+    "soil_type": "Soil Type",
+    "irrigation_method": "Irrigation Method",
+    "fertilizer_used": "Fertilizer Used",
+    "pest_control": "Pest Control",
+    "weather_impact": "Weather Impact",
+    "notes": "Notes",
+}
+# Share of the total cost of production booked under each detailed cost
+COST_SHARES = {
+    "seed_cost_kes": 0.15,
+    "fertilizer_cost_kes": 0.20,
+    "pesticide_cost_kes": 0.15,
+    "labor_cost_kes": 0.30,
+    "machinery_cost_kes": 0.10,
+    "other_costs_kes": 0.10,
+}
+
+# --- Data Cleaning Logic ---
+NUMERIC_COLUMNS = ["Planted Area (Acres)","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
+DEDUP_KEY_COLUMNS = ["Farmer Name","County","Crop Type","Crop Variety","Season","Planting Date","Harvest Date","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
+SEASON_MAP = {"Long Rains":"Long Rains","Longrain":"Long Rains","Short Rains":"Short Rains","Shortrain":"Short Rains","Dry":"Dry Season","Dry Season":"Dry Season","Error":"Unknown"}
+
+def _norm_title(values: pd.Series) -> pd.Series:
+    return values.str.strip().str.title().str.replace(r"\s+", " ", regex=True)
+
+def _norm_county(values: pd.Series) -> pd.Series:
+    values = values.str.strip().str.replace(r"(?i)\s*county$", "", regex=True)
+    return values.str.replace(r"\s+", " ", regex=True).str.title()
+
+def _normalize_categorical(values: pd.Series, normalize) -> pd.Series:
+    """
+    Applies a string normalization to the distinct values only, then maps every row
+    through the category codes. Values that normalize to "" become missing.
+    """
+    categorical = values.astype("category")
+    if not len(categorical.cat.categories):
+        return categorical
+    normalized = normalize(pd.Series(categorical.cat.categories.astype(object), dtype=object))
+    normalized = normalized.where(normalized != "", None).to_numpy(dtype=object)
+    codes = categorical.cat.codes.to_numpy()
+    mapped = np.where(codes >= 0, normalized[codes], None)
+    return pd.Series(mapped, index=values.index, dtype=object).astype("category")
+
+def _to_number(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    # Most cells are plain numbers; only the rest get currency symbols, thousands
+    # separators and other text stripped
+    numbers = pd.to_numeric(values, errors="coerce").astype(float)
+    retry = numbers.isna() & values.notna()
+    if retry.any():
+        stripped = values[retry].astype(object).str.replace(r"[^\d\.\-]", "", regex=True)
+        numbers[retry] = pd.to_numeric(stripped, errors="coerce")
+    return numbers
+
+def _to_datetime(values: pd.Series) -> pd.Series:
+    # Fast ISO 8601 pass, then the slower per-element parser for whatever is left
+    dates = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            dates[retry] = pd.to_datetime(values[retry], errors="coerce")
+    return dates.astype("datetime64[ns]")
+
+def dedup_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash of the dedup key columns of each row.
+    """
+    return pd.util.hash_pandas_object(df[DEDUP_KEY_COLUMNS], index=False).to_numpy()
+
+def clean_rows(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every cleaning step except deduplication, with vectorized operations only.
+    """
     df = df_raw.copy()
-    
+
     # 1) Whitespace & column names
     df.columns = [c.strip() for c in df.columns]
     for col in df.columns:
-        if df[col].dtype == object:
-            df[col] = df[col].astype(str).str.strip()
+        if pd.api.types.is_string_dtype(df[col]) or df[col].dtype == object:
+            df[col] = df[col].str.strip()
 
     # 2) Dates
     for col in ["Planting Date", "Harvest Date"]:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
+        df[col] = _to_datetime(df[col])
     df["timeline_date"] = df["Harvest Date"].fillna(df["Planting Date"])
     df["month"] = df["timeline_date"].dt.to_period("M").dt.to_timestamp()
 
-    # 3) Categoricals
-    def norm_title(x: str):
-        x = (x or "").strip()
-        return re.sub(r"\s+", " ", x.title()) if x else np.nan
-    def norm_county(x: str):
-        x = (x or "").strip()
-        x = re.sub(r"(?i)\s*county$", "", x)
-        x = re.sub(r"\s+", " ", x)
-        return x.title() if x else np.nan
-
-    df["Crop Type"] = df["Crop Type"].replace({"nan": np.nan})
-    df["Crop Type"] = df["Crop Type"].apply(lambda x: norm_title(x) if isinstance(x, str) else x)
-    df["County"] = df["County"].apply(lambda x: norm_county(x) if isinstance(x, str) else x)
-    df["Season"] = df["Season"].apply(lambda x: norm_title(x) if isinstance(x, str) else x)
-    season_map = {"Long Rains":"Long Rains","Longrain":"Long Rains","Short Rains":"Short Rains","Shortrain":"Short Rains","Dry":"Dry Season","Dry Season":"Dry Season","Error":"Unknown"}
-    df["Season"] = df["Season"].map(lambda s: season_map.get(s, s))
+    # 3) Categoricals, normalized once per distinct value
+    df["Crop Type"] = _normalize_categorical(df["Crop Type"].replace({"nan": np.nan}), _norm_title)
+    df["County"] = _normalize_categorical(df["County"], _norm_county)
+    df["Season"] = _normalize_categorical(df["Season"], lambda values: _norm_title(values).replace(SEASON_MAP))
 
     # 4) Numerics
-    num_cols = ["Planted Area (Acres)","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
-    for c in num_cols:
+    for c in NUMERIC_COLUMNS:
         if c in df.columns:
-            df[c] = (df[c].astype(str).str.replace(r"[^\d\.\-]", "", regex=True).replace({"": np.nan}).astype(float))
+            df[c] = _to_number(df[c])
 
-    # 5) Imputations (simplified for loading, full logging in previous turn)
+    # 5) Imputations
     mask_price_missing = df["Market Price (KES/Kg)"].isna() & df["Revenue (KES)"].notna() & df["Yield (Kg)"].notna() & (df["Yield (Kg)"] != 0)
     df.loc[mask_price_missing, "Market Price (KES/Kg)"] = df.loc[mask_price_missing, "Revenue (KES)"] / df.loc[mask_price_missing, "Yield (Kg)"]
 
@@ -65,153 +136,375 @@ def clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
     mask_cost_missing = df["Cost of Production (KES)"].isna() & df["Revenue (KES)"].notna() & df["Profit (KES)"].notna()
     df.loc[mask_cost_missing, "Cost of Production (KES)"] = df.loc[mask_cost_missing, "Revenue (KES)"] - df.loc[mask_cost_missing, "Profit (KES)"]
 
-    # 7) Dedupe (simplified, full logging in previous turn)
-    key_cols = ["Farmer Name","County","Crop Type","Crop Variety","Season","Planting Date","Harvest Date","Yield (Kg)","Market Price (KES/Kg)","Revenue (KES)","Cost of Production (KES)","Profit (KES)"]
-    df["_dup_key"] = df[key_cols].astype(str).agg("|".join, axis=1)
-    df = df.drop_duplicates(subset=["_dup_key"], keep="first").copy()
-    df = df.drop(columns=["_dup_key"])
-
     # 8) Compute ROI (clamped for analytics, keep raw values)
     df["ROI %"] = (df["Profit (KES)"] / df["Cost of Production (KES)"]) * 100.0
     df["ROI % (clamped)"] = df["ROI %"].clip(lower=-100, upper=500)
 
     return df
 
-async def load_data_to_db():
-    print("Initializing database...")
-    await init_db()
-    print("Database initialized.")
-
-    async with AsyncSession(async_engine) as session:
-        # Delete existing Season data
-        await session.exec(text("DELETE FROM season"))
-        # Delete existing Crop data
-        await session.exec(text("DELETE FROM crop"))
-        await session.commit()
-        print("Existing Season and Crop data cleared.")
-
-    print(f"Reading raw data from {RAW_CSV_PATH}...")
-    df_raw = pd.read_csv(RAW_CSV_PATH)
-    print(f"Cleaning data...")
-    df_cleaned = clean_data(df_raw)
-    print(f"Cleaned data has {len(df_cleaned)} rows.")
-
-    # Save cleaned data for inspection (optional)
-    df_cleaned.to_csv(CLEANED_CSV_PATH, index=False)
-    print(f"Cleaned data saved to {CLEANED_CSV_PATH}")
-
-    async with AsyncSession(async_engine) as session:
-        # --- Create a dummy Farmer and Farm ---
-        print("Creating dummy farmer and farm...")
+def clean_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+    df = clean_rows(df_raw)
+    # 7) Dedupe on hashed keys
+    return df[~pd.Series(dedup_keys(df)).duplicated().to_numpy()].copy()
+
+class SeenKeys:
+    """
+    Dedup key hashes seen in earlier chunks, kept as one sorted uint64 array
+    (8 bytes per distinct row).
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def first_seen(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Marks the keys that occur neither earlier in `keys` nor in a previous call,
+        and remembers them.
+        """
+        new = ~pd.Series(keys).duplicated().to_numpy()
+        if len(self._keys):
+            position = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+            new &= self._keys[position] != keys
+        self._keys = np.sort(np.concatenate([self._keys, keys[new]]))
+        return new
+
+def clean_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Cleans raw chunks one at a time, dropping rows that duplicate a row of any
+    earlier chunk.
+    """
+    seen = SeenKeys()
+    for chunk in chunks:
+        df = clean_rows(chunk)
+        yield df[seen.first_seen(dedup_keys(df))]
+
+def clean_csv(raw_csv_path: str, cleaned_csv_path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Streams a raw CSV of any size through the cleaning pipeline into a cleaned CSV.
+    Returns the number of rows read and written.
+    """
+    rows_read = []
+    def raw_chunks():
+        for chunk in pd.read_csv(raw_csv_path, chunksize=chunk_size, dtype=str):
+            rows_read.append(len(chunk))
+            yield chunk
+
+    rows_out = 0
+    for i, df in enumerate(clean_chunks(raw_chunks())):
+        df.to_csv(cleaned_csv_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows_out += len(df)
+    return sum(rows_read), rows_out
+
+# --- Incremental Ingestion ---
+# Cleaned CSV columns that identify a season in the source; the rest is its content
+SOURCE_KEY_COLUMNS = ["Farmer Name","County","Crop Type","Season","Planting Date"]
+DELETE_BATCH_SIZE = 10_000
+
+class KeyOccurrences:
+    """
+    How many rows of the current load had each identity hash so far, kept as sorted
+    uint64 keys with their counts, so rows sharing an identity get distinct
+    fingerprints across chunks.
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.uint64)
+
+    def number(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Occurrence number of each key in the load (0 for its first row), remembering
+        the keys for the following calls.
+        """
+        ordinal = pd.Series(keys).groupby(keys, sort=False).cumcount().to_numpy(dtype=np.uint64)
+        unique, counts = np.unique(keys, return_counts=True)
+        if len(self._keys):
+            position = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+            ordinal += np.where(self._keys[position] == keys, self._counts[position], 0).astype(np.uint64)
+            position = np.minimum(np.searchsorted(self._keys, unique), len(self._keys) - 1)
+            known = self._keys[position] == unique
+            self._counts[position[known]] += counts[known].astype(np.uint64)
+            unique, counts = unique[~known], counts[~known]
+        keys_all = np.concatenate([self._keys, unique])
+        order = np.argsort(keys_all, kind="stable")
+        self._keys = keys_all[order]
+        self._counts = np.concatenate([self._counts, counts.astype(np.uint64)])[order]
+        return ordinal
+
+def source_fingerprints(chunk: pd.DataFrame, occurrences: KeyOccurrences) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The source key (identity columns plus occurrence number) and content hash of each
+    cleaned row, as int64 for the BIGINT columns.
+    """
+    identity = pd.util.hash_pandas_object(chunk[SOURCE_KEY_COLUMNS], index=False).to_numpy()
+    ordinal = occurrences.number(identity)
+    keys = identity ^ (ordinal * np.uint64(0x9E3779B97F4A7C15))
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return keys.view(np.int64), hashes.view(np.int64)
+
+class SourceIndex:
+    """
+    Fingerprints of the seasons loaded by earlier runs, sorted by source key, and
+    which of them the current run has matched.
+    """
+
+    def __init__(self, keys: np.ndarray, hashes: np.ndarray, ids: np.ndarray, crop_ids: np.ndarray, farm_ids: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.hashes = hashes[order]
+        self.ids = ids[order]
+        self.crop_ids = crop_ids[order]
+        self.farm_ids = farm_ids[order]
+        self.seen = np.zeros(len(keys), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    async def load(cls, session: AsyncSession) -> "SourceIndex":
+        result = await session.exec(
+            select(Season.source_key, Season.source_hash, Season.id, Season.crop_id, Season.farm_id)
+            .where(Season.source_key.isnot(None))
+        )
+        data = np.array(result.all(), dtype=object).reshape(-1, 5)
+        data[:, 3:] = np.where(data[:, 3:] == None, -1, data[:, 3:])  # noqa: E711
+        return cls(*(data[:, i].astype(np.int64) for i in range(5)))
+
+    def match(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Position of each key in the index, or -1 for keys loaded for the first time.
+        Matched entries are marked as seen.
+        """
+        if not len(self.keys):
+            return np.full(len(keys), -1)
+        position = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        position = np.where(self.keys[position] == keys, position, -1)
+        self.seen[position[position >= 0]] = True
+        return position
+
+    def unseen(self) -> np.ndarray:
+        return np.flatnonzero(~self.seen)
+
+def _values(series: pd.Series) -> List:
+    # Plain Python values with every missing value (NaN, NaT, "nan") as None
+    return series.astype(object).where(series.notna() & (series.astype(str) != "nan"), None).tolist()
+
+def _float_values(values: np.ndarray) -> List:
+    return [None if v != v else v for v in values.tolist()]
+
+def season_columns(
+    chunk: pd.DataFrame, crop_name_to_id: Dict[str, int], farm_id: int, source_keys: np.ndarray, source_hashes: np.ndarray
+) -> Dict[str, List]:
+    """
+    Builds the insert payload of a chunk of cleaned rows column by column.
+
+    Revenue is recalculated from yield and price, and the cost of production is drawn
+    from a 20-40% target ROI and split over the detailed cost columns, so the demo
+    data has realistic margins. The draw is taken from the row's source key, so
+    reloading an unchanged row reproduces the same costs.
+    """
+    n = len(chunk)
+    yield_kg = pd.to_numeric(chunk["Yield (Kg)"], errors="coerce").to_numpy(dtype=np.float64)
+    price = pd.to_numeric(chunk["Market Price (KES/Kg)"], errors="coerce").to_numpy(dtype=np.float64)
+    revenue = yield_kg * price
+    uniform = (source_keys.view(np.uint64) >> np.uint64(11)).astype(np.float64) / 2.0**53
+    target_roi_percentage = 20.0 + 20.0 * uniform
+    total_cost = revenue / (1 + (target_roi_percentage / 100))
+
+    columns = {field: _values(chunk[column]) for field, column in TEXT_COLUMNS.items()}
+    columns["planted_area_acres"] = _float_values(pd.to_numeric(chunk["Planted Area (Acres)"], errors="coerce").to_numpy())
+    columns["yield_kg"] = _float_values(yield_kg)
+    columns["market_price_kes_per_kg"] = _float_values(price)
+    columns["revenue_kes"] = _float_values(revenue)
+    for field, share in COST_SHARES.items():
+        columns[field] = _float_values(total_cost * share)
+    columns["profit_kes"] = _float_values(revenue - total_cost)
+    columns["planting_date"] = _values(pd.to_datetime(chunk["Planting Date"], errors="coerce"))
+    columns["harvest_date"] = _values(pd.to_datetime(chunk["Harvest Date"], errors="coerce"))
+    columns["crop_id"] = _values(chunk["Crop Type"].map(crop_name_to_id).astype("Int64"))
+    columns["farm_id"] = [farm_id] * n
+    columns["source_key"] = source_keys.tolist()
+    columns["source_hash"] = source_hashes.tolist()
+    return columns
+
+async def resolve_crops(session: AsyncSession, names: Iterable[str], crop_name_to_id: Dict[str, int]):
+    """
+    Adds the ids of `names` to `crop_name_to_id`, creating the crops that do not exist
+    yet with one multi-row insert.
+    """
+    missing = sorted({name for name in names if isinstance(name, str) and name != "nan"} - crop_name_to_id.keys())
+    if not missing:
+        return
+    result = await session.exec(select(Crop.name, Crop.id).where(Crop.name.in_(missing)))
+    crop_name_to_id.update(result.all())
+    new_crops = [name for name in missing if name not in crop_name_to_id]
+    if new_crops:
+        await session.execute(Crop.__table__.insert(), [{"name": name} for name in new_crops])
+        result = await session.exec(select(Crop.name, Crop.id).where(Crop.name.in_(new_crops)))
+        crop_name_to_id.update(result.all())
+
+async def insert_seasons(session: AsyncSession, columns: Dict[str, List]) -> int:
+    """
+    Inserts one chunk of season columns: with COPY on PostgreSQL (asyncpg), as a
+    single executemany everywhere else.
+    """
+    rows = list(zip(*columns.values()))
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table("season", columns=list(columns), records=rows)
+    else:
+        # Core insert: the ORM bulk path costs about ten times more per row
+        names = list(columns)
+        await session.execute(Season.__table__.insert(), [dict(zip(names, row)) for row in rows])
+    return len(rows)
+
+async def update_seasons(session: AsyncSession, season_ids: np.ndarray, columns: Dict[str, List]) -> int:
+    """
+    Overwrites the seasons `season_ids` with one chunk of season columns, as a single
+    executemany UPDATE.
+    """
+    table = Season.__table__
+    names = list(columns)
+    rows = [dict(zip(names, row), season_id=season_id) for season_id, row in zip(season_ids.tolist(), zip(*columns.values()))]
+    if rows:
+        await session.execute(table.update().where(table.c.id == bindparam("season_id")), rows)
+    return len(rows)
+
+async def delete_seasons(session: AsyncSession, season_ids: np.ndarray) -> int:
+    ids = season_ids.tolist()
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        await session.execute(delete(Season).where(Season.id.in_(ids[start:start + DELETE_BATCH_SIZE])))
+    return len(ids)
+
+def peak_memory_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def get_or_create_demo_farm(session: AsyncSession) -> int:
+    result = await session.exec(select(Farmer).where(Farmer.email == "john.doe@example.com"))
+    dummy_farmer = result.first()
+    if dummy_farmer is None:
         dummy_farmer = Farmer(name="John Doe", email="john.doe@example.com", hashed_password="dummy_password")
         session.add(dummy_farmer)
         await session.commit()
         await session.refresh(dummy_farmer)
 
+    result = await session.exec(select(Farm).where(Farm.owner_id == dummy_farmer.id, Farm.name == "Doe's Farm"))
+    dummy_farm = result.first()
+    if dummy_farm is None:
         dummy_farm = Farm(name="Doe's Farm", county="Kiambu", owner_id=dummy_farmer.id)
         session.add(dummy_farm)
         await session.commit()
         await session.refresh(dummy_farm)
-        farm_id = dummy_farm.id
-        print(f"Created dummy farm with id: {farm_id}")
-
-        # --- Load Crops ---
-        print("Loading unique crops...")
-        unique_crops = df_cleaned["Crop Type"].dropna().unique()
-        crop_objects = []
-        for crop_name in unique_crops:
-            # Check if crop already exists
-            result = await session.exec(select(Crop).where(Crop.name == crop_name))
-            existing_crop = result.first()
-            if not existing_crop:
-                crop_objects.append(Crop(name=crop_name))
-        session.add_all(crop_objects)
-        await session.commit()
-        print(f"Loaded {len(crop_objects)} new unique crops.")
-
-        # Fetch all crops to create a mapping
-        result = await session.exec(select(Crop))
-        crops_in_db = result.all()
-        crop_name_to_id = {crop.name: crop.id for crop in crops_in_db}
-
-        # --- Load Seasons ---
-        print("Loading seasons data...")
-        season_objects = []
-        for index, row in df_cleaned.iterrows():
-            crop_name = row.get("Crop Type")
-            crop_id = crop_name_to_id.get(crop_name) if crop_name else None
-
-            planting_date = row.get("Planting Date")
-            harvest_date = row.get("Harvest Date")
-
-            # Convert NaT to None for database insertion
-            if pd.isna(planting_date):
-                planting_date = None
-            if pd.isna(harvest_date):
-                harvest_date = None
-
-            # Recalculate financial metrics for more realistic data
-            calculated_revenue_kes = None
-            calculated_profit_kes = None
-
-            current_yield_kg = row.get("Yield (Kg)")
-            current_market_price_kes_per_kg = row.get("Market Price (KES/Kg)")
-
-            if pd.notna(current_yield_kg) and pd.notna(current_market_price_kes_per_kg):
-                calculated_revenue_kes = current_yield_kg * current_market_price_kes_per_kg
-                
-                target_roi_percentage = np.random.uniform(20.0, 40.0)
-                
-                calculated_total_cost = calculated_revenue_kes / (1 + (target_roi_percentage / 100))
-                calculated_profit_kes = calculated_revenue_kes - calculated_total_cost
-
-                # Distribute the total cost into granular fields
-                seed_cost_kes = calculated_total_cost * 0.15
-                fertilizer_cost_kes = calculated_total_cost * 0.20
-                pesticide_cost_kes = calculated_total_cost * 0.15
-                labor_cost_kes = calculated_total_cost * 0.30
-                machinery_cost_kes = calculated_total_cost * 0.10
-                other_costs_kes = calculated_total_cost * 0.10
-            else:
-                seed_cost_kes = None
-                fertilizer_cost_kes = None
-                pesticide_cost_kes = None
-                labor_cost_kes = None
-                machinery_cost_kes = None
-                other_costs_kes = None
-
-
-            season_data = {
-                "crop_variety": row.get("Crop Variety"),
-                "season": row.get("Season"),
-                "planted_area_acres": row.get("Planted Area (Acres)"),
-                "yield_kg": row.get("Yield (Kg)"),
-                "market_price_kes_per_kg": row.get("Market Price (KES/Kg)"),
-                "revenue_kes": calculated_revenue_kes,
-                "seed_cost_kes": seed_cost_kes,
-                "fertilizer_cost_kes": fertilizer_cost_kes,
-                "pesticide_cost_kes": pesticide_cost_kes,
-                "labor_cost_kes": labor_cost_kes,
-                "machinery_cost_kes": machinery_cost_kes,
-                "other_costs_kes": other_costs_kes,
-                "profit_kes": calculated_profit_kes,
-                "planting_date": planting_date,
-                "harvest_date": harvest_date,
-                "soil_type": row.get("Soil Type"),
-                "irrigation_method": row.get("Irrigation Method"),
-                "fertilizer_used": row.get("Fertilizer Used"),
-                "pest_control": row.get("Pest Control"),
-                "weather_impact": row.get("Weather Impact"),
-                "notes": row.get("Notes"),
-                "crop_id": crop_id,
-                "farm_id": farm_id
-            }
-            season_objects.append(Season(**season_data))
-
-        session.add_all(season_objects)
-        await session.commit()
-        print(f"Loaded {len(season_objects)} seasons.")
-    print("Data loading complete.")
+    return dummy_farm.id
+
+async def load_data_to_db(
+    raw_csv_path: str = RAW_CSV_PATH,
+    cleaned_csv_path: str = CLEANED_CSV_PATH,
+    chunk_size: int = CHUNK_SIZE,
+    clean: bool = True,
+    delete_missing: bool = False,
+) -> Dict[str, int]:
+    """
+    Brings the season table in line with the cleaned CSV without clearing it first.
+
+    Every row is fingerprinted; rows whose source key is new are inserted, rows whose
+    content hash changed are updated in place and the rest are skipped, so a refresh
+    writes (and recomputes summaries for) only what changed. With `delete_missing`,
+    seasons of earlier loads whose source row is gone are deleted. Returns the
+    inserted, updated, skipped and deleted counts.
+    """
+    print("Initializing database...")
+    await init_db()
+    print("Database initialized.")
+
+    if clean:
+        print(f"Cleaning {raw_csv_path} in chunks of {chunk_size:,} rows...")
+        rows_in, rows_out = clean_csv(raw_csv_path, cleaned_csv_path, chunk_size)
+        print(f"Cleaned {rows_in:,} raw rows into {rows_out:,} rows, saved to {cleaned_csv_path}")
+
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "deleted": 0}
+    async with AsyncSession(async_engine) as session:
+        # --- Get or create a dummy Farmer and Farm ---
+        farm_id = await get_or_create_demo_farm(session)
+        index = await SourceIndex.load(session)
+        print(f"Syncing seasons of farm {farm_id} ({len(index):,} loaded before) with {cleaned_csv_path} in chunks of {chunk_size:,}...")
+
+        # --- Upsert Crops and Seasons chunk by chunk ---
+        # Each chunk's seasons and the crop summaries they change are committed
+        # together, so a load that stops midway leaves no summary stale
+        crop_name_to_id: Dict[str, int] = {}
+        occurrences = KeyOccurrences()
+        start = time.perf_counter()
+        for chunk in pd.read_csv(cleaned_csv_path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""]):
+            keys, hashes = source_fingerprints(chunk, occurrences)
+            position = index.match(keys)
+            new = position < 0
+            changed = np.zeros(len(chunk), dtype=bool)
+            changed[~new] = index.hashes[position[~new]] != hashes[~new]
+            counts["skipped"] += int((~new & ~changed).sum())
+            if not (new.any() or changed.any()):
+                continue
+
+            await resolve_crops(session, chunk["Crop Type"][new | changed].unique(), crop_name_to_id)
+            if new.any():
+                result = await session.exec(select(func.max(Season.id)))
+                last_id = result.one() or 0
+                columns = season_columns(chunk[new], crop_name_to_id, farm_id, keys[new], hashes[new])
+                counts["inserted"] += await insert_seasons(session, columns)
+                # Seasons created through the API meanwhile have no source key and
+                # count themselves
+                await apply_inserted_seasons(session, Season.id > last_id, Season.source_key.isnot(None))
+            if changed.any():
+                write = position[changed]
+                columns = season_columns(chunk[changed], crop_name_to_id, farm_id, keys[changed], hashes[changed])
+                counts["updated"] += await update_seasons(session, index.ids[write], columns)
+                # An update can move a season between crops: rebuild both sides
+                crop_ids = {c for c in columns["crop_id"] if c is not None} | set(index.crop_ids[write].tolist())
+                crop_ids.discard(-1)
+                await rebuild_summaries(session, crop_ids, commit=False)
+            await session.commit()
+            processed = counts["inserted"] + counts["updated"] + counts["skipped"]
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {processed:,} rows ({counts['inserted']:,} inserted, {counts['updated']:,} updated; "
+                f"{processed / elapsed:,.0f} rows/s, peak memory {peak_memory_mb():,.0f} MB)"
+            )
+
+        if delete_missing:
+            gone = index.unseen()
+            counts["deleted"] = await delete_seasons(session, index.ids[gone])
+            crop_ids = set(index.crop_ids[gone].tolist())
+            crop_ids.discard(-1)
+            await rebuild_summaries(session, crop_ids, commit=False)
+            await session.commit()
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"Inserted {counts['inserted']:,}, updated {counts['updated']:,}, skipped {counts['skipped']:,} "
+            f"and deleted {counts['deleted']:,} seasons in {elapsed:.1f}s."
+        )
+    print(f"Data loading complete. Peak memory {peak_memory_mb():,.0f} MB.")
+    return counts
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw Kenya crops CSV and bulk load it as seasons.")
+    parser.add_argument("--raw-csv", default=RAW_CSV_PATH, help="raw dataset to clean")
+    parser.add_argument("--cleaned-csv", default=CLEANED_CSV_PATH, help="where the cleaned dataset is written and loaded from")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows read, inserted and committed per chunk")
+    parser.add_argument("--skip-clean", action="store_true", help="load an existing cleaned CSV without re-cleaning the raw data")
+    parser.add_argument("--delete-missing", action="store_true", help="delete seasons whose source row is no longer in the cleaned CSV")
+    parser.add_argument("--clean-only", action="store_true", help="only write the cleaned CSV, without touching the database")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    asyncio.run(load_data_to_db())
\ No newline at end of file
+    args = parse_args()
+    if args.clean_only:
+        rows_in, rows_out = clean_csv(args.raw_csv, args.cleaned_csv, args.chunk_size)
+        print(f"Cleaned {rows_in:,} raw rows into {rows_out:,} rows, saved to {args.cleaned_csv}")
+        raise SystemExit(0)
+    asyncio.run(load_data_to_db(args.raw_csv, args.cleaned_csv, args.chunk_size, clean=not args.skip_clean, delete_missing=args.delete_missing))
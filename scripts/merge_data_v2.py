@@ -1,8 +1,9 @@
 import pandas as pd
+from scripts.datasets import read_dataset, write_dataset
 
 # --- 1. Load the datasets ---
-df_mshamba = pd.read_csv('data/mshamba_clean_seasons.csv')
-df_fao = pd.read_csv('data/fao_kenya_crop_data.csv')
+df_mshamba = read_dataset('mshamba_clean_seasons')
+df_fao = read_dataset('fao_kenya_crop_data')
 
 # --- 2. Clean and transform the FAOSTAT data ---
 
@@ -48,12 +49,14 @@ for index, row in df_fao.iterrows():
 df_fao_new = pd.DataFrame(new_rows)
 
 # --- 3. Concatenate the two dataframes ---
-df_merged = pd.concat([df_mshamba, df_fao_new], ignore_index=True)
+# Categories differ between the sources, so combine them as plain values; write_dataset restores the dtypes
+df_merged = pd.concat([df_mshamba.astype(object), df_fao_new.astype(object)], ignore_index=True)
 
 # --- 4. Remove duplicates ---
+df_merged['timeline_date'] = pd.to_datetime(df_merged['timeline_date'])
 df_merged.drop_duplicates(subset=['Crop Type', 'timeline_date'], keep='first', inplace=True)
 
 # --- 5. Save the merged dataset ---
-df_merged.to_csv('data/mshamba_merged_v2.csv', index=False)
+path = write_dataset(df_merged, 'mshamba_merged_v2')
 
-print("The two datasets have been merged and saved to data/mshamba_merged_v2.csv")
+print(f"The two datasets have been merged and saved to {path}")
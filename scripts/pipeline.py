@@ -0,0 +1,311 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# --- Configuration ---
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(os.getenv("PIPELINE_CACHE_DIR", ROOT / ".pipeline_cache"))
+RAW_CSV = "data/Kenya_Crops_Dataset 1 (1).csv"
+HASH_BLOCK_SIZE = 1 << 20
+
+class Stage:
+    """
+    One step of the pipeline: the commands that run it, the files it reads and writes,
+    the source files its behaviour depends on, and parameters passed to it as
+    environment variables.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        commands: List[List[str]],
+        inputs: Sequence[str] = (),
+        outputs: Sequence[str] = (),
+        code: Sequence[str] = (),
+        params: Optional[Dict[str, str]] = None,
+    ):
+        self.name = name
+        self.commands = commands
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+        self.params = dict(params or {})
+
+def module(name: str, *args: str) -> List[str]:
+    return [sys.executable, "-m", f"scripts.{name}", *args]
+
+X_Y = ["data/X_train_merged_v2.arrow", "data/X_test_merged_v2.arrow", "data/y_train_merged_v2.arrow", "data/y_test_merged_v2.arrow"]
+STAGES = [
+    Stage(
+        "clean_seasons",
+        [
+            module("load_data", "--clean-only", "--raw-csv", RAW_CSV, "--cleaned-csv", "data/mshamba_clean_seasons.csv"),
+            module("datasets", "convert", "mshamba_clean_seasons"),
+        ],
+        inputs=[RAW_CSV],
+        outputs=["data/mshamba_clean_seasons.csv", "data/mshamba_clean_seasons.parquet"],
+        code=["scripts/load_data.py", "scripts/datasets.py"],
+    ),
+    Stage(
+        # No file inputs: the download is only repeated when its code changes or it is forced
+        "download_fao_data",
+        [module("download_fao_data")],
+        outputs=["data/fao_kenya_crop_data.parquet"],
+        code=["scripts/download_fao_data.py", "scripts/datasets.py"],
+    ),
+    Stage(
+        "merge_data_v2",
+        [module("merge_data_v2")],
+        inputs=["data/mshamba_clean_seasons.parquet", "data/fao_kenya_crop_data.parquet"],
+        outputs=["data/mshamba_merged_v2.parquet"],
+        code=["scripts/merge_data_v2.py", "scripts/datasets.py"],
+    ),
+    Stage(
+        "prepare_merged_data_v2",
+        [module("prepare_merged_data_v2")],
+        inputs=["data/mshamba_merged_v2.parquet"],
+        outputs=X_Y,
+        code=["scripts/prepare_merged_data_v2.py", "scripts/datasets.py"],
+    ),
+    Stage(
+        "train_lgbm_model",
+        [module("train_lgbm_model")],
+        inputs=X_Y,
+        outputs=["yield_predictor_lgbm.joblib"],
+        code=["scripts/train_lgbm_model.py", "scripts/datasets.py"],
+        params={"LGBM_PARAMS": "{}"},
+    ),
+]
+
+class HashStore:
+    """
+    SHA-256 of files by path, remembered with their size and mtime so unchanged files
+    are not read again between runs.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._known: Dict[str, List] = json.loads(path.read_text()) if path.exists() else {}
+
+    def file(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path.resolve())
+        known = self._known.get(key)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        self._known[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._known))
+
+class ArtifactCache:
+    """
+    Content-addressed store of stage outputs: every output file is kept once under
+    its hash, and a manifest per (stage, key) lists which hash each output path had.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.hashes = HashStore(root / "hashes.json")
+
+    def _manifest_path(self, stage: Stage, key: str) -> Path:
+        return self.root / "stages" / stage.name / f"{key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def manifest(self, stage: Stage, key: str) -> Optional[Dict[str, str]]:
+        path = self._manifest_path(stage, key)
+        if not path.exists():
+            return None
+        outputs = json.loads(path.read_text())
+        if not all(self._object_path(digest).exists() for digest in outputs.values()):
+            return None
+        return outputs
+
+    def store(self, stage: Stage, key: str) -> Dict[str, str]:
+        outputs = {}
+        for output in stage.outputs:
+            path = ROOT / output
+            if not path.exists():
+                raise FileNotFoundError(f"Stage {stage.name} did not write {output}")
+            digest = self.hashes.file(path)
+            target = self._object_path(digest)
+            if not target.exists():
+                # Copies rather than hard links: scripts rewrite their outputs in place
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, target)
+            outputs[output] = digest
+        manifest = self._manifest_path(stage, key)
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(json.dumps(outputs, indent=2))
+        return outputs
+
+    def restore(self, outputs: Dict[str, str]) -> int:
+        """
+        Puts the cached version of every output whose current content differs in
+        place. Returns the number of files copied.
+        """
+        restored = 0
+        for output, digest in outputs.items():
+            path = ROOT / output
+            if path.exists() and self.hashes.file(path) == digest:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self._object_path(digest), path)
+            restored += 1
+        return restored
+
+def producers(stages: Iterable[Stage]) -> Dict[str, Stage]:
+    return {output: stage for stage in stages for output in stage.outputs}
+
+def upstream(stage: Stage, by_output: Dict[str, Stage]) -> Set[str]:
+    return {by_output[i].name for i in stage.inputs if i in by_output}
+
+def select_stages(stages: List[Stage], targets: Sequence[str]) -> List[Stage]:
+    """
+    The targets and every stage they depend on, in declaration order.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [t for t in targets if t not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(unknown)} (known: {', '.join(by_name)})")
+    by_output = producers(stages)
+    selected: Set[str] = set()
+    todo = list(targets) or list(by_name)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(upstream(by_name[name], by_output))
+    return [stage for stage in stages if stage.name in selected]
+
+def stage_key(stage: Stage, cache: ArtifactCache, produced: Dict[str, str]) -> str:
+    """
+    Hash of everything a stage's outputs depend on: its commands, parameters, code and
+    the content of its inputs (taken from upstream manifests when available).
+    """
+    inputs = {}
+    for i in stage.inputs:
+        inputs[i] = produced.get(i) or cache.hashes.file(ROOT / i)
+    description = {
+        "commands": [[Path(part).name if part == sys.executable else part for part in c] for c in stage.commands],
+        "params": stage.params,
+        "code": {c: cache.hashes.file(ROOT / c) for c in stage.code},
+        "inputs": inputs,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+def execute(stage: Stage, log_path: Path) -> float:
+    start = time.perf_counter()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, **stage.params}
+    with open(log_path, "w") as log:
+        for command in stage.commands:
+            result = subprocess.run(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+            if result.returncode != 0:
+                raise RuntimeError(f"Stage {stage.name} failed (exit code {result.returncode}), see {log_path}")
+    return time.perf_counter() - start
+
+def run(stages: List[Stage], jobs: int = 4, force: Sequence[str] = (), dry_run: bool = False) -> Dict[str, str]:
+    """
+    Runs the stages in dependency order, up to `jobs` at a time. Stages whose key has a
+    cached manifest are restored instead of run. Returns each stage's outcome.
+    """
+    cache = ArtifactCache(CACHE_DIR)
+    by_output = producers(stages)
+    waiting = {stage.name: upstream(stage, by_output) for stage in stages}
+    by_name = {stage.name: stage for stage in stages}
+    produced: Dict[str, str] = {}
+    outcome: Dict[str, str] = {}
+    running = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while waiting or running:
+            ready = [name for name, deps in waiting.items() if deps <= outcome.keys()]
+            for name in ready:
+                del waiting[name]
+                stage = by_name[name]
+                if dry_run and any(outcome[dep] != "cached" for dep in upstream(stage, by_output)):
+                    outcome[name] = "would run"
+                    print(f"{name}: would run (an upstream stage changes)")
+                    continue
+                key = stage_key(stage, cache, produced)
+                manifest = None if name in force else cache.manifest(stage, key)
+                if manifest is not None:
+                    restored = 0 if dry_run else cache.restore(manifest)
+                    produced.update(manifest)
+                    outcome[name] = "cached"
+                    print(f"{name}: cached ({key[:12]}, {restored} files restored)")
+                elif dry_run:
+                    outcome[name] = "would run"
+                    print(f"{name}: would run ({key[:12]} not cached)")
+                else:
+                    print(f"{name}: running ({key[:12]})...")
+                    future = pool.submit(execute, stage, CACHE_DIR / "logs" / f"{name}.log")
+                    running[future] = (stage, key)
+            if ready:
+                continue
+            if not running:
+                raise RuntimeError(f"Stages {', '.join(waiting)} depend on each other")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                elapsed = future.result()
+                produced.update(cache.store(stage, key))
+                outcome[stage.name] = "ran"
+                print(f"{stage.name}: ran in {elapsed:.1f}s")
+
+    cache.hashes.save()
+    counts = {o: sum(1 for value in outcome.values() if value == o) for o in ("ran", "cached", "would run")}
+    print(
+        f"Pipeline finished in {time.perf_counter() - start:.1f}s: {counts['ran']} stages ran, "
+        f"{counts['cached']} reused" + (f", {counts['would run']} would run." if dry_run else ".")
+    )
+    return outcome
+
+def parse_params(values: Sequence[str]) -> Dict[str, Dict[str, str]]:
+    params: Dict[str, Dict[str, str]] = {}
+    for value in values:
+        target, _, setting = value.partition(".")
+        name, sep, setting_value = setting.partition("=")
+        if not sep:
+            raise SystemExit(f"--param expects STAGE.NAME=VALUE, got {value!r}")
+        params.setdefault(target, {})[name] = setting_value
+    return params
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the data and model pipeline, reusing cached stage outputs.")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date, with their dependencies (default: all)")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="stages run in parallel")
+    parser.add_argument("--force", action="append", default=[], help="re-run a stage even if it is cached")
+    parser.add_argument("--param", action="append", default=[], help="STAGE.NAME=VALUE environment parameter for a stage")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    args = parser.parse_args()
+
+    stages = select_stages(STAGES, args.targets)
+    for stage_name, values in parse_params(args.param).items():
+        matching = [stage for stage in stages if stage.name == stage_name]
+        if not matching:
+            raise SystemExit(f"--param targets unknown or unselected stage {stage_name}")
+        matching[0].params.update(values)
+    try:
+        run(stages, args.jobs, args.force, args.dry_run)
+    except RuntimeError as e:
+        sys.exit(str(e))
@@ -1,8 +1,9 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
+from scripts.datasets import read_dataset, write_dataset
 
 # Load the dataset
-df = pd.read_csv('data/mshamba_merged_v2.csv')
+df = read_dataset('mshamba_merged_v2')
 
 # --- 1. Handle Missing Data ---
 
@@ -10,13 +11,13 @@ df = pd.read_csv('data/mshamba_merged_v2.csv')
 for col in ['Planted Area (Acres)', 'Yield (Kg)', 'Market Price (KES/Kg)', 'Revenue (KES)', 'Cost of Production (KES)', 'Profit (KES)']:
     if col in df.columns:
         median_val = df[col].median()
-        df[col].fillna(median_val, inplace=True)
+        df[col] = df[col].fillna(median_val)
 
 # For categorical columns, fill with the mode
 for col in ['Crop Type', 'Crop Variety', 'Season', 'Soil Type', 'Irrigation Method', 'Fertilizer Used', 'Pest Control', 'Weather Impact']:
     if col in df.columns:
         mode_val = df[col].mode()[0]
-        df[col].fillna(mode_val, inplace=True)
+        df[col] = df[col].fillna(mode_val)
 
 # --- 2. Feature Engineering (One-Hot Encoding) ---
 
@@ -24,8 +25,8 @@ for col in ['Crop Type', 'Crop Variety', 'Season', 'Soil Type', 'Irrigation Meth
 categorical_cols = ['Crop Type', 'County', 'Season', 'Soil Type', 'Irrigation Method', 'Fertilizer Used', 'Pest Control', 'Weather Impact']
 df_encoded = pd.get_dummies(df, columns=categorical_cols, drop_first=True)
 
-# Drop remaining object columns
-df_encoded = df_encoded.select_dtypes(exclude=['object'])
+# Drop the remaining text, category and date columns
+df_encoded = df_encoded.select_dtypes(include=['number', 'bool'])
 
 # --- 3. Feature Selection ---
 
@@ -38,14 +39,12 @@ y = df_encoded[target]
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # --- 5. Save the data ---
-# For simplicity, we'll save the split data into separate files
-X_train.to_csv('data/X_train_merged_v2.csv', index=False)
-X_test.to_csv('data/X_test_merged_v2.csv', index=False)
-y_train.to_csv('data/y_train_merged_v2.csv', index=False)
-y_test.to_csv('data/y_test_merged_v2.csv', index=False)
-
-print("Data preparation complete. The following files have been created in the 'data' directory:")
-print("- X_train_merged_v2.csv")
-print("- X_test_merged_v2.csv")
-print("- y_train_merged_v2.csv")
-print("- y_test_merged_v2.csv")
\ No newline at end of file
+# For simplicity, we'll save the split data into separate datasets
+for name, data in [('X_train_merged_v2', X_train), ('X_test_merged_v2', X_test), ('y_train_merged_v2', y_train.to_frame()), ('y_test_merged_v2', y_test.to_frame())]:
+    write_dataset(data, name)
+
+print("Data preparation complete. The following datasets have been created in the 'data' directory:")
+print("- X_train_merged_v2")
+print("- X_test_merged_v2")
+print("- y_train_merged_v2")
+print("- y_test_merged_v2")
@@ -3,12 +3,15 @@ import lightgbm as lgb
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import re
+import json
+import os
+from scripts.datasets import read_dataset
 
 # --- 1. Load the data ---
-X_train = pd.read_csv('data/X_train_merged_v2.csv')
-X_test = pd.read_csv('data/X_test_merged_v2.csv')
-y_train = pd.read_csv('data/y_train_merged_v2.csv')
-y_test = pd.read_csv('data/y_test_merged_v2.csv')
+X_train = read_dataset('X_train_merged_v2')
+X_test = read_dataset('X_test_merged_v2')
+y_train = read_dataset('y_train_merged_v2')
+y_test = read_dataset('y_test_merged_v2')
 
 # --- Clean column names ---
 X_train.columns = [re.sub(r'[^A-Za-z0-9_]+', '', col) for col in X_train.columns]
@@ -16,7 +19,9 @@ X_test.columns = [re.sub(r'[^A-Za-z0-9_]+', '', col) for col in X_test.columns]
 
 # --- 2. Train the model ---
 print("Training LightGBM model...")
-model = lgb.LGBMRegressor(random_state=42)
+# Extra LightGBM parameters, e.g. LGBM_PARAMS='{"n_estimators": 300}'
+params = json.loads(os.getenv('LGBM_PARAMS', '{}'))
+model = lgb.LGBMRegressor(random_state=42, **params)
 model.fit(X_train, y_train.values.ravel())
 
 # --- 3. Evaluate the model ---
@@ -1,33 +1,218 @@
+import argparse
+import inspect
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import joblib
+import lightgbm as lgb
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import GridSearchCV
-import joblib
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+from scripts.datasets import read_dataset
 
-# --- 1. Load the data ---
-X_train = pd.read_csv('data/X_train.csv')
-y_train = pd.read_csv('data/y_train.csv')
-
-# --- 2. Define the hyperparameter grid ---
-param_grid = {
-    'n_estimators': [100, 200, 300],
-    'max_depth': [10, 20, 30],
-    'min_samples_split': [2, 5, 10],
-    'min_samples_leaf': [1, 2, 4]
+# --- 1. Search spaces ---
+# The budgeted resource (trees for the forest, boosting rounds for LightGBM) is
+# assigned by successive halving, so it is not part of the spaces
+SEARCH_SPACES = {
+    "rf": {
+        "max_depth": [10, 20, 30],
+        "min_samples_split": [2, 5, 10],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": [1.0, 0.5, "sqrt"],
+    },
+    "lgbm": {
+        "num_leaves": [7, 15, 31, 63],
+        "learning_rate": [0.03, 0.1],
+        "min_child_samples": [5, 10, 20],
+        "subsample": [0.8, 1.0],
+        "colsample_bytree": [0.8, 1.0],
+        "reg_lambda": [0.0, 1.0],
+    },
 }
+# (smallest, largest) resource per model
+RESOURCES = {"rf": (25, 300), "lgbm": (100, 2000)}
+EARLY_STOPPING_ROUNDS = 50
+# Share of each fold's training rows LightGBM holds out to stop early on, so the
+# validation fold only scores the model
+EARLY_STOPPING_FRACTION = 0.15
+
+def build_model(kind: str, params: Dict, resource: int):
+    if kind == "rf":
+        return RandomForestRegressor(n_estimators=resource, random_state=42, n_jobs=1, **params)
+    return lgb.LGBMRegressor(n_estimators=resource, random_state=42, n_jobs=1, verbosity=-1, subsample_freq=1, **params)
+
+def validation_kwargs(X_valid: np.ndarray, y_valid: np.ndarray) -> Dict:
+    # LightGBM 4.7 takes the validation set as eval_X/eval_y and deprecates eval_set
+    if "eval_X" in inspect.signature(lgb.LGBMRegressor.fit).parameters:
+        return {"eval_X": X_valid, "eval_y": y_valid}
+    return {"eval_set": [(X_valid, y_valid)]}
+
+def make_folds(X: np.ndarray, y: np.ndarray, n_splits: int = 3) -> List[Tuple[np.ndarray, ...]]:
+    """
+    Slices the CV folds once, as contiguous arrays every candidate is fitted on. Each
+    fold is (train, early-stopping part of train, rest of train, validation) rows.
+    """
+    folds = []
+    rng = np.random.default_rng(42)
+    for train, valid in KFold(n_splits=n_splits, shuffle=True, random_state=42).split(X):
+        shuffled = rng.permutation(train)
+        n_stop = max(1, int(len(train) * EARLY_STOPPING_FRACTION))
+        stop, fit = shuffled[:n_stop], shuffled[n_stop:]
+        folds.append((
+            np.ascontiguousarray(X[train]), y[train],
+            np.ascontiguousarray(X[stop]), y[stop],
+            np.ascontiguousarray(X[fit]), y[fit],
+            np.ascontiguousarray(X[valid]), y[valid],
+        ))
+    return folds
+
+# Folds of the worker process, set once by the pool initializer instead of being
+# pickled with every task
+_FOLDS: List = []
+
+def _init_worker(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+def evaluate(kind: str, params: Dict, resource: int) -> Dict:
+    """
+    Cross-validates one candidate with the given resource. Boosting trains on the
+    fold's training rows minus a held-out part it stops early on, so the validation
+    fold stays unseen; the mean best iteration is reported.
+    """
+    maes, r2s, iterations = [], [], []
+    start = time.perf_counter()
+    for X_train, y_train, X_stop, y_stop, X_fit, y_fit, X_valid, y_valid in _FOLDS:
+        model = build_model(kind, params, resource)
+        if kind == "lgbm":
+            model.fit(
+                X_fit, y_fit, eval_metric="l1", **validation_kwargs(X_stop, y_stop),
+                callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+            )
+            iterations.append(model.best_iteration_ or resource)
+        else:
+            model.fit(X_train, y_train)
+            iterations.append(resource)
+        y_pred = model.predict(X_valid)
+        maes.append(mean_absolute_error(y_valid, y_pred))
+        r2s.append(r2_score(y_valid, y_pred))
+    return {
+        "model": kind,
+        "params": params,
+        "resource": resource,
+        "n_estimators": int(round(np.mean(iterations))),
+        "mae": float(np.mean(maes)),
+        "mae_std": float(np.std(maes)),
+        "r2": float(np.mean(r2s)),
+        "fit_seconds": time.perf_counter() - start,
+    }
+
+def successive_halving(
+    kind: str,
+    pool: ProcessPoolExecutor,
+    n_candidates: Optional[int] = None,
+    eta: int = 3,
+    seed: int = 42,
+) -> List[Dict]:
+    """
+    Evaluates candidates with a small resource, keeps the best 1/eta of them and
+    multiplies their resource by eta, until one is left or the maximum resource is
+    reached. Returns every evaluation, tagged with its rung.
+    """
+    candidates = list(ParameterGrid(SEARCH_SPACES[kind]))
+    if n_candidates is not None and n_candidates < len(candidates):
+        rng = np.random.default_rng(seed)
+        candidates = [candidates[i] for i in rng.choice(len(candidates), n_candidates, replace=False)]
+    resource, max_resource = RESOURCES[kind]
+
+    evaluations = []
+    rung = 0
+    while True:
+        start = time.perf_counter()
+        results = list(pool.map(evaluate, [kind] * len(candidates), candidates, [resource] * len(candidates)))
+        for result in results:
+            result["rung"] = rung
+        evaluations.extend(results)
+        best = min(results, key=lambda r: r["mae"])
+        print(
+            f"{kind} rung {rung}: {len(candidates)} candidates x {resource} estimators in {time.perf_counter() - start:.1f}s, "
+            f"best MAE {best['mae']:.2f}"
+        )
+        if len(candidates) <= 1 or resource >= max_resource:
+            return evaluations
+        keep = max(1, math.ceil(len(candidates) / eta))
+        candidates = [r["params"] for r in sorted(results, key=lambda r: r["mae"])[:keep]]
+        resource = min(resource * eta, max_resource)
+        rung += 1
+
+def leaderboard(evaluations: List[Dict]) -> pd.DataFrame:
+    """
+    The evaluation of every candidate at the highest rung it reached, best MAE first.
+    """
+    df = pd.DataFrame(evaluations)
+    df["params_key"] = df["params"].map(lambda p: repr(sorted(p.items())))
+    df = df.sort_values("rung").groupby(["model", "params_key"], sort=False).tail(1)
+    df = df.sort_values(["rung", "mae"], ascending=[False, True]).drop(columns="params_key")
+    df["params"] = df["params"].map(lambda p: ", ".join(f"{k}={v}" for k, v in p.items()))
+    return df.reset_index(drop=True)[["model", "rung", "resource", "n_estimators", "mae", "mae_std", "r2", "fit_seconds", "params"]]
+
+def refit_best(evaluations: List[Dict], X: pd.DataFrame, y: np.ndarray):
+    # --- Refit the best final-rung candidate on the whole training set ---
+    final_rung: Dict[str, int] = {}
+    for e in evaluations:
+        final_rung[e["model"]] = max(final_rung.get(e["model"], 0), e["rung"])
+    best = min((e for e in evaluations if e["rung"] == final_rung[e["model"]]), key=lambda e: e["mae"])
+    model = build_model(best["model"], best["params"], best["n_estimators"])
+    if best["model"] == "lgbm":
+        # Same column name cleaning as train_lgbm_model
+        X = X.rename(columns=lambda col: re.sub(r'[^A-Za-z0-9_]+', '', col))
+    model.set_params(n_jobs=-1)
+    model.fit(X, y)
+    return best, model
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search for the yield models.")
+    parser.add_argument("--models", nargs="+", choices=list(SEARCH_SPACES), default=list(SEARCH_SPACES))
+    parser.add_argument("--train", default="X_train_merged_v2", help="feature dataset to tune on")
+    parser.add_argument("--target", default="y_train_merged_v2", help="target dataset to tune on")
+    parser.add_argument("--candidates", type=int, help="random subset of each search space to start from (default: all)")
+    parser.add_argument("--eta", type=int, default=3, help="fraction kept (1/eta) and resource growth per rung")
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--leaderboard", default="tuning_leaderboard.csv", help="where the leaderboard is written")
+    parser.add_argument("--save", help="refit the best candidate on the whole training set and save it here")
+    args = parser.parse_args()
+
+    # --- 2. Load the data and slice the folds once ---
+    X_train = read_dataset(args.train)
+    y_train = read_dataset(args.target).to_numpy(dtype=np.float64).ravel()
+    folds = make_folds(X_train.to_numpy(dtype=np.float64), y_train, args.folds)
 
-# --- 3. Perform Grid Search ---
-print("Performing Grid Search...")
-rf = RandomForestRegressor(random_state=42)
-grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=3, n_jobs=-1, verbose=2)
-grid_search.fit(X_train, y_train.values.ravel())
+    # --- 3. Search every model on one process pool ---
+    start = time.perf_counter()
+    evaluations = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(folds,)) as pool:
+        for kind in args.models:
+            evaluations.extend(successive_halving(kind, pool, args.candidates, args.eta))
+    print(f"Searched {len(evaluations)} evaluations in {time.perf_counter() - start:.1f}s on {args.workers} workers.")
 
-# --- 4. Print the best parameters ---
-print("Best parameters found:")
-print(grid_search.best_params_)
+    # --- 4. Leaderboard ---
+    board = leaderboard(evaluations)
+    board.to_csv(args.leaderboard, index=False)
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(board.head(10).to_string(index=False))
+    print(f"Leaderboard saved to {args.leaderboard}")
 
-# --- 5. Train and save the best model ---
-print("Training and saving the best model...")
-best_model = grid_search.best_estimator_
-joblib.dump(best_model, 'yield_predictor_tuned.joblib')
+    # --- 5. Train and save the best model ---
+    if args.save:
+        best, model = refit_best(evaluations, X_train, y_train)
+        joblib.dump(model, args.save)
+        print(f"Best model ({best['model']}, MAE {best['mae']:.2f}) saved to {args.save}")
 
-print("Tuned model saved to yield_predictor_tuned.joblib")
+if __name__ == "__main__":
+    main()
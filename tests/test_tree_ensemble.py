@@ -0,0 +1,45 @@
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.model_registry import ARTIFACT_PREFIX, ARTIFACT_SUFFIX, version_from_path
+from app.services.tree_ensemble import MISSING_ZERO, TreeEnsemble
+
+ROOT = Path(__file__).resolve().parent.parent
+ARTIFACTS = sorted(ROOT.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}"))
+
+def with_missing_values(X: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    The rows of X three times: as they are, with a fifth of the cells set to NaN and
+    with a fifth set to zero.
+    """
+    rng = np.random.default_rng(seed)
+    X = X.astype(np.float64)
+    with_nan = X.mask(rng.random(X.shape) < 0.2)
+    with_zero = X.mask(rng.random(X.shape) < 0.2, 0.0)
+    return pd.concat([X, with_nan, with_zero], ignore_index=True)
+
+def assert_parity(model, X: pd.DataFrame):
+    expected = model.predict(X)
+    actual = TreeEnsemble.from_model(model).predict(X.to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6)
+
+@pytest.mark.parametrize("path", ARTIFACTS, ids=[p.name for p in ARTIFACTS])
+def test_matches_shipped_model(path, monkeypatch):
+    from scripts.export_tree_ensembles import load_test_features
+
+    monkeypatch.chdir(ROOT)
+    model = joblib.load(path)
+    X = load_test_features(model, version_from_path(path)).iloc[:500]
+    assert_parity(model, with_missing_values(X))
+
+def test_matches_lightgbm_zero_as_missing():
+    lightgbm = pytest.importorskip("lightgbm")
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(2000, 4)), columns=["a", "b", "c", "d"])
+    X[X.abs() < 0.3] = 0.0
+    y = X["a"] * 3 + np.where(X["b"] == 0, 5.0, X["b"]) + rng.normal(scale=0.1, size=len(X))
+    model = lightgbm.LGBMRegressor(n_estimators=20, num_leaves=8, zero_as_missing=True, verbose=-1).fit(X, y)
+    assert (TreeEnsemble.from_model(model).missing_type == MISSING_ZERO).any()
+    assert_parity(model, with_missing_values(X.iloc[:500]))